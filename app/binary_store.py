@@ -0,0 +1,745 @@
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+
+from app.filelock import FileLock
+from app.indexes import matches
+from app.metrics import RECOVERIES_TOTAL, timed
+from app.records import FIELDS, pack_time, unpack_time
+from app.storage import Transaction, TaskStore, apply_ops, load_tasks_file
+
+# ==================================================================
+# Tryb "binary": migawka zadań w formacie binarnym czytanym przez mmap.
+# Zamiast parsować cały tasks.json przy starcie i każdym odczycie,
+# mapujemy plik do pamięci i dekodujemy tylko te zadania, których
+# dotyczy żądanie (PUT /tasks/{id} to jedno wyszukiwanie binarne).
+#
+# Układ pliku (liczby little-endian):
+#   nagłówek   HEADER + crc32 nagłówka (m.in. następne wolne id — przetrwa
+#              usunięcie zadania o najwyższym id i przepisanie pliku)
+#   rekordy    slots x RECORD, stała szerokość:
+#              id, flagi, (offset, długość) tytułu i opisu w stercie,
+#              created_at i completed_at jako sekundy od epoki;
+#              rekordy usuniętych zadań mają flagę DELETED
+#   sterta     napisy UTF-8 (powtarzające się tytuły zapisane raz)
+#   indeks id  count x (id, numer rekordu), posortowane po id
+#   zmiany     ostatnie CHANGE_LOG_KEEP par (seq, id) — które zadania
+#              zmieniły kolejne zapisy; inne procesy nakładają tylko je
+# Każda sekcja ma własną sumę crc32 sprawdzaną przy otwarciu. Zadania,
+# które nie pasują do stałego układu (dodatkowe pola, daty w innym
+# formacie), zapisujemy w stercie w całości jako JSON (flaga RAW).
+#
+# Zapis jak w trybie JSON: plik tymczasowy + fsync, kopia .bak, atomowa
+# podmiana; uszkodzony plik trafia do *.corrupt.TIMESTAMP, a dane
+# wracają z .bak. Nowy plik powstaje z poprzedniego: niezmienione
+# rekordy, sterta i indeks są kopiowane bajt w bajt, kodujemy tylko
+# zmienione zadania (ich napisy dopisujemy na końcu sterty). Gdy
+# nieużywane miejsce (usunięte rekordy, porzucone napisy) zajmie ponad
+# połowę pliku, zapis koduje wszystko od nowa.
+# Konwersja: python -m app.binary_store (patrz niżej).
+# ==================================================================
+
+MAGIC = b"TASKBIN1"
+VERSION = 4
+# magic, wersja, rozmiar rekordu, liczba rekordów (z usuniętymi), liczba
+# zadań, offsety sekcji, liczba wpisów zmian, ostatni seq, nieużywane
+# bajty, następne id, crc32 rekordów / sterty / indeksu / zmian
+HEADER = struct.Struct("<8sHHQQQQQQQQQQqIIII")
+HEADER_CRC = struct.Struct("<I")
+RECORD = struct.Struct("<qB3xQIQIqq")
+INDEX_ENTRY = struct.Struct("<qQ")
+CHANGE_ENTRY = struct.Struct("<qq")
+CHANGE_LOG_KEEP = 10_000
+# poniżej tylu nieużywanych bajtów plik nigdy nie jest przepisywany od nowa
+COMPACT_MIN_BYTES = 1 << 20
+
+COMPLETED = 1
+HAS_CREATED = 2
+HAS_COMPLETED_AT = 4
+RAW = 8
+DESCRIPTION_NONE = 16
+DELETED = 32
+
+# offset flag w rekordzie (zaraz po id) i kolumny dat — do filtrowania
+# bez rozpakowywania całych rekordów
+_FLAGS_OFFSET = 8
+_TIME_COLUMNS = {"created_at": struct.Struct("<36xq8x"), "completed_at": struct.Struct("<44xq")}
+_HAS_TIME = {"created_at": HAS_CREATED, "completed_at": HAS_COMPLETED_AT}
+
+
+class CorruptSnapshot(ValueError):
+    pass
+
+
+# --- zapis ---
+
+def _fits_record(task):
+    # czy zadanie da się zapisać w stałym układzie bez utraty informacji
+    return (
+        tuple(task) == FIELDS
+        and type(task["id"]) is int
+        and type(task["title"]) is str
+        and (task["description"] is None or type(task["description"]) is str)
+        and type(task["completed"]) is bool
+        and all(task[f] is None or isinstance(pack_time(task[f]), int) for f in ("created_at", "completed_at"))
+    )
+
+
+def _heap_writer(heap, base=0):
+    # heap_put(dane, dedupe) dopisuje napis do sterty i zwraca (offset,
+    # długość); base to długość części sterty zapisanej wcześniej
+    shared = {}
+
+    def heap_put(data, dedupe=False):
+        if dedupe and data in shared:
+            return shared[data]
+        ref = (base + len(heap), len(data))
+        heap.extend(data)
+        if dedupe:
+            shared[data] = ref
+        return ref
+
+    return heap_put
+
+
+def _encode_record(task, heap_put):
+    flags = COMPLETED if task.get("completed") else 0
+    created = completed_at = 0
+    if _fits_record(task):
+        title = heap_put(task["title"].encode("utf-8"), dedupe=True)
+        if task["description"] is None:
+            flags |= DESCRIPTION_NONE
+            description = (0, 0)
+        else:
+            description = heap_put(task["description"].encode("utf-8"))
+        if task["created_at"] is not None:
+            flags |= HAS_CREATED
+            created = pack_time(task["created_at"])
+        if task["completed_at"] is not None:
+            flags |= HAS_COMPLETED_AT
+            completed_at = pack_time(task["completed_at"])
+    else:
+        flags |= RAW
+        raw = json.dumps(dict(task), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        title = heap_put(raw)
+        description = (0, 0)
+    return RECORD.pack(task["id"], flags, *title, *description, created, completed_at)
+
+
+def _file_parts(slots, records, heap_parts, crc_heap, index, changes, last_seq, garbage, next_id):
+    # Sekcje -> lista kawałków pliku (nagłówek na początku). Sterta może
+    # składać się z kilku kawałków, a jej crc32 liczy wywołujący — przy
+    # zapisie przyrostowym tylko dla dopisanej części.
+    changes_bytes = b"".join(CHANGE_ENTRY.pack(*entry) for entry in changes)
+    records_off = HEADER.size + HEADER_CRC.size
+    heap_off = records_off + len(records)
+    index_off = heap_off + sum(len(part) for part in heap_parts)
+    changes_off = index_off + len(index)
+    header = HEADER.pack(
+        MAGIC, VERSION, RECORD.size, slots, len(index) // INDEX_ENTRY.size, records_off, heap_off,
+        index_off - heap_off, index_off, changes_off, len(changes), last_seq, garbage, next_id,
+        zlib.crc32(records), crc_heap, zlib.crc32(index), zlib.crc32(changes_bytes),
+    )
+    return [header, HEADER_CRC.pack(zlib.crc32(header)), records, *heap_parts, index, changes_bytes]
+
+
+def _snapshot_parts(tasks, changes=(), last_seq=0, next_id=1):
+    records = bytearray()
+    heap = bytearray()
+    heap_put = _heap_writer(heap)
+    index = []
+    for number, task in enumerate(tasks):
+        records.extend(_encode_record(task, heap_put))
+        index.append((task["id"], number))
+    index.sort()
+    index_bytes = b"".join(INDEX_ENTRY.pack(*entry) for entry in index)
+    next_id = max(next_id, index[-1][0] + 1 if index else 1)
+    return _file_parts(len(index), records, [heap], zlib.crc32(heap), index_bytes, changes, last_seq, 0, next_id)
+
+
+def encode_snapshot(tasks, changes=(), last_seq=0, next_id=1):
+    """
+    Lista zadań (słowniki / rekordy) -> bajty pliku binarnego.
+    changes: ostatnie pary (seq, id) dziennika zmian, last_seq: numer
+    ostatniego zapisu, next_id: najmniejsze id do nadania (co najmniej
+    największe id + 1).
+    """
+    return b"".join(_snapshot_parts(tasks, changes, last_seq, next_id))
+
+
+def _write_temp(path, parts):
+    # Kawałki pliku -> plik tymczasowy obok `path` (z fsync); zwraca jego ścieżkę.
+    dirpath = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix="tasks_", suffix=".tmp", dir=dirpath)
+    try:
+        with os.fdopen(fd, "wb") as tmpf:
+            for part in parts:
+                tmpf.write(part)
+            tmpf.flush()
+            with timed("fsync"):
+                os.fsync(tmpf.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def _install(path, tmp_path):
+    # Kopia .bak poprzedniej wersji i atomowa podmiana. Plik migawki nigdy
+    # nie jest zmieniany w miejscu, więc zamiast kopiować go bajt po bajcie
+    # wystarczy drugie dowiązanie (po podmianie .bak ma stary plik na
+    # wyłączność); kopiujemy tylko tam, gdzie dowiązań nie ma.
+    try:
+        if os.path.exists(path):
+            bak = path + ".bak"
+            try:
+                with timed("backup"):
+                    link = bak + ".tmp"
+                    if os.path.exists(link):
+                        os.remove(link)
+                    try:
+                        os.link(path, link)
+                        os.replace(link, bak)
+                    except OSError:
+                        shutil.copy(path, bak)
+            except Exception:
+                print(f"Nie udało się utworzyć backupu {os.path.basename(path)}", flush=True)
+        with timed("replace"):
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+
+
+def save_binary_file(path, tasks, changes=(), last_seq=0, next_id=1):
+    # Ten sam przebieg co save_tasks_file: plik tymczasowy + fsync,
+    # kopia .bak poprzedniej wersji, atomowa podmiana.
+    with timed("serialize"):
+        parts = _snapshot_parts(tasks, changes, last_seq, next_id)
+    _install(path, _write_temp(path, parts))
+
+
+# --- odczyt ---
+
+class BinarySnapshot:
+    """
+    Plik binarny otwarty przez mmap. Zadania dekodujemy na żądanie:
+    get(id) — wyszukiwanie binarne w indeksie id i jeden rekord,
+    select(...) — filtr po polach stałej szerokości, dekodujemy tylko
+    pasujące rekordy.
+    """
+
+    def __init__(self, path, verify=True):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # pusty plik nie daje się zmapować
+                raise CorruptSnapshot(f"{os.path.basename(path)}: pusty plik")
+        try:
+            self._parse_header(verify)
+        except BaseException:
+            self._mm.close()
+            raise
+
+    def _parse_header(self, verify):
+        mm = self._mm
+        if len(mm) < HEADER.size + HEADER_CRC.size:
+            raise CorruptSnapshot(f"{os.path.basename(self.path)}: za krótki plik")
+        fields = HEADER.unpack_from(mm, 0)
+        (magic, version, record_size, slots, count, records_off, heap_off, heap_len, index_off,
+         changes_off, changes_count, last_seq, garbage, next_id, crc_records, crc_heap, crc_index, crc_changes) = fields
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise CorruptSnapshot(f"{os.path.basename(self.path)}: nieznany format")
+        if HEADER_CRC.unpack_from(mm, HEADER.size)[0] != zlib.crc32(mm[:HEADER.size]):
+            raise CorruptSnapshot(f"{os.path.basename(self.path)}: zła suma kontrolna nagłówka")
+        if records_off + slots * RECORD.size != heap_off or heap_off + heap_len != index_off \
+                or index_off + count * INDEX_ENTRY.size != changes_off \
+                or changes_off + changes_count * CHANGE_ENTRY.size != len(mm):
+            raise CorruptSnapshot(f"{os.path.basename(self.path)}: niezgodne rozmiary sekcji")
+        if verify:
+            sections = (
+                (records_off, heap_off, crc_records),
+                (heap_off, index_off, crc_heap),
+                (index_off, changes_off, crc_index),
+                (changes_off, len(mm), crc_changes),
+            )
+            with memoryview(mm) as view:
+                for start, end, crc in sections:
+                    if zlib.crc32(view[start:end]) != crc:
+                        raise CorruptSnapshot(f"{os.path.basename(self.path)}: zła suma kontrolna")
+        self.count = count
+        self.slots = slots
+        self.garbage = garbage
+        self._crc_heap = crc_heap
+        self._records_off = records_off
+        self._heap_off = heap_off
+        self._index_off = index_off
+        self._changes_off = changes_off
+        self._changes_count = changes_count
+        self.last_seq = last_seq
+        self.next_id = next_id
+
+    def close(self):
+        self._mm.close()
+
+    def __len__(self):
+        return self.count
+
+    def changes(self):
+        """Pary (seq, id) z dziennika zmian zapisanego w pliku."""
+        end = self._changes_off + self._changes_count * CHANGE_ENTRY.size
+        return list(CHANGE_ENTRY.iter_unpack(self._mm[self._changes_off:end]))
+
+    def changed_since(self, seq):
+        # id zadań zmienionych po zapisie `seq` albo None, gdy dziennik w
+        # pliku już tak daleko nie sięga
+        if seq == self.last_seq:
+            return []
+        changes = self.changes()
+        if seq > self.last_seq or not changes or changes[0][0] > seq + 1:
+            return None
+        return list(dict.fromkeys(task_id for s, task_id in changes if s > seq))
+
+    def _string(self, offset, length):
+        start = self._heap_off + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def task(self, number):
+        (task_id, flags, title_off, title_len, desc_off, desc_len, created, completed_at) = RECORD.unpack_from(
+            self._mm, self._records_off + number * RECORD.size)
+        if flags & RAW:
+            return json.loads(self._string(title_off, title_len))
+        return {
+            "id": task_id,
+            "title": self._string(title_off, title_len),
+            "description": None if flags & DESCRIPTION_NONE else self._string(desc_off, desc_len),
+            "completed": bool(flags & COMPLETED),
+            "created_at": unpack_time(created) if flags & HAS_CREATED else None,
+            "completed_at": unpack_time(completed_at) if flags & HAS_COMPLETED_AT else None,
+        }
+
+    def _index_entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._mm, self._index_off + position * INDEX_ENTRY.size)
+
+    def _index_position(self, task_id):
+        # pierwsza pozycja w indeksie z id >= task_id (wyszukiwanie binarne)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._index_entry(mid)[0] < task_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, task_id):
+        # numer rekordu zadania albo None
+        position = self._index_position(task_id)
+        if position < self.count:
+            found, number = self._index_entry(position)
+            if found == task_id:
+                return number
+        return None
+
+    def page_by_id(self, after=None, completed=None, limit=None):
+        """
+        Zadania w kolejności id, od pierwszego id > `after` — przejście po
+        indeksie bez dekodowania pominiętych rekordów. Zwraca (zadania,
+        ostatnie zwrócone id albo None, gdy to koniec).
+        """
+        position = 0 if after is None else self._index_position(after + 1)
+        want = None if completed is None else (COMPLETED if completed else 0)
+        page = []
+        for position in range(position, self.count):
+            task_id, number = self._index_entry(position)
+            if want is not None:
+                flags = self._mm[self._records_off + number * RECORD.size + _FLAGS_OFFSET]
+                if flags & RAW:
+                    if bool(self.task(number).get("completed")) != completed:
+                        continue
+                elif flags & COMPLETED != want:
+                    continue
+            if limit is not None and len(page) == limit:
+                return page, page[-1]["id"]
+            page.append(self.task(number))
+        return page, None
+
+    def get(self, task_id):
+        if type(task_id) is not int:
+            return None
+        number = self.find(task_id)
+        return self.task(number) if number is not None else None
+
+    def max_id(self):
+        if not self.count:
+            return 0
+        return self._index_entry(self.count - 1)[0]
+
+    def _flags(self):
+        # jeden bajt flag co RECORD.size bajtów — wycinek z krokiem
+        return self._mm[self._records_off + _FLAGS_OFFSET:self._heap_off:RECORD.size]
+
+    def tasks(self):
+        return [self.task(i) for i, f in enumerate(self._flags()) if not f & DELETED]
+
+    def select(self, completed=None, ranges=None):
+        """Zadania spełniające filtry (jak matches()), w kolejności pliku."""
+        start, end = self._records_off, self._heap_off
+        if not ranges:
+            if completed is None:
+                return self.tasks()
+            want = COMPLETED if completed else 0
+            return [self.task(i) for i, f in enumerate(self._flags()) if not f & DELETED and f & COMPLETED == want]
+        bounds = {field: tuple(None if b is None else pack_time(b) for b in pair) for field, pair in ranges.items()}
+        if any(isinstance(b, str) for pair in bounds.values() for b in pair):
+            # granica spoza formatu kanonicznego (np. data sprzed 1970) —
+            # porównujemy napisy na zdekodowanych zadaniach
+            return [t for t in self.tasks() if matches(t, completed, ranges)]
+        # Czytamy tylko kolumny potrzebne do filtra (bajt flag i liczby z
+        # dat); dekodujemy wyłącznie pasujące rekordy.
+        records = self._mm[start:end]
+        flags = records[_FLAGS_OFFSET::RECORD.size]
+        columns = {field: [v for (v,) in _TIME_COLUMNS[field].iter_unpack(records)] for field in bounds}
+        result = []
+        for number, f in enumerate(flags):
+            if f & DELETED:
+                continue
+            if f & RAW:
+                task = self.task(number)
+                if matches(task, completed, ranges):
+                    result.append(task)
+                continue
+            if completed is not None and bool(f & COMPLETED) != completed:
+                continue
+            for field, (after, before) in bounds.items():
+                if not f & _HAS_TIME[field] or not _in_range(columns[field][number], after, before):
+                    break
+            else:
+                result.append(self.task(number))
+        return result
+
+    def patch(self, changed, changes, last_seq, next_id):
+        """
+        Kawałki nowego pliku: ta migawka ze zmienionymi zadaniami
+        (`changed`: id -> zadanie albo None, gdy usunięte). Niezmienione
+        rekordy, sterta i indeks są kopiowane bajt w bajt; kodujemy tylko
+        zmienione zadania. Zwraca None, gdy nieużywane miejsce przekroczy
+        połowę pliku — wtedy lepiej zapisać wszystko od nowa.
+
+        Kawałki mogą wskazywać na mapowanie tej migawki, więc trzeba je
+        zapisać przed jej zamknięciem.
+        """
+        records = bytearray(self._mm[self._records_off:self._heap_off])
+        tail = bytearray()
+        heap_put = _heap_writer(tail, self._index_off - self._heap_off)
+        slots, garbage = self.slots, self.garbage
+        # (pozycja w starym indeksie, ile starych wpisów pominąć, nowy wpis)
+        splices = []
+        for task_id in sorted(changed):
+            task = changed[task_id]
+            position = self._index_position(task_id)
+            number = self.find(task_id)
+            if number is not None:
+                # napisy starej wersji przestają być używane (szacunek —
+                # tytuł mógł być współdzielony z innym zadaniem)
+                garbage += sum(RECORD.unpack_from(records, number * RECORD.size)[3:6:2])
+            if task is None:
+                if number is not None:
+                    records[number * RECORD.size + _FLAGS_OFFSET] = DELETED
+                    garbage += RECORD.size
+                    splices.append((position, 1, b""))
+                continue
+            record = _encode_record(task, heap_put)
+            if number is None:
+                splices.append((position, 0, INDEX_ENTRY.pack(task_id, slots)))
+                records.extend(record)
+                slots += 1
+            else:
+                records[number * RECORD.size:(number + 1) * RECORD.size] = record
+        if garbage > COMPACT_MIN_BYTES and 2 * garbage > len(self._mm):
+            return None
+        index = bytearray()
+        with memoryview(self._mm) as view:
+            old_index = view[self._index_off:self._changes_off]
+            previous = 0
+            for position, skip, entry in splices:
+                index += old_index[previous * INDEX_ENTRY.size:position * INDEX_ENTRY.size]
+                index += entry
+                previous = position + skip
+            index += old_index[previous * INDEX_ENTRY.size:]
+            old_index.release()
+        heap = memoryview(self._mm)[self._heap_off:self._index_off]
+        return _file_parts(slots, records, [heap, tail], zlib.crc32(tail, self._crc_heap),
+                           index, changes, last_seq, garbage, next_id)
+
+
+def _in_range(value, after, before):
+    # jak matches(), ale na sekundach od epoki; granice wyłączne
+    if after is not None and not value > after:
+        return False
+    if before is not None and not value < before:
+        return False
+    return True
+
+
+def open_binary_file(path):
+    # Otwiera migawkę, a jeśli jest uszkodzona — przenosi ją na bok
+    # (*.corrupt.TIMESTAMP) i próbuje przywrócić kopię .bak; gdy i to się
+    # nie uda, zaczynamy od pustej migawki (jak load_tasks_file dla JSON).
+    try:
+        with timed("load"):
+            return BinarySnapshot(path)
+    except CorruptSnapshot as exc:
+        print(f"Uszkodzona migawka: {exc}", flush=True)
+    shutil.move(path, path + f".corrupt.{int(time.time())}")
+    bak = path + ".bak"
+    if os.path.exists(bak):
+        shutil.copy(bak, path)
+        try:
+            snapshot = BinarySnapshot(path)
+            RECOVERIES_TOTAL.inc("binary", "restored_from_backup")
+            return snapshot
+        except CorruptSnapshot:
+            os.remove(path)
+    with open(path, "wb") as f:
+        f.write(encode_snapshot([]))
+    RECOVERIES_TOTAL.inc("binary", "reset_empty")
+    return BinarySnapshot(path)
+
+
+class BinaryFileStore(TaskStore):
+    """
+    Magazyn zadań w pliku binarnym (mmap), bez trzymania zadań w pamięci.
+
+    Odczyty (get, list z filtrami) dekodują tylko potrzebne rekordy.
+    Zapis tworzy nową migawkę: kopię poprzedniej z podmienionymi rekordami
+    zmienionych zadań (BinarySnapshot.patch — kodujemy tylko je). Odbywa
+    się pod blokadą pliku `<path>.lock`, więc tryb działa też przy
+    kilku procesach; zmiany z innych procesów wykrywamy po podpisie pliku.
+
+    Jak w IndexedTaskStore: `_lock` trzyma zapis przez całą transakcję, a
+    odczyty biorą tylko krótką `_read_lock`, pod którą podmieniamy migawkę
+    (zamknięcie starego mapowania, podmiana pliku, otwarcie nowego).
+    Kodowanie i fsync nowego pliku nie blokują odczytów.
+
+    Parametry:
+    - path: plik migawki (np. data/tasks.bin)
+    - migrate_from: opcjonalny tasks.json importowany, gdy migawki nie ma
+    """
+
+    def __init__(self, path, migrate_from=None):
+        super().__init__()
+        self.path = path
+        self._lock = threading.RLock()
+        self._read_lock = threading.Lock()
+        self._file_lock = FileLock(path + ".lock")
+        self._snapshot = None
+        self._signature = None
+        with self._file_lock:
+            if not os.path.exists(path):
+                tasks = []
+                if migrate_from and os.path.exists(migrate_from):
+                    tasks = _json_tasks(migrate_from)
+                save_binary_file(path, tasks)
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _unchanged(self):
+        signature = self._stat_signature()
+        return self._snapshot is not None and signature is not None and signature == self._signature
+
+    def refresh(self):
+        if self._unchanged():
+            return
+        # trwający commit albo przeładowanie w innym wątku — odczyt dostaje
+        # bieżącą migawkę zamiast czekać (czeka tylko pierwszy odczyt)
+        if not self._lock.acquire(blocking=self._snapshot is None):
+            return
+        try:
+            if self._unchanged():
+                return
+            with self._file_lock:
+                signature = self._stat_signature()
+                snapshot = open_binary_file(self.path)
+                if self._stat_signature() != signature:
+                    signature = None
+            with self._read_lock:
+                previous = self._snapshot
+                self._snapshot, self._signature = snapshot, signature
+            if previous is None:
+                return
+            # Plik zmienił inny proces: dziennik zmian w pliku mówi, które
+            # zadania — słuchacze dostają tylko je. Gdy dziennik nie sięga
+            # naszej wersji (albo plik odtworzono z kopii), robimy reset.
+            # (odczyty używają migawki tylko pod _read_lock, więc starej nikt
+            # już nie czyta)
+            changed = snapshot.changed_since(previous.last_seq)
+            previous.close()
+            if changed is None:
+                self._notify_reset(snapshot.tasks())
+            elif changed:
+                self._notify_apply([
+                    ("put", task) if task is not None else ("delete", task_id)
+                    for task_id, task in ((i, snapshot.get(i)) for i in changed)
+                ])
+        finally:
+            self._lock.release()
+
+    def all(self):
+        self.refresh()
+        with self._read_lock:
+            return self._snapshot.tasks()
+
+    def get(self, task_id):
+        self.refresh()
+        with self._read_lock:
+            return self._snapshot.get(task_id)
+
+    def list(self, completed=None, ranges=None):
+        self.refresh()
+        with self._read_lock:
+            return self._snapshot.select(completed, ranges)
+
+    def page(self, completed=None, sort="id", after=None, limit=None, ranges=None):
+        # Stronicowanie po id bez filtrów zakresu idzie wprost po indeksie
+        # id w pliku; pozostałe przypadki — jak w TaskStore (cała lista).
+        if (sort or "id") != "id" or ranges or not (after is None or (len(after) == 1 and type(after[0]) is int)):
+            return super().page(completed, sort, after, limit, ranges)
+        self.refresh()
+        with self._read_lock:
+            tasks, last_id = self._snapshot.page_by_id(None if after is None else after[0], completed, limit)
+        return tasks, None if last_id is None else (last_id,)
+
+    def count(self):
+        self.refresh()
+        with self._read_lock:
+            return len(self._snapshot)
+
+    def data_files(self):
+        return [self.path]
+
+    def _get_committed(self, task_id):
+        return self._snapshot.get(task_id)
+
+    def _next_id(self):
+        return max(self._snapshot.next_id, self._snapshot.max_id() + 1)
+
+    @contextmanager
+    def transaction(self):
+        with ExitStack() as locks:
+            with timed("lock_wait"):
+                locks.enter_context(self._lock)
+                locks.enter_context(self._file_lock)
+            self.refresh()
+            tx = Transaction(self)
+            yield tx
+            if tx.ops:
+                changed = {}
+                seq = self._snapshot.last_seq
+                changes = self._snapshot.changes()
+                for op, arg in tx.ops:
+                    task_id = arg["id"] if op == "put" else arg
+                    changed[task_id] = arg if op == "put" else None
+                    seq += 1
+                    changes.append((seq, task_id))
+                changes = changes[-CHANGE_LOG_KEEP:]
+                # id usuniętych zadań też liczą się do licznika
+                next_id = max([self._next_id()] + [task_id + 1 for task_id in changed])
+                with timed("serialize"):
+                    parts = self._snapshot.patch(changed, changes, seq, next_id)
+                    if parts is None:
+                        tasks = {t["id"]: t for t in self._snapshot.tasks()}
+                        apply_ops(tasks, tx.ops)
+                        parts = _snapshot_parts(tasks.values(), changes, seq, next_id)
+                try:
+                    tmp_path = _write_temp(self.path, parts)
+                finally:
+                    for part in parts:
+                        if isinstance(part, memoryview):
+                            part.release()
+                with self._read_lock:
+                    # mapowanie zamykamy przed podmianą pliku (wymóg Windows);
+                    # gdy podmiana się nie uda, otwieramy z powrotem stary plik
+                    self._snapshot.close()
+                    try:
+                        _install(self.path, tmp_path)
+                    finally:
+                        self._snapshot = BinarySnapshot(self.path, verify=False)
+                        self._signature = self._stat_signature()
+                self._notify_apply(tx.ops)
+
+    def close(self):
+        with self._lock, self._read_lock:
+            if self._snapshot is not None:
+                self._snapshot.close()
+                self._snapshot = None
+
+
+# --- konwersja ---
+
+def _json_tasks(json_path):
+    # Format binarny wymaga liczbowych id — jak przy imporcie do SQLite
+    # pomijamy zadania bez nich; przy powtórzonym id wygrywa ostatnie.
+    tasks = {t["id"]: t for t in load_tasks_file(json_path) if type(t.get("id")) is int}
+    return list(tasks.values())
+
+
+def json_to_binary(json_path, bin_path):
+    tasks = _json_tasks(json_path)
+    save_binary_file(bin_path, tasks)
+    return len(tasks)
+
+
+def binary_to_json(bin_path, json_path):
+    from app.storage import save_tasks_file
+
+    snapshot = BinarySnapshot(bin_path)
+    try:
+        tasks = snapshot.tasks()
+    finally:
+        snapshot.close()
+    save_tasks_file(json_path, tasks)
+    return len(tasks)
+
+
+USAGE = """Użycie:
+  python -m app.binary_store to-binary <tasks.json> <tasks.bin>
+  python -m app.binary_store to-json <tasks.bin> <tasks.json>
+  python -m app.binary_store verify <tasks.bin>"""
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) == 3 and args[0] == "to-binary":
+        print(f"Zapisano {json_to_binary(args[1], args[2])} zadań do {args[2]}")
+    elif len(args) == 3 and args[0] == "to-json":
+        print(f"Zapisano {binary_to_json(args[1], args[2])} zadań do {args[2]}")
+    elif len(args) == 2 and args[0] == "verify":
+        try:
+            snapshot = BinarySnapshot(args[1])
+        except CorruptSnapshot as exc:
+            print(f"Błąd: {exc}")
+            sys.exit(1)
+        print(f"OK: {len(snapshot)} zadań, sumy kontrolne zgodne")
+        snapshot.close()
+    else:
+        print(USAGE)
+        sys.exit(2)
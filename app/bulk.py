@@ -0,0 +1,126 @@
+import csv
+import io
+
+from app.fragments import encode_task
+from app.records import FIELDS
+
+# ==================================================================
+# Eksport i import wielu zadań strumieniem (GET /tasks/export,
+# POST /tasks/import). W pamięci jest zawsze tylko jedna porcja zadań
+# (strona z magazynu przy eksporcie, partia do zapisu przy imporcie),
+# więc zużycie pamięci nie rośnie z liczbą zadań.
+# ==================================================================
+
+EXPORT_CHUNK = 1000
+IMPORT_BATCH = 5000
+# linia NDJSON dłuższa niż to jest odrzucana bez buforowania całości
+MAX_IMPORT_LINE_BYTES = 64 * 1024
+# w podsumowaniu importu zwracamy najwyżej tyle błędów (liczymy wszystkie)
+MAX_IMPORT_ERRORS = 100
+
+CSV_COLUMNS = FIELDS
+
+
+def export_chunks(page, encode, completed=None, chunk_size=EXPORT_CHUNK):
+    """
+    Strumień zadań porcjami po `chunk_size`, w kolejności id.
+
+    page(completed, sort, after, limit) to TaskStore.page, encode(zadania)
+    zamienia porcję na bajty. Kolejne porcje czytamy za kluczem ostatniego
+    zadania, więc zmiany w trakcie eksportu nie powodują duplikatów.
+    """
+    after = None
+    while True:
+        tasks, after = page(completed, "id", after, chunk_size)
+        if tasks:
+            yield encode(tasks)
+        if after is None:
+            return
+
+
+def ndjson_rows(tasks):
+    # Kodujemy z pominięciem FragmentCache — jednorazowy eksport wszystkich
+    # zadań nie może wypychać z niej fragmentów używanych przez GET /tasks.
+    return b"".join(encode_task(task) + b"\n" for task in tasks)
+
+
+def csv_header():
+    return _csv_bytes([CSV_COLUMNS])
+
+
+def csv_rows(tasks):
+    # None -> pusta komórka, bool -> true/false (jak w JSON)
+    return _csv_bytes([[_csv_value(task.get(column)) for column in CSV_COLUMNS] for task in tasks])
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def _csv_bytes(rows):
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\r\n").writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+async def ndjson_lines(chunks, max_line_bytes=MAX_IMPORT_LINE_BYTES):
+    """
+    Dzieli strumień bajtów (np. request.stream()) na linie NDJSON.
+    Zwraca pary (numer linii od 1, bajty linii albo None, gdy linia
+    przekracza `max_line_bytes`). Puste linie pomijamy.
+    """
+    buffer = b""
+    number = 0
+    too_long = False
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        # ostatni element to początek linii, której koniec jeszcze nie dotarł
+        buffer = lines.pop()
+        for line in lines:
+            number += 1
+            if too_long or len(line) > max_line_bytes:
+                too_long = False
+                yield number, None
+            elif line.strip():
+                yield number, line
+        if len(buffer) > max_line_bytes:
+            # reszta tej linii nie jest potrzebna — zapamiętujemy tylko błąd
+            buffer = b""
+            too_long = True
+    if too_long:
+        yield number + 1, None
+    elif buffer.strip():
+        yield number + 1, buffer
+
+
+class ImportSummary:
+    """Wynik importu: liczniki i pierwsze MAX_IMPORT_ERRORS błędów z numerem linii."""
+
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.lines = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        # komunikat błędu zapisu, który przerwał import (None = doszedł do końca)
+        self.aborted = None
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self):
+        return {
+            "dry_run": self.dry_run,
+            "lines": self.lines,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "aborted": self.aborted,
+        }
@@ -0,0 +1,162 @@
+import asyncio
+import secrets
+import threading
+from collections import OrderedDict
+
+# ==================================================================
+# Kanał zmian (change feed) dla klientów trzymających lokalną kopię.
+# Każda zmiana zadania (put/delete) dostaje kolejny numer rewizji.
+# Dla każdego id pamiętamy tylko OSTATNIĄ zmianę, uporządkowane według
+# rewizji, więc "co się zmieniło od rewizji X" to przejście od końca
+# do pierwszego wpisu <= X — koszt zależy od liczby zmian, nie zadań.
+# Usunięte zadania zostają jako "nagrobki" (tombstones), aż wypadną z
+# ograniczonej historii.
+#
+# Na zewnątrz (X-Revision, ETag, /tasks/changes) rewizja to napis
+# "<epoka>.<numer>": epoka jest losowa dla każdego procesu, bo przy kilku
+# workerach każdy numeruje zmiany osobno i te same numery znaczą u nich
+# co innego. Rewizja z innej epoki (inny worker, restart) zawsze daje
+# reset, a ETag — pełną odpowiedź.
+# ==================================================================
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+class ChangeFeed:
+    """
+    Słuchacz magazynu (reset/apply) prowadzący numer rewizji i historię zmian.
+
+    `revision` to numer wewnątrz procesu; klientom pokazujemy token(),
+    a od klientów przyjmujemy go przez parse_token().
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.epoch = secrets.token_hex(6)
+        self.revision = 0
+        # id -> (rewizja ostatniej zmiany, rewizja utworzenia, czy usunięte)
+        self._entries = OrderedDict()
+        # zmian starszych niż ta rewizja już nie znamy — klient musi
+        # pobrać pełną listę
+        self._min_revision = self.revision
+        # największe id znane w chwili początku historii: put zadania bez
+        # wpisu i z większym id to nowe zadanie (id rosną), z mniejszym —
+        # zmiana zadania istniejącego wcześniej
+        self._id_watermark = 0
+        self._waiters = set()
+
+    # --- interfejs słuchacza magazynu ---
+
+    def reset(self, tasks):
+        # Pełne przeładowanie (start, zmiana pliku poza procesem): nie wiemy,
+        # co się zmieniło, więc klienci muszą zsynchronizować się od nowa.
+        with self._lock:
+            self.revision += 1
+            self._entries.clear()
+            self._min_revision = self.revision
+            self._id_watermark = max((t.get("id") for t in tasks if isinstance(t.get("id"), int)), default=0)
+        self._wake()
+
+    def apply(self, ops):
+        with self._lock:
+            for op, arg in ops:
+                self.revision += 1
+                if op == "put":
+                    task_id = arg["id"]
+                    prev = self._entries.get(task_id)
+                    if prev is not None:
+                        # ponowne utworzenie po usunięciu liczymy jak nowe
+                        created = self.revision if prev[2] else prev[1]
+                    elif isinstance(task_id, int) and task_id > self._id_watermark:
+                        created = self.revision
+                    else:
+                        created = self._min_revision
+                    self._entries[task_id] = (self.revision, created, False)
+                else:
+                    task_id = arg
+                    prev = self._entries.get(task_id)
+                    created = prev[1] if prev is not None else self._min_revision
+                    self._entries[task_id] = (self.revision, created, True)
+                self._entries.move_to_end(task_id)
+            while len(self._entries) > self.max_entries:
+                old_id, (rev, _, _) = self._entries.popitem(last=False)
+                self._min_revision = max(self._min_revision, rev)
+                if isinstance(old_id, int):
+                    self._id_watermark = max(self._id_watermark, old_id)
+        self._wake()
+
+    # --- odczyt ---
+
+    def token(self, revision=None):
+        # rewizja w postaci dla klienta
+        return f"{self.epoch}.{self.revision if revision is None else revision}"
+
+    def parse_token(self, token):
+        # numer rewizji z tokenu albo None, gdy token pochodzi z innego
+        # procesu (innej epoki) lub jest nieprawidłowy
+        epoch, _, number = (token or "").partition(".")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return int(number)
+
+    def changes_since(self, since):
+        """
+        Zwraca słownik:
+        {"revision": R, "reset": bool, "created": [...], "updated": [...], "deleted": [...]}
+
+        reset=True oznacza, że historia nie sięga rewizji `since` (albo
+        serwer został przeładowany, albo since=None — rewizja z innego
+        procesu) i klient musi pobrać pełną listę.
+        """
+        with self._lock:
+            result = {"revision": self.revision, "reset": False, "created": [], "updated": [], "deleted": []}
+            if since is None or since < self._min_revision or since > self.revision:
+                result["reset"] = True
+                return result
+            for task_id, (rev, created, deleted) in reversed(self._entries.items()):
+                if rev <= since:
+                    break
+                if deleted:
+                    # zadanie, którego klient nigdy nie widział, pomijamy
+                    if created <= since:
+                        result["deleted"].append(task_id)
+                elif created > since:
+                    result["created"].append(task_id)
+                else:
+                    result["updated"].append(task_id)
+        for key in ("created", "updated", "deleted"):
+            result[key].reverse()
+        return result
+
+    # --- oczekiwanie na zmiany (long-poll / SSE) ---
+
+    async def wait(self, since, timeout):
+        """Czeka (maks. `timeout` s), aż rewizja przekroczy `since`."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = (loop, event)
+        with self._lock:
+            if self.revision > since:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def _wake(self):
+        # apply() wołany jest z wątku zapisującego — budzimy oczekujących
+        # bezpiecznie w ich pętlach zdarzeń
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # pętla już zamknięta
+                pass
@@ -0,0 +1,90 @@
+import os
+import threading
+
+# ==================================================================
+# Blokada pliku między procesami (np. `uvicorn --workers 8`).
+# threading.Lock chroni tylko wątki jednego procesu; tu używamy blokady
+# systemowej: fcntl.flock na Linux/macOS, msvcrt.locking na Windows.
+# ==================================================================
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_file(path, blocking=True):
+    """
+    Otwiera `path` i zakłada na nim wyłączną blokadę. Zwraca deskryptor
+    (do zwolnienia przez unlock_file) albo None, gdy blocking=False, a
+    plik jest już zablokowany przez inny proces.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        if blocking:
+            raise
+        return None
+    return fd
+
+
+def unlock_file(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+class FileLock:
+    """
+    Wyłączna blokada na pliku `path` (tworzonym w razie potrzeby).
+
+    Używana jako context manager. Ten sam obiekt można bezpiecznie
+    używać z wielu wątków — wewnątrz procesu kolejkuje je zwykła blokada.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._fd = None
+        self._depth = 0
+
+    def acquire(self, blocking=True):
+        if not self._thread_lock.acquire(blocking=blocking):
+            return False
+        if self._depth == 0:
+            try:
+                fd = lock_file(self.path, blocking)
+            except OSError:
+                self._thread_lock.release()
+                raise
+            if fd is None:
+                self._thread_lock.release()
+                return False
+            self._fd = fd
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            unlock_file(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,71 @@
+import json
+import threading
+
+from app.records import json_default
+
+# ==================================================================
+# Pamięć podręczna zakodowanych zadań (fragmentów JSON).
+# Każde zadanie kodujemy do bajtów raz i trzymamy wynik, dopóki zadanie
+# się nie zmieni. Lista w odpowiedzi GET /tasks to wtedy tylko złączenie
+# gotowych fragmentów: b"[" + b",".join(...) + b"]" — bez ponownego
+# przechodzenia przez jsonable_encoder i json.dumps dla każdego zadania.
+# ==================================================================
+
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+def encode_task(task):
+    # ten sam format co JSONResponse w FastAPI/Starlette; zwarte rekordy
+    # z magazynu (app/records.py) zamieniamy na słownik dopiero tutaj
+    return json.dumps(
+        task, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=json_default,
+    ).encode("utf-8")
+
+
+class FragmentCache:
+    """
+    Słuchacz magazynu (reset/apply): id -> (zadanie, zakodowane bajty).
+
+    Wpis jest ważny tylko dla tego samego zadania (ten sam obiekt albo
+    równy słownik), więc odczyt, który wyprzedzi unieważnienie po commicie,
+    nigdy nie zwróci nieaktualnych bajtów.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def reset(self, tasks):
+        with self._lock:
+            self._entries = {}
+
+    def apply(self, ops):
+        with self._lock:
+            for op, arg in ops:
+                self._entries.pop(arg["id"] if op == "put" else arg, None)
+
+    def encode(self, task):
+        task_id = task.get("id")
+        entry = self._entries.get(task_id)
+        if entry is not None and (entry[0] is task or entry[0] == task):
+            return entry[1]
+        data = encode_task(task)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # najprostsze ograniczenie pamięci: usuwamy najstarszy wpis
+                self._entries.pop(next(iter(self._entries)), None)
+            self._entries[task_id] = (task, data)
+        return data
+
+    def encode_list(self, tasks):
+        return b"[" + b",".join(self.encode(t) for t in tasks) + b"]"
+
+    def ndjson_chunk(self, tasks):
+        return b"".join(self.encode(t) + b"\n" for t in tasks)
+
+    def ndjson_chunks(self, tasks, chunk_size=256):
+        # Strumień NDJSON partiami — pierwsze bajty wychodzą do klienta,
+        # zanim cała lista zostanie zakodowana.
+        for i in range(0, len(tasks), chunk_size):
+            yield self.ndjson_chunk(tasks[i:i + chunk_size])
@@ -0,0 +1,229 @@
+import bisect
+import heapq
+
+from app.pagination import order_key, paginate, parse_sort, sort_key
+from app.records import pack_time, packed_time, unpack_time
+
+# ==================================================================
+# Indeksy w pamięci dla magazynów trzymających zadania w słowniku
+# (JSON, dziennik). Zamiast przeglądać wszystkie zadania przy każdym
+# zapytaniu utrzymujemy przy każdym commicie:
+# - słownik id -> zadanie (wyszukanie po id w O(1)),
+# - podział na ukończone / nieukończone (filtr ?completed= bez skanu),
+# - posortowane listy kluczy (wartość, id) dla id, created_at i
+#   completed_at — zakres dat albo kolejna strona to wyszukiwanie
+#   binarne (bisect) i przejście tylko po zwracanych zadaniach.
+# Daty w kluczach to liczby sekund od epoki, te same co w TaskRecord —
+# klucz nie trzyma własnej kopii napisu ISO. Zadania bez daty albo z
+# datą w innym zapisie (ręczna edycja pliku) mają klucz z napisem w
+# osobnej, zwykle pustej liście; porządek i filtry są te same co przy
+# porównywaniu napisów (sort_key, matches). Zadania z ręcznie wpisanym,
+# nie-liczbowym id są tylko w słowniku; gdy takie istnieją, strony
+# liczymy z pełnej listy (paginate), żeby ich nie gubić.
+# Nowe zadania mają rosnące id i bieżącą datę, więc wstawienie do listy
+# posortowanej to prawie zawsze dopisanie na końcu.
+# ==================================================================
+
+# pola, po których można filtrować zakresem (?created_after=... itd.)
+RANGE_FIELDS = ("created_at", "completed_at")
+
+_MAX_ID = float("inf")
+
+
+def index_key(task, field):
+    # Klucz w liście posortowanej; None = zadanie nie trafia do indeksu.
+    # Porządek jak sort_key przy stronicowaniu, tylko data kanoniczna to
+    # liczba sekund; dla completed_at indeksujemy tylko ukończone zadania.
+    task_id = task.get("id")
+    if not isinstance(task_id, int):
+        # zadania z ręcznie wpisanym, nie-liczbowym id nie dają się
+        # porównać z pozostałymi — zostają tylko w słowniku id -> zadanie
+        return None
+    if field == "id":
+        return (task_id,)
+    value = packed_time(task, field)
+    if value is None or value == "":
+        return None if field == "completed_at" else ("", task_id)
+    return (value, task_id)
+
+
+def _iso_key(key):
+    # klucz z liczbą sekund -> klucz z napisem ISO (porządek jak sort_key)
+    return (unpack_time(key[0]), *key[1:])
+
+
+def _position(keys, probe, right):
+    # Pozycja klucza z napisem (granica zakresu, klucz z kursora) w liście
+    # kluczy z liczbami sekund.
+    find = bisect.bisect_right if right else bisect.bisect_left
+    seconds = pack_time(probe[0])
+    if isinstance(seconds, int):
+        return find(keys, (seconds, *probe[1:]))
+    # granica w innym zapisie (np. sam dzień "2025-11-23") — porównujemy
+    # napisy, rozpakowując tylko klucze odwiedzane przez bisect
+    return find(keys, probe, key=_iso_key)
+
+
+def matches(task, completed=None, ranges=None):
+    """
+    Czy zadanie spełnia filtry. `ranges`: {pole: (po, przed)} — granice
+    są wyłączne, None = bez ograniczenia. Daty porównujemy jako napisy
+    ISO 8601, więc "2025-11-23" obejmuje cały dzień jako granica.
+    """
+    if completed is not None and bool(task.get("completed")) != completed:
+        return False
+    for field, (after, before) in (ranges or {}).items():
+        value = task.get(field)
+        if not value:
+            return False
+        if after is not None and not value > after:
+            return False
+        if before is not None and not value < before:
+            return False
+    return True
+
+
+class TaskIndex:
+    """
+    Indeksy zadań aktualizowane przez magazyn (reset/apply, jak słuchacze).
+
+    Nie ma własnej blokady — magazyn woła wszystkie metody pod swoją.
+    """
+
+    def __init__(self):
+        self.reset([])
+
+    def reset(self, tasks):
+        self._tasks = {}
+        self._by_status = {False: {}, True: {}}
+        # klucze z liczbami (id, daty kanoniczne) i z napisami (pozostałe daty)
+        self._sorted = {"id": [], "created_at": [], "completed_at": []}
+        self._odd = {"id": [], "created_at": [], "completed_at": []}
+        for task in tasks:
+            self._tasks[task.get("id")] = task
+        # id spoza indeksów (nie-liczbowe)
+        self._unindexed = {task_id for task_id in self._tasks if not isinstance(task_id, int)}
+        for task_id, task in self._tasks.items():
+            self._by_status[bool(task.get("completed"))][task_id] = task
+        for field in self._sorted:
+            for key in (index_key(t, field) for t in self._tasks.values()):
+                if key is not None:
+                    self._keys(field, key).append(key)
+            self._sorted[field].sort()
+            self._odd[field].sort()
+
+    def _keys(self, field, key):
+        return self._odd[field] if isinstance(key[0], str) else self._sorted[field]
+
+    def apply(self, ops):
+        for op, arg in ops:
+            task_id = arg["id"] if op == "put" else arg
+            old = self._tasks.pop(task_id, None)
+            if old is not None:
+                self._remove(old)
+            if op == "put":
+                self._add(arg)
+
+    def _add(self, task):
+        self._tasks[task.get("id")] = task
+        if not isinstance(task.get("id"), int):
+            self._unindexed.add(task.get("id"))
+        self._by_status[bool(task.get("completed"))][task.get("id")] = task
+        for field in self._sorted:
+            key = index_key(task, field)
+            if key is not None:
+                bisect.insort(self._keys(field, key), key)
+
+    def _remove(self, task):
+        self._by_status[bool(task.get("completed"))].pop(task.get("id"), None)
+        self._unindexed.discard(task.get("id"))
+        for field in self._sorted:
+            key = index_key(task, field)
+            if key is not None:
+                keys = self._keys(field, key)
+                i = bisect.bisect_left(keys, key)
+                if i < len(keys) and keys[i] == key:
+                    del keys[i]
+
+    # --- odczyt ---
+
+    def get(self, task_id):
+        return self._tasks.get(task_id)
+
+    def max_id(self):
+        # największe id wśród obecnych zadań — ostatni klucz indeksu id
+        ids = self._sorted["id"]
+        return ids[-1][0] if ids else 0
+
+    def _range_keys(self, field, after, before):
+        # Wycinek listy posortowanej z kluczami: po < wartość < przed, oraz
+        # pasujące klucze z listy dat w innym zapisie (porównanie napisów).
+        keys = self._sorted[field]
+        lo = 0 if after is None else _position(keys, (after, _MAX_ID), right=True)
+        hi = len(keys) if before is None else _position(keys, (before,), right=False)
+        odd = [
+            key for key in self._odd[field]
+            if key[0] and (after is None or key[0] > after) and (before is None or key[0] < before)
+        ]
+        return keys, lo, max(lo, hi), odd
+
+    def list(self, completed=None, ranges=None):
+        """Zadania spełniające filtry, w kolejności id."""
+        if ranges:
+            # Zaczynamy od najwęższego zakresu (rozmiar znamy z bisect),
+            # pozostałe warunki sprawdzamy tylko na jego zadaniach.
+            keys, lo, hi, odd = min(
+                (self._range_keys(field, *bounds) for field, bounds in ranges.items()),
+                key=lambda r: r[2] - r[1] + len(r[3]),
+            )
+            found = [self._tasks[key[-1]] for key in keys[lo:hi]]
+            found += [self._tasks[key[-1]] for key in odd]
+            found += [self._tasks[task_id] for task_id in self._unindexed]
+            return self._by_id(t for t in found if matches(t, completed, ranges))
+        if completed is None:
+            tasks = self._tasks.values()
+        else:
+            tasks = self._by_status[completed].values()
+        # zadanie przeniesione między podziałami trafia na koniec, więc
+        # sortujemy — dla prawie posortowanej listy to jedno przejście
+        return self._by_id(tasks)
+
+    def _by_id(self, tasks):
+        if self._unindexed:
+            return sorted(tasks, key=lambda t: order_key(sort_key(t, "id")))
+        return sorted(tasks, key=lambda t: t.get("id"))
+
+    def page(self, completed=None, sort="id", after=None, limit=None, ranges=None):
+        """
+        Jedna strona wyników (jak paginate() w app/pagination.py).
+        Bez filtrów zakresu idziemy wprost po indeksie pola sortowania od
+        klucza `after`, więc koszt zależy od rozmiaru strony, nie od liczby
+        zadań; z filtrami zakresu albo przy nie-liczbowych id stronicujemy
+        przefiltrowaną listę. Zwraca (zadania, klucz następnej strony albo None).
+        """
+        field, descending = parse_sort(sort)
+        if ranges or self._unindexed or (after is not None and not isinstance(after[-1], int)):
+            return paginate(self.list(completed, ranges), sort, after, limit)
+        keys, odd = self._sorted[field], self._odd[field]
+        if descending:
+            start = len(keys) if after is None else _position(keys, tuple(after), right=False)
+            odd_start = len(odd) if after is None else bisect.bisect_left(odd, tuple(after))
+            found = (keys[i] for i in range(start - 1, -1, -1))
+            odd_found = (odd[i] for i in range(odd_start - 1, -1, -1))
+        else:
+            start = 0 if after is None else _position(keys, tuple(after), right=True)
+            odd_start = 0 if after is None else bisect.bisect_right(odd, tuple(after))
+            found = (keys[i] for i in range(start, len(keys)))
+            odd_found = (odd[i] for i in range(odd_start, len(odd)))
+        if odd:
+            # rzadki przypadek: scalamy obie listy w porządku napisów
+            found = heapq.merge(found, odd_found, key=_iso_key, reverse=descending)
+        candidates = (self._tasks[key[-1]] for key in found)
+        page = []
+        for task in candidates:
+            if completed is not None and bool(task.get("completed")) != completed:
+                continue
+            if limit is not None and len(page) == limit:
+                return page, sort_key(page[-1], field)
+            page.append(task)
+        return page, None
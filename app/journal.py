@@ -0,0 +1,315 @@
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from app.filelock import lock_file, unlock_file
+from app.metrics import RECOVERIES_TOTAL, timed
+from app.records import compact_ops, compact_task, json_default
+from app.storage import IndexedTaskStore, Transaction, apply_ops, load_tasks_file, save_tasks_file
+
+# ==================================================================
+# Tryb "journal": lista zadań trzymana w pamięci + dziennik zmian
+# (append-only) na dysku.
+#
+# - Migawka (snapshot) to zwykły plik tasks.json w dotychczasowym
+#   formacie, z tą samą obsługą .bak / .corrupt.* co w trybie JSON.
+# - Każdy commit dopisuje JEDNĄ linię JSON do bieżącego segmentu
+#   dziennika (tasks.json.journal.<numer>) i robi fsync — koszt zapisu
+#   zależy od rozmiaru zmiany, a nie od liczby zadań.
+# - Gdy segment przekroczy próg rozmiaru, otwieramy nowy segment, a w
+#   tle zapisujemy nową migawkę; segmenty objęte migawką usuwamy.
+# - Przy starcie odtwarzamy: migawka + wszystkie segmenty po kolei.
+#   Operacje niosą pełny stan zadania, więc nałożenie segmentu, który
+#   migawka już zawiera, niczego nie psuje.
+# - Każdy nowy segment zaczyna się linią {"next_id": N} — licznik id
+#   przetrwa kompakcję, która usuwa segmenty z operacjami na
+#   skasowanych zadaniach o najwyższym id.
+# ==================================================================
+
+DEFAULT_COMPACT_THRESHOLD = 4 * 1024 * 1024  # 4 MiB
+
+
+def _encode_ops(ops):
+    record = {"ops": [{"put": arg} if op == "put" else {"delete": arg} for op, arg in ops]}
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=json_default) + "\n").encode("utf-8")
+
+
+def _encode_next_id(next_id):
+    return (json.dumps({"next_id": next_id}) + "\n").encode("utf-8")
+
+
+def _decode_record(line):
+    """Zwraca (ops, next_id) — linia niesie albo commit, albo licznik id."""
+    record = json.loads(line)
+    if "next_id" in record:
+        next_id = record["next_id"]
+        if not isinstance(next_id, int) or isinstance(next_id, bool):
+            raise TypeError("next_id musi być liczbą całkowitą")
+        return [], next_id
+    return _decode_ops(record), None
+
+
+def _decode_ops(record):
+    ops = []
+    for item in record["ops"]:
+        if "put" in item:
+            ops.append(("put", item["put"]))
+        else:
+            ops.append(("delete", item["delete"]))
+    return ops
+
+
+def _fsync_dir(path):
+    # Windows nie pozwala otworzyć katalogu do fsync — tam pomijamy
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class JournalStore(IndexedTaskStore):
+    """
+    Magazyn zadań w pamięci z dziennikiem append-only i kompakcją w tle.
+
+    Parametry:
+    - snapshot_path: ścieżka migawki (np. data/tasks.json)
+    - compact_threshold: rozmiar segmentu (w bajtach), po którym
+      uruchamiamy kompakcję
+    """
+
+    def __init__(self, snapshot_path, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        super().__init__()
+        self.snapshot_path = snapshot_path
+        self.journal_prefix = snapshot_path + ".journal."
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._tasks = {}
+        self._max_id = 0
+        self._fh = None
+        self._gen = 0
+        self._size = 0
+        # numer ostatniego segmentu objętego migawką zapisaną przez ten
+        # proces (segmenty do niego włącznie pokrywa też plik .bak)
+        self._covered_gen = None
+        self._compact_thread = None
+        # Stan w pamięci jest własnością jednego procesu — drugi proces
+        # (np. `uvicorn --workers 2`) nadpisywałby dziennik, więc odmawiamy.
+        self._process_lock = lock_file(snapshot_path + ".journal.lock", blocking=False)
+        if self._process_lock is None:
+            raise RuntimeError(
+                f"Dziennik {self.journal_prefix}* jest używany przez inny proces; "
+                "tryb 'journal' obsługuje tylko jeden proces serwera (użyj 'json' albo 'sqlite')"
+            )
+        self._replay()
+
+    # --- odtwarzanie przy starcie ---
+
+    def _segments(self):
+        found = []
+        for path in glob.glob(glob.escape(self.journal_prefix) + "*"):
+            suffix = path[len(self.journal_prefix):]
+            if suffix.isdigit():
+                found.append((int(suffix), path))
+        return sorted(found)
+
+    def _replay(self):
+        tasks = {t.get("id"): compact_task(t) for t in load_tasks_file(self.snapshot_path)}
+        self._max_id = max((i for i in tasks if isinstance(i, int)), default=0)
+        segments = self._segments()
+        for _, path in segments:
+            self._replay_segment(path, tasks)
+        self._tasks = tasks
+        self._index.reset(list(tasks.values()))
+        self._gen = segments[-1][0] + 1 if segments else 1
+        self._open_segment()
+
+    def _replay_segment(self, path, tasks):
+        good_offset = 0
+        with open(path, "rb") as f:
+            data = f.read()
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                # urwany ostatni zapis (awaria w trakcie dopisywania) —
+                # commit nie został potwierdzony, więc go pomijamy
+                RECOVERIES_TOTAL.inc("journal", "torn_tail")
+                break
+            try:
+                ops, next_id = _decode_record(line)
+            except (ValueError, KeyError, TypeError):
+                # uszkodzony wpis w środku dziennika: zachowujemy kopię
+                # segmentu (*.corrupt.TIMESTAMP) i odtwarzamy tylko to,
+                # co było przed uszkodzeniem
+                shutil.copy(path, path + f".corrupt.{int(time.time())}")
+                print(f"Uszkodzony wpis w dzienniku {os.path.basename(path)}", flush=True)
+                RECOVERIES_TOTAL.inc("journal", "corrupt_entry")
+                break
+            if next_id is not None:
+                self._max_id = max(self._max_id, next_id - 1)
+            apply_ops(tasks, compact_ops(ops))
+            self._track_max_id(ops)
+            good_offset += len(line)
+        if good_offset != len(data):
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _track_max_id(self, ops):
+        # największe nadane id liczymy także z usuniętych zadań, żeby
+        # nie nadawać ponownie id, które klienci mogli już widzieć
+        for op, arg in ops:
+            if op == "put" and isinstance(arg.get("id"), int) and arg["id"] > self._max_id:
+                self._max_id = arg["id"]
+
+    def _open_segment(self):
+        path = self.journal_prefix + str(self._gen)
+        created = not os.path.exists(path)
+        self._fh = open(path, "ab")
+        if self._fh.tell() == 0:
+            # licznik id na początku segmentu: kompakcja usuwa starsze
+            # segmenty, a z samej migawki nie da się odtworzyć id
+            # usuniętych zadań
+            self._fh.write(_encode_next_id(self._max_id + 1))
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        self._size = self._fh.tell()
+        if created:
+            # nowy plik jest trwały dopiero po fsync katalogu
+            _fsync_dir(os.path.dirname(path) or ".")
+
+    def _discard_partial_append(self):
+        # Nieudany zapis (np. brak miejsca) mógł zostawić w segmencie część
+        # rekordu. Kolejny commit dopisany za nią skleiłby się z nią w jedną
+        # uszkodzoną linię i przy odtwarzaniu stracilibyśmy wszystko dalej —
+        # więc obcinamy segment do ostatniego potwierdzonego commitu, a jeśli
+        # to się nie uda, przechodzimy do nowego segmentu.
+        path = self._fh.name
+        try:
+            self._fh.close()
+        except OSError:
+            pass
+        try:
+            with open(path, "r+b") as f:
+                f.truncate(self._size)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError:
+            print(f"Nie udało się obciąć segmentu {os.path.basename(path)}", flush=True)
+            self._gen += 1
+        self._open_segment()
+
+    # --- interfejs magazynu ---
+
+    def _next_id(self):
+        return self._max_id + 1
+
+    def data_files(self):
+        return [self.snapshot_path] + [path for _, path in self._segments()]
+
+    @contextmanager
+    def transaction(self):
+        with timed("lock_wait"):
+            self._lock.acquire()
+        try:
+            tx = Transaction(self)
+            yield tx
+            if tx.ops:
+                self._commit(tx.ops)
+        finally:
+            self._lock.release()
+
+    def _commit(self, ops):
+        record = _encode_ops(ops)
+        try:
+            with timed("serialize"):
+                self._fh.write(record)
+                self._fh.flush()
+            with timed("fsync"):
+                os.fsync(self._fh.fileno())
+        except BaseException:
+            self._discard_partial_append()
+            raise
+        self._size += len(record)
+        # dopiero po trwałym zapisie zmiana staje się widoczna
+        ops = compact_ops(ops)
+        with self._read_lock:
+            apply_ops(self._tasks, ops)
+            self._index.apply(ops)
+        self._track_max_id(ops)
+        self._notify_apply(ops)
+        if self._size >= self.compact_threshold:
+            self.compact()
+
+    # --- kompakcja ---
+
+    def compact(self, wait=False):
+        """
+        Zamyka bieżący segment, otwiera nowy i w tle zapisuje migawkę
+        obecnego stanu. Jeśli kompakcja już trwa, bez `wait` nic nie robi;
+        z `wait=True` czeka na nią i uruchamia kolejną, obejmującą
+        najnowszy stan.
+        """
+        while True:
+            with self._lock:
+                running = self._compact_thread
+                if running is None or not running.is_alive():
+                    boundary = self._gen
+                    self._fh.close()
+                    self._gen += 1
+                    self._open_segment()
+                    snapshot = list(self._tasks.values())
+                    thread = threading.Thread(
+                        target=self._write_snapshot, args=(snapshot, boundary),
+                        name="tasks-journal-compaction", daemon=True,
+                    )
+                    self._compact_thread = thread
+                    thread.start()
+                    if wait:
+                        thread.join()
+                    return
+            if not wait:
+                return
+            running.join()
+
+    def _write_snapshot(self, snapshot, boundary):
+        try:
+            save_tasks_file(self.snapshot_path, snapshot)
+        except Exception:
+            # segmenty zostają na dysku, więc nic nie tracimy — spróbujemy
+            # przy następnej kompakcji
+            print("Nie udało się zapisać migawki tasks.json", flush=True)
+            return
+        # Usuwamy tylko segmenty objęte POPRZEDNIĄ migawką: obecna migawka
+        # pokrywa wszystko do `boundary`, a kopia .bak (poprzednia migawka)
+        # razem z pozostałymi segmentami nadal odtwarza pełny stan.
+        if self._covered_gen is not None:
+            for gen, path in self._segments():
+                if gen <= self._covered_gen:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+        self._covered_gen = boundary
+
+    def close(self):
+        with self._lock:
+            thread = self._compact_thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            if self._process_lock is not None:
+                unlock_file(self._process_lock)
+                self._process_lock = None
@@ -1,15 +1,28 @@
-from fastapi import FastAPI, HTTPException, Request, status
-from fastapi.responses import RedirectResponse
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+import anyio
 from datetime import datetime, timezone
-from typing import Dict
-import os
+import hashlib
 import json
-import threading
-import shutil
-import tempfile
-import time
+import os
+
+from app import bulk, metrics
+from app.binary_store import BinaryFileStore
+from app.changes import ChangeFeed
+from app.fragments import FragmentCache
+from app.indexes import matches
+from app.journal import DEFAULT_COMPACT_THRESHOLD, JournalStore
+from app.pagination import decode_cursor, encode_cursor, paginate, parse_sort
+from app.records import as_dict
+from app.search import SearchIndex
+from app.sqlite_store import SqliteStore
+from app.stats import TaskStats
+from app.storage import JsonFileStore
+from app.writer import DEFAULT_MAX_PENDING, DEFAULT_MAX_WAIT_MS, DEFAULT_WINDOW_MS, GroupCommitWriter, WriterBusy
 
 # ==================================================================
 # Prosty backend w FastAPI dla aplikacji "TOO DO Manager"
@@ -18,7 +31,15 @@ import time
 # lokalnym pliku JSON. Komentarze niżej wyjaśniają każdy fragment.
 # ==================================================================
 
-app = FastAPI(title="Proste API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app):
+    # Przy zamykaniu serwera dokończ zaległe zapisy i zamknij magazyn.
+    yield
+    await run_in_threadpool(_writer.close)
+    await run_in_threadpool(_store.close)
+
+
+app = FastAPI(title="Proste API", version="0.1.0", lifespan=lifespan)
 
 # CORS (Cross-Origin Resource Sharing)
 # - Kiedy frontend działa na innym porcie (np. 5500) niż backend (8000),
@@ -32,7 +53,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # nagłówki, które skrypt w przeglądarce może odczytać z odpowiedzi
+    expose_headers=["X-Next-Cursor", "X-Revision", "ETag", "Server-Timing"],
 )
+# Czas każdego żądania (histogramy w /metrics) i nagłówek Server-Timing
+# z fazami pracy magazynu (app/metrics.py). Dodany jako ostatni, więc
+# obejmuje też pozostałe middleware.
+app.add_middleware(metrics.MetricsMiddleware)
 
 
 
@@ -84,158 +111,327 @@ def read_root(request: Request):
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
+    # async: nie zajmuje wątku z puli, więc odpowiada także wtedy, gdy
+    # odczyty czy zapisy są przeciążone
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Metryki w formacie tekstowym Prometheusa: czasy żądań per trasa,
+    czasy faz magazynu (queue_wait, load, lock_wait, serialize, fsync,
+    backup, replace, commit, encode), naprawy uszkodzonych plików, liczba
+    zadań, rozmiary plików danych, długość kolejki zapisu i liczba
+    odrzuconych zmian.
+    """
+    metrics.TASKS_COUNT.set(_store.count())
+    metrics.READS_IN_FLIGHT.set(_read_limiter.borrowed_tokens)
+    metrics.FILE_BYTES.clear()
+    for path in _store.data_files():
+        try:
+            metrics.FILE_BYTES.set(os.path.getsize(path), os.path.basename(path))
+        except OSError:
+            pass
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # --- Proste API "items" (in-memory) - używane w testach
 
 
 # --- Tasks backed by a JSON file ---
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+# Katalog danych można zmienić zmienną TASKS_DATA_DIR (np. benchmarki
+# uruchamiają serwer na wygenerowanych danych w katalogu tymczasowym).
+DATA_DIR = os.environ.get("TASKS_DATA_DIR", os.path.join(PROJECT_ROOT, "data"))
 os.makedirs(DATA_DIR, exist_ok=True)
 TASKS_FILE = os.path.join(DATA_DIR, "tasks.json")
 
-# Ensure the tasks file exists
-if not os.path.exists(TASKS_FILE):
-    with open(TASKS_FILE, "w", encoding="utf-8") as f:
-        json.dump([], f)
-
-_tasks_lock = threading.Lock()
-
-
-def _load_tasks_raw():
-    # Wczytuje zadania z pliku JSON, z prostą obsługą uszkodzeń pliku.
-    # Jeśli plik JSON jest uszkodzony, spróbujemy przywrócić z kopii
-    # zapasowej (TASKS_FILE + '.bak'). Jeśli to się nie uda, zachowamy
-    # uszkodzony plik pod nazwą *.corrupt.TIMESTAMP i utworzymy nowy
-    # pusty plik z listą []. Dzięki temu nie tracimy danych i nie
-    # przerywamy działania aplikacji.
-    with _tasks_lock:
-        if not os.path.exists(TASKS_FILE):
-            # brak pliku => zwróć pustą listę (plik zostanie utworzony przy zapisie)
-            return []
-        try:
-            with open(TASKS_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            # Upewnij się, że mamy listę (oczekiwany format)
-            if isinstance(data, list):
-                return data
-            # jeśli format nie jest listą, traktujemy jako uszkodzony
-            corrupt_name = TASKS_FILE + f".corrupt.{int(time.time())}"
-            shutil.move(TASKS_FILE, corrupt_name)
-            # spróbuj przywrócić z kopii zapasowej
-            bak = TASKS_FILE + ".bak"
-            if os.path.exists(bak):
-                shutil.copy(bak, TASKS_FILE)
-                try:
-                    with open(TASKS_FILE, "r", encoding="utf-8") as f:
-                        return json.load(f)
-                except Exception:
-                    pass
-            # nic nie pomogło -> utwórz nowy pusty plik
-            with open(TASKS_FILE, "w", encoding="utf-8") as f:
-                json.dump([], f)
-            return []
-        except json.JSONDecodeError:
-            # plik jest niepoprawnym JSON-em
-            corrupt_name = TASKS_FILE + f".corrupt.{int(time.time())}"
-            shutil.move(TASKS_FILE, corrupt_name)
-            bak = TASKS_FILE + ".bak"
-            if os.path.exists(bak):
-                # przywróć z kopii zapasowej
-                shutil.copy(bak, TASKS_FILE)
-                try:
-                    with open(TASKS_FILE, "r", encoding="utf-8") as f:
-                        return json.load(f)
-                except Exception:
-                    pass
-            # utwórz nowy pusty plik i zwróć pustą listę
-            with open(TASKS_FILE, "w", encoding="utf-8") as f:
-                json.dump([], f)
-            return []
-        except Exception:
-            # Inny błąd I/O -> logujemy (print) i zwracamy pustą listę,
-            # aplikacja nadal działa. W praktyce warto użyć loggera.
-            print("Nieoczekiwany błąd podczas odczytu tasks.json", flush=True)
-            return []
-
-
-# _save_tasks_raw zapisuje listę zadań do pliku JSON.
-# Używamy blokady (_tasks_lock), żeby uniknąć równoczesnych zapisów
-# (gdyby kilka żądań przyszło jednocześnie). To proste zabezpieczenie
-# wystarczające dla demo/small-scale usage.
-
-
-def _save_tasks_raw(tasks_list):
-    # Zapisujemy atomowo: zapis do pliku tymczasowego w tej samej
-    # lokalizacji, potem zamiana (os.replace) — to minimalizuje ryzyko
-    # powstania uszkodzonego pliku przy awarii podczas zapisu.
-    # Dodatkowo tworzymy kopię zapasową (.bak) poprzedniej wersji.
-    with _tasks_lock:
-        dirpath = os.path.dirname(TASKS_FILE) or '.'
-        fd, tmp_path = tempfile.mkstemp(prefix='tasks_', suffix='.tmp', dir=dirpath)
-        try:
-            with os.fdopen(fd, 'w', encoding='utf-8') as tmpf:
-                json.dump(tasks_list, tmpf, indent=2, ensure_ascii=False)
-                tmpf.flush()
-                os.fsync(tmpf.fileno())
-            # utwórz kopię zapasową obecnego pliku przed zastąpieniem
-            if os.path.exists(TASKS_FILE):
-                try:
-                    shutil.copy(TASKS_FILE, TASKS_FILE + '.bak')
-                except Exception:
-                    # jeśli backup się nie uda, kontynuujemy — nie chcemy
-                    # przerwać zapisu głównego pliku
-                    print('Nie udało się utworzyć backupu tasks.json', flush=True)
-            # atomowa zamiana pliku
-            os.replace(tmp_path, TASKS_FILE)
-        finally:
-            # w razie czego usuń plik tymczasowy
-            if os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
+# Sposób przechowywania zadań (zmienna środowiskowa TASKS_STORAGE):
+# - "json" (domyślnie): cały plik tasks.json czytany i zapisywany przy
+#   każdej operacji — najprostszy wariant,
+# - "journal": zadania w pamięci + dziennik append-only, kompaktowany w
+#   tle do tasks.json (patrz app/journal.py),
+# - "sqlite": baza SQLite w pliku TASKS_DB_FILE (patrz app/sqlite_store.py);
+#   przy pierwszym uruchomieniu zadania z tasks.json są importowane,
+# - "binary": migawka binarna TASKS_BIN_FILE czytana przez mmap — szybki
+#   start i dekodowanie tylko potrzebnych zadań (patrz app/binary_store.py);
+#   przy pierwszym uruchomieniu zadania z tasks.json są importowane.
+TASKS_STORAGE = os.environ.get("TASKS_STORAGE", "json")
+TASKS_DB_FILE = os.environ.get("TASKS_DB_FILE", os.path.join(DATA_DIR, "tasks.db"))
+TASKS_BIN_FILE = os.environ.get("TASKS_BIN_FILE", os.path.join(DATA_DIR, "tasks.bin"))
+JOURNAL_COMPACT_BYTES = int(os.environ.get("TASKS_JOURNAL_COMPACT_BYTES", DEFAULT_COMPACT_THRESHOLD))
+# Okno (w ms), w którym zmiany z różnych żądań łączymy w jeden commit.
+GROUP_COMMIT_WINDOW_MS = float(os.environ.get("TASKS_GROUP_COMMIT_MS", DEFAULT_WINDOW_MS))
+# Kontrola przyjęć (app/writer.py): ile zmian może czekać na zapis i jak
+# długo (ms), zanim dostaną 503 z Retry-After (0 = bez limitu).
+WRITE_QUEUE_MAX = int(os.environ.get("TASKS_WRITE_QUEUE_MAX", DEFAULT_MAX_PENDING))
+WRITE_MAX_WAIT_MS = float(os.environ.get("TASKS_WRITE_MAX_WAIT_MS", DEFAULT_MAX_WAIT_MS))
+# Osobna pula dla odczytów z magazynu: tyle odczytów naraz, reszta czeka
+# w kolejce do puli, nie zajmując wątków reszty aplikacji.
+READ_CONCURRENCY = int(os.environ.get("TASKS_READ_CONCURRENCY", 32))
+
+
+def _open_store():
+    if TASKS_STORAGE == "json":
+        return JsonFileStore(TASKS_FILE)
+    if TASKS_STORAGE == "journal":
+        return JournalStore(TASKS_FILE, compact_threshold=JOURNAL_COMPACT_BYTES)
+    if TASKS_STORAGE == "sqlite":
+        return SqliteStore(TASKS_DB_FILE, migrate_from=TASKS_FILE)
+    if TASKS_STORAGE == "binary":
+        return BinaryFileStore(TASKS_BIN_FILE, migrate_from=TASKS_FILE)
+    raise RuntimeError(f"Nieznany tryb przechowywania TASKS_STORAGE={TASKS_STORAGE!r}")
+
+
+_store = _open_store()
+# Wszystkie zmiany przechodzą przez jeden wątek zapisujący (app/writer.py),
+# który łączy równoczesne żądania w jeden zapis na dysk.
+_writer = GroupCommitWriter(
+    _store, window_ms=GROUP_COMMIT_WINDOW_MS, max_pending=WRITE_QUEUE_MAX, max_wait_ms=WRITE_MAX_WAIT_MS,
+)
+_read_limiter = anyio.CapacityLimiter(READ_CONCURRENCY)
+# Indeks trigramowy dla ?q= (app/search.py), aktualizowany przy każdym commicie.
+_search_index = SearchIndex()
+# Numer rewizji i historia zmian dla /tasks/changes (app/changes.py).
+_changes = ChangeFeed()
+# Zakodowane do JSON zadania, unieważniane przy zmianie (app/fragments.py).
+_fragments = FragmentCache()
+# Liczniki i histogramy dla /tasks/stats (app/stats.py).
+_stats = TaskStats()
+# jedna rejestracja — zadania z magazynu czytamy przy starcie raz dla wszystkich
+_store.subscribe(_search_index, _changes, _fragments, _stats)
+
+
+async def _read(fn, *args):
+    # Blokujący odczyt z magazynu w puli wątków z własnym limitem
+    # (_read_limiter), niezależnym od domyślnej puli Starlette.
+    return await anyio.to_thread.run_sync(fn, *args, limiter=_read_limiter)
+
+
+@app.exception_handler(WriterBusy)
+async def writer_busy_handler(request: Request, exc: WriterBusy):
+    # Kolejka zapisu pełna albo zmiana czekała za długo — klient powinien
+    # ponowić żądanie po Retry-After sekundach.
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Serwer przeciążony zapisami — spróbuj ponownie później", "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _now_iso():
+    # używamy timezone-aware UTC i zamieniamy końcówkę na 'Z'
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z')
+
+
+# Operacje na pojedynczym zadaniu wewnątrz transakcji — wspólne dla
+# endpointów pojedynczych i wsadowych (/tasks/batch).
+
+def _prepare_new_task(task):
+    # Używamy `model_dump()` (Pydantic v2) zamiast przestarzałego `dict()`
+    task_dict = task.model_dump()
+    # set created_at in ISO 8601 UTC if not provided
+    if not task_dict.get("created_at"):
+        task_dict["created_at"] = _now_iso()
+    return task_dict
+
+
+def _apply_create(tx, task_dict):
+    task_dict["id"] = tx.allocate_id()
+    tx.put(task_dict)
+    return task_dict
+
+
+def _apply_update(tx, task_id, updates):
+    t = tx.get(task_id)
+    if t is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if updates:
+        prev_completed = bool(t.get("completed", False))
+        # apply updates (na kopii — zapisane zadania są niemutowalne)
+        t = {**t, **updates}
+        # handle completed_at timestamp
+        if "completed" in updates:
+            if updates["completed"] and not prev_completed:
+                t["completed_at"] = _now_iso()
+            elif not updates["completed"] and prev_completed:
+                t["completed_at"] = None
+        tx.put(t)
+    # zapisane zadanie to zwarty rekord (app/records.py) — do odpowiedzi słownik
+    return as_dict(t)
+
+
+def _apply_delete(tx, task_id):
+    if tx.get(task_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    tx.delete(task_id)
+
+
+def _parse_time_bound(name, value):
+    # Granica zakresu dat w formacie, w jakim zapisujemy daty (UTC, 'Z'),
+    # żeby porównanie napisów dawało porównanie chwil w czasie.
+    # Sama data (np. 2025-11-23) oznacza północ UTC.
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name}: oczekiwano daty ISO 8601, np. 2025-11-23T10:00:00Z")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    try:
+        moment = moment.astimezone(timezone.utc)
+    except OverflowError:
+        # np. 0001-01-01T00:00:00+05:00 — w UTC to już przed rokiem 1
+        raise HTTPException(status_code=400, detail=f"{name}: data poza obsługiwanym zakresem")
+    # isoformat, nie strftime — %Y nie dopełnia zerami lat przed 1000
+    return moment.replace(tzinfo=None).isoformat(timespec="seconds") + "Z"
+
+
+def _date_ranges(created_after, created_before, completed_after, completed_before):
+    # {"created_at": (po, przed), ...} — tylko pola z podaną granicą
+    bounds = {
+        "created_at": (created_after, created_before),
+        "completed_at": (completed_after, completed_before),
+    }
+    ranges = {}
+    for field, (after, before) in bounds.items():
+        if after is None and before is None:
+            continue
+        prefix = field.removesuffix("_at")
+        ranges[field] = (
+            _parse_time_bound(f"{prefix}_after", after) if after is not None else None,
+            _parse_time_bound(f"{prefix}_before", before) if before is not None else None,
+        )
+    return ranges or None
+
+
+def _query_tasks(completed, q, rank, sort, after, limit, ranges=None):
+    # Zwraca (zadania, klucz następnej strony albo None).
+    if not q:
+        if sort is None and after is None and limit is None:
+            # zachowanie domyślne: cała lista, bez stronicowania
+            return _store.list(completed, ranges), None
+        # Filtry i stronicowanie wykonuje magazyn — po indeksach
+        # (app/indexes.py w pamięci, w SQLite — indeksy bazy).
+        return _store.page(completed, sort or "id", after, limit, ranges)
+    # Wyszukiwanie: indeks zwraca tylko pasujące id, więc pobieramy i
+    # filtrujemy wyłącznie kandydatów.
+    tasks = []
+    for task_id in _search_index.search(q, rank=rank):
+        t = _store.get(task_id)
+        if t is None or not matches(t, completed, ranges):
+            continue
+        tasks.append(t)
+        if rank and limit and len(tasks) >= limit:
+            break
+    if rank or (sort is None and after is None and limit is None):
+        return tasks, None
+    return paginate(tasks, sort or "id", after, limit)
+
+
+def _encode_list(tasks):
+    with metrics.timed("encode"):
+        return _fragments.encode_list(tasks)
+
+
+def _etag_for(revision, request, ndjson):
+    # Silny ETag: rewizja magazynu (z epoką procesu) + skrót parametrów
+    # zapytania (i formatu). Ta sama rewizja i te same parametry => te same
+    # bajty odpowiedzi; ETag z innego workera nigdy nie pasuje.
+    params = sorted(request.query_params.multi_items())
+    digest = hashlib.blake2b(repr((params, ndjson)).encode("utf-8"), digest_size=8).hexdigest()
+    return f'"{revision}-{digest}"'
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    # If-None-Match porównuje słabo — ignorujemy prefiks W/
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
 
 
 @app.get("/tasks")
-def get_tasks(completed: bool | None = None, q: str | None = None):
+async def get_tasks(
+    request: Request,
+    completed: bool | None = None,
+    q: str | None = None,
+    rank: bool = False,
+    limit: int | None = Query(None, ge=1),
+    cursor: str | None = None,
+    sort: str | None = None,
+    created_after: str | None = None,
+    created_before: str | None = None,
+    completed_after: str | None = None,
+    completed_before: str | None = None,
+):
     """
     Zwraca listę zadań.
 
     Parametry opcjonalne (query params):
     - completed: filtruj po statusie (true/false)
-    - q: wyszukaj frazę w tytule lub opisie (case-insensitive)
+    - q: wyszukaj frazę w tytule lub opisie (bez względu na wielkość liter
+      i polskie znaki — "zolw" znajdzie "Żółw")
+    - rank: przy `q` zwróć najlepsze dopasowania najpierw (trafienia w
+      tytule, na początku słowa)
+    - limit: zwróć co najwyżej tyle zadań (rozmiar strony)
+    - sort: `id` (domyślnie) lub `created_at`; `-` na początku = malejąco
+    - cursor: wartość nagłówka `X-Next-Cursor` z poprzedniej strony
+    - created_after / created_before, completed_after / completed_before:
+      zakres dat utworzenia / ukończenia (ISO 8601, granice wyłączne,
+      sama data = północ UTC), np. ?created_after=2025-11-01&created_before=2025-12-01
+
+    Bez `limit`/`cursor`/`sort` zwracana jest cała lista, jak dotychczas.
+    Jeśli są kolejne strony, odpowiedź ma nagłówek `X-Next-Cursor`.
+    Nagłówek `X-Revision` to rewizja magazynu sprzed odczytu — od niej
+    klient może śledzić zmiany przez /tasks/changes.
+    Z nagłówkiem `Accept: application/x-ndjson` zadania są strumieniowane,
+    po jednym obiekcie JSON w linii.
+    Odpowiedź ma nagłówek `ETag`; zapytanie z `If-None-Match` o tej samej
+    wartości dostaje `304 Not Modified`, jeśli nic się nie zmieniło.
 
     Frontend wywołuje to endpoint, np. /tasks?completed=true&q=zakupy
     """
-    tasks = _load_tasks_raw()
-    # Filtruj po statusie ukończenia, jeśli podano
-    if completed is not None:
-        tasks = [t for t in tasks if bool(t.get("completed")) == bool(completed)]
-    # Proste wyszukiwanie tekstu w title/description
-    if q:
-        q_l = q.lower()
-        tasks = [t for t in tasks if q_l in (t.get("title","") or "").lower() or q_l in (t.get("description","") or "").lower()]
-    return tasks
+    try:
+        if sort is not None or cursor is not None:
+            parse_sort(sort)
+        after = decode_cursor(cursor, sort or "id") if cursor is not None else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if rank and cursor is not None:
+        raise HTTPException(status_code=400, detail="cursor nie działa razem z rank")
+    ranges = _date_ranges(created_after, created_before, completed_after, completed_before)
+    ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+    # Odczyt jest blokujący, więc wykonujemy go poza pętlą zdarzeń.
+    await _read(_store.refresh)
+    # rewizję czytamy PRZED danymi: zmiana w międzyczasie najwyżej
+    # zostanie zgłoszona klientowi drugi raz
+    revision = _changes.revision
+    etag = _etag_for(_changes.token(revision), request, ndjson)
+    headers = {"X-Revision": _changes.token(revision), "ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    # Nic się nie zmieniło od poprzedniego odczytu => 304 bez czytania danych
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    tasks, next_key = await _read(_query_tasks, completed, q, rank, sort, after, limit, ranges)
+    if _changes.revision != revision:
+        # dane mogły się zmienić w trakcie odczytu — takiej odpowiedzi nie
+        # oznaczamy ETagiem, żeby ta sama etykieta nie opisała dwóch treści
+        del headers["ETag"]
+    if next_key is not None:
+        headers["X-Next-Cursor"] = encode_cursor(sort or "id", next_key)
+    if ndjson:
+        return StreamingResponse(_fragments.ndjson_chunks(tasks), media_type="application/x-ndjson", headers=headers)
+    # lista sklejona z gotowych fragmentów JSON (app/fragments.py)
+    body = await _read(_encode_list, tasks)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.post("/tasks", status_code=201)
-def create_task(task: Task):
-    tasks = _load_tasks_raw()
-    next_id = max((t.get("id", 0) for t in tasks), default=0) + 1
-    # Używamy `model_dump()` (Pydantic v2) zamiast przestarzałego `dict()`
-    task_dict = task.model_dump()
-    task_dict["id"] = next_id
-    # set created_at in ISO 8601 UTC if not provided
-    if not task_dict.get("created_at"):
-        # używamy timezone-aware UTC i zamieniamy końcówkę na 'Z'
-        task_dict["created_at"] = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z')
-    tasks.append(task_dict)
-    _save_tasks_raw(tasks)
-    return task_dict
+async def create_task(task: Task):
+    task_dict = _prepare_new_task(task)
+    # odpowiedź wraca dopiero, gdy zadanie jest zapisane na dysku
+    return await _writer.execute(lambda tx: _apply_create(tx, task_dict))
 
 
 # Tworzenie zadania (POST /tasks)
@@ -244,29 +440,304 @@ def create_task(task: Task):
 # - Zapisujemy do pliku i zwracamy utworzone zadanie
 
 
+@app.get("/tasks/stats")
+async def get_task_stats():
+    """
+    Statystyki zadań bez pobierania pełnej listy:
+    {"total", "active", "completed", "completion_rate",
+     "created_per_day": {"2025-11-23": 4, ...}, "completed_per_day": {...},
+     "mean_time_to_complete_seconds"}
+
+    Agregaty są aktualizowane przy każdym commicie (app/stats.py), więc
+    koszt odczytu nie zależy od liczby zadań. Dni liczone w UTC.
+    """
+    await _read(_store.refresh)
+    return _stats.snapshot()
+
+
+# --- Kanał zmian (/tasks/changes) ---
+# Klient pobiera pełną listę (GET /tasks, nagłówek X-Revision), a potem
+# pyta tylko o zmiany od tej rewizji — zamiast ściągać całą listę od nowa.
+
+def _changes_payload(since, include_tasks):
+    # since: numer rewizji z parse_token (None = rewizja z innego procesu);
+    # w odpowiedzi rewizja wraca jako token
+    result = _changes.changes_since(since)
+    if include_tasks and not result["reset"]:
+        ids = result["created"] + result["updated"]
+        result["tasks"] = [as_dict(t) for t in (_store.get(i) for i in ids) if t is not None]
+    result["revision"] = _changes.token(result["revision"])
+    return result
+
+
+@app.get("/tasks/changes")
+async def get_task_changes(
+    since: str,
+    wait: float = Query(0, ge=0, le=60),
+    include_tasks: bool = False,
+):
+    """
+    Zmiany od rewizji `since`:
+    {"revision": R, "reset": false, "created": [id...], "updated": [id...], "deleted": [id...]}
+
+    - wait: long-poll — jeśli nic się nie zmieniło, czekaj do `wait` sekund
+      na pierwszą zmianę
+    - include_tasks: dołącz pełne zadania utworzone/zmienione (pole `tasks`)
+
+    `reset: true` oznacza, że historia nie sięga `since` (albo dane zostały
+    przeładowane, albo `since` pochodzi z innego workera) — klient powinien
+    pobrać pełną listę z GET /tasks.
+    """
+    await _read(_store.refresh)
+    revision = _changes.parse_token(since)
+    if wait and revision is not None and _changes.revision <= revision:
+        await _changes.wait(revision, wait)
+    return await _read(_changes_payload, revision, include_tasks)
+
+
+@app.get("/tasks/changes/stream")
+async def stream_task_changes(request: Request, since: str | None = None, include_tasks: bool = False):
+    """
+    Strumień zmian jako Server-Sent Events (EventSource w przeglądarce).
+    Każde zdarzenie `changes` ma `id` = rewizja i dane jak w /tasks/changes.
+    Po zerwaniu połączenia przeglądarka wysyła `Last-Event-ID`, więc
+    strumień wznawia się od ostatniej odebranej rewizji.
+    """
+    token = request.headers.get("last-event-id") or since
+    # bez rewizji — od bieżącej; rewizja z innego procesu (None) — pierwsze
+    # zdarzenie to reset
+    revision = _changes.parse_token(token) if token else _changes.revision
+
+    async def events():
+        nonlocal revision
+        while not await request.is_disconnected():
+            await _read(_store.refresh)
+            if revision is None or _changes.revision > revision:
+                payload = await _read(_changes_payload, revision, include_tasks)
+                revision = _changes.parse_token(payload["revision"])
+                yield f"id: {payload['revision']}\nevent: changes\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+            elif not await _changes.wait(revision, 15):
+                # komentarz SSE podtrzymujący połączenie przez proxy
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+# --- Operacje wsadowe (/tasks/batch) ---
+# Cała partia to JEDNA zmiana dla wątku zapisującego: jedna transakcja,
+# jeden zapis na dysk, niezależnie od liczby elementów. Odpowiedź zawiera
+# wynik dla każdego elementu (w kolejności z żądania):
+#   {"index": 0, "status": 201, "task": {...}}
+#   {"index": 1, "status": 404, "error": "Task not found"}
+# Z `?atomic=true` partia jest "wszystko albo nic": jeśli którykolwiek
+# element się nie powiedzie, nic nie zapisujemy i zwracamy 409.
+# Uwaga: te endpointy muszą być zarejestrowane przed /tasks/{task_id}.
+
+MAX_BATCH_ITEMS = 10_000
+
+
+class BatchFailed(Exception):
+    # Przerywa transakcję w trybie atomic; niesie wyniki poszczególnych elementów.
+    def __init__(self, results):
+        super().__init__("batch failed")
+        self.results = results
+
+
+def _validation_message(exc):
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc']) or 'body'}: {e['msg']}" for e in exc.errors())
+
+
+def _check_batch_size(items):
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Za dużo elementów (maks. {MAX_BATCH_ITEMS})")
+
+
+async def _run_batch(prepared, atomic):
+    # prepared: lista (funkcja(tx) albo None, błąd walidacji albo None, status sukcesu)
+    def mutation(tx):
+        results = []
+        failed = False
+        for index, (apply, error, ok_status) in enumerate(prepared):
+            if error is not None:
+                results.append({"index": index, "status": 422, "error": error})
+                failed = True
+                continue
+            savepoint = tx.savepoint()
+            try:
+                result = apply(tx)
+            except HTTPException as exc:
+                tx.rollback(savepoint)
+                results.append({"index": index, "status": exc.status_code, "error": exc.detail})
+                failed = True
+                continue
+            item = {"index": index, "status": ok_status}
+            if result is not None:
+                item["task"] = result
+            results.append(item)
+        if atomic and failed:
+            raise BatchFailed(results)
+        return results
+
+    try:
+        results = await _writer.execute(mutation)
+    except BatchFailed as exc:
+        raise HTTPException(status_code=409, detail={"message": "Partia odrzucona — nic nie zapisano", "results": exc.results})
+    return {"results": results}
+
+
+@app.post("/tasks/batch")
+async def create_tasks_batch(items: list[dict] = Body(...), atomic: bool = False):
+    """
+    Tworzy wiele zadań naraz. Body: lista obiektów jak w POST /tasks.
+    Każdy element jest walidowany modelem `Task`; id nadajemy po kolei.
+    """
+    _check_batch_size(items)
+    prepared = []
+    for item in items:
+        try:
+            task_dict = _prepare_new_task(Task.model_validate(item))
+        except ValidationError as exc:
+            prepared.append((None, _validation_message(exc), 201))
+            continue
+        prepared.append((lambda tx, d=task_dict: _apply_create(tx, d), None, 201))
+    return await _run_batch(prepared, atomic)
+
+
+@app.patch("/tasks/batch")
+async def update_tasks_batch(items: list[dict] = Body(...), atomic: bool = False):
+    """
+    Aktualizuje wiele zadań naraz. Body: lista obiektów z polem `id` oraz
+    polami jak w PUT /tasks/{id} (walidowane modelem `TaskUpdate`).
+    """
+    _check_batch_size(items)
+    prepared = []
+    for item in items:
+        task_id = item.get("id") if isinstance(item, dict) else None
+        if not isinstance(task_id, int) or isinstance(task_id, bool):
+            prepared.append((None, "id: wymagana liczba całkowita", 200))
+            continue
+        try:
+            updates = TaskUpdate.model_validate(item).model_dump(exclude_none=True)
+        except ValidationError as exc:
+            prepared.append((None, _validation_message(exc), 200))
+            continue
+        prepared.append((lambda tx, i=task_id, u=updates: _apply_update(tx, i, u), None, 200))
+    return await _run_batch(prepared, atomic)
+
+
+@app.delete("/tasks/batch")
+async def delete_tasks_batch(ids: list[int] = Body(...), atomic: bool = False):
+    """
+    Usuwa wiele zadań naraz. Body: lista id, np. [1, 2, 3].
+    """
+    _check_batch_size(ids)
+    prepared = [(lambda tx, i=task_id: _apply_delete(tx, i), None, 204) for task_id in ids]
+    return await _run_batch(prepared, atomic)
+
+
+# --- Eksport i import (/tasks/export, /tasks/import) ---
+# Kopia zapasowa albo migracja dużego magazynu bez ręcznego kopiowania
+# plików i bez milionów pojedynczych POST /tasks (patrz app/bulk.py).
+
+@app.get("/tasks/export")
+async def export_tasks(format: str = "ndjson", completed: bool | None = None):
+    """
+    Wszystkie zadania (opcjonalnie filtr `completed`) strumieniem, w
+    kolejności id: `format=ndjson` (jedno zadanie JSON w linii, ten sam
+    format co POST /tasks/import) albo `format=csv` (z nagłówkiem).
+
+    Zadania czytamy z magazynu porcjami, więc eksport nie trzyma całej
+    listy w pamięci; zmiany zapisane w trakcie eksportu mogą się w nim
+    znaleźć albo nie.
+    """
+    if format == "ndjson":
+        encode, media_type, chunks = bulk.ndjson_rows, "application/x-ndjson", []
+    elif format == "csv":
+        encode, media_type, chunks = bulk.csv_rows, "text/csv; charset=utf-8", [bulk.csv_header()]
+    else:
+        raise HTTPException(status_code=400, detail="Nieobsługiwany format (dozwolone: ndjson, csv)")
+    await _read(_store.refresh)
+
+    async def body():
+        for chunk in chunks:
+            yield chunk
+        # każdą porcję (odczyt strony z magazynu i kodowanie) pobieramy w
+        # puli odczytów, więc długi eksport liczy się do _read_limiter
+        portions = bulk.export_chunks(_store.page, encode, completed)
+        while (chunk := await _read(next, portions, None)) is not None:
+            yield chunk
+
+    headers = {"Content-Disposition": f'attachment; filename="tasks.{format}"'}
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+
+@app.post("/tasks/import")
+async def import_tasks(request: Request, dry_run: bool = False):
+    """
+    Import zadań z NDJSON (jedno zadanie JSON w linii, jak w POST /tasks),
+    czytany strumieniem — można wysyłać dowolnie duży plik porcjami.
+
+    Każda linia jest walidowana modelem `Task`; poprawne zadania dostają
+    nowe id i są zapisywane partiami po bulk.IMPORT_BATCH (jedna transakcja
+    na partię). Błędne linie są pomijane, a odpowiedź to podsumowanie:
+    {"dry_run", "lines", "imported", "failed",
+     "errors": [{"line": 3, "error": "..."}], "errors_truncated", "aborted"}
+
+    - dry_run: tylko walidacja — nic nie zapisujemy (`imported` = liczba
+      zadań, które zostałyby zaimportowane)
+
+    Jeśli zapis partii się nie uda (przeciążenie, błąd dysku), import jest
+    przerywany: odpowiedź 503 (z Retry-After) albo 500 zawiera to samo
+    podsumowanie z `imported` = liczba zadań już zapisanych i opisem
+    błędu w `aborted`.
+    """
+    summary = bulk.ImportSummary(dry_run)
+    batch = []
+
+    def write_batch(tx, tasks):
+        for task_dict in tasks:
+            _apply_create(tx, task_dict)
+
+    async def flush():
+        if batch and not dry_run:
+            tasks = batch[:]
+            # limit kolejki zapisu sprawdzamy tylko dla pierwszej partii —
+            # przyjętego importu nie przerywamy w połowie
+            await _writer.execute(lambda tx: write_batch(tx, tasks), admit=summary.imported == 0)
+        summary.imported += len(batch)
+        batch.clear()
+
+    try:
+        async for number, line in bulk.ndjson_lines(request.stream()):
+            summary.lines = number
+            if line is None:
+                summary.error(number, f"linia dłuższa niż {bulk.MAX_IMPORT_LINE_BYTES} bajtów")
+                continue
+            try:
+                batch.append(_prepare_new_task(Task.model_validate_json(line)))
+            except ValidationError as exc:
+                summary.error(number, _validation_message(exc))
+                continue
+            if len(batch) >= bulk.IMPORT_BATCH:
+                await flush()
+        await flush()
+    except WriterBusy as exc:
+        # wcześniejsze partie są już zapisane — klient musi wiedzieć ile
+        summary.aborted = str(exc)
+        return JSONResponse(status_code=503, content=summary.as_dict(),
+                            headers={"Retry-After": str(exc.retry_after)})
+    except Exception as exc:
+        print(f"Import przerwany po {summary.imported} zadaniach: {exc!r}", flush=True)
+        summary.aborted = f"błąd zapisu: {exc}"
+        return JSONResponse(status_code=500, content=summary.as_dict())
+    return summary.as_dict()
+
+
 @app.put("/tasks/{task_id}")
-def update_task(task_id: int, task: TaskUpdate):
-    tasks = _load_tasks_raw()
-    for i, t in enumerate(tasks):
-        if t.get("id") == task_id:
-            # model_dump(exclude_none=True) zwraca tylko pola nie-None — prościej niż filtrowanie
-            updates = task.model_dump(exclude_none=True)
-            if updates:
-                prev_completed = bool(t.get("completed", False))
-                # apply updates
-                t.update(updates)
-                # handle completed_at timestamp
-                if "completed" in updates:
-                    now_iso = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z')
-                    if updates["completed"] and not prev_completed:
-                        t["completed_at"] = now_iso
-                    elif not updates["completed"] and prev_completed:
-                        t["completed_at"] = None
-
-                tasks[i] = t
-                _save_tasks_raw(tasks)
-            return t
-    raise HTTPException(status_code=404, detail="Task not found")
+async def update_task(task_id: int, task: TaskUpdate):
+    # model_dump(exclude_none=True) zwraca tylko pola nie-None — prościej niż filtrowanie
+    updates = task.model_dump(exclude_none=True)
+    return await _writer.execute(lambda tx: _apply_update(tx, task_id, updates))
 
 
 # Aktualizacja zadania (PUT /tasks/{id})
@@ -275,16 +746,11 @@ def update_task(task_id: int, task: TaskUpdate):
 # - Jeśli zmienia się z True na False, usuwamy datę 'completed_at'
 
 @app.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(task_id: int):
+async def delete_task(task_id: int):
     """
     Usuwa zadanie o podanym ID.
     - Jeśli zadanie istnieje, zostaje usunięte i zwracamy 204 No Content.
     - Jeśli nie istnieje, zwracamy 404.
     """
-    tasks = _load_tasks_raw()
-    for i, t in enumerate(tasks):
-        if t.get("id") == task_id:
-            tasks.pop(i)
-            _save_tasks_raw(tasks)
-            return  # 204 No Content
-    raise HTTPException(status_code=404, detail="Task not found")
\ No newline at end of file
+    await _writer.execute(lambda tx: _apply_delete(tx, task_id))
+    return  # 204 No Content
@@ -0,0 +1,251 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# ==================================================================
+# Metryki wydajności bez zewnętrznych zależności.
+# - Histogramy czasu odpowiedzi dla każdej trasy (MetricsMiddleware) i
+#   dla każdej fazy pracy magazynu: odczyt pliku, czekanie na blokadę,
+#   serializacja, fsync, kopia .bak, podmiana pliku (timed("faza")).
+# - Liczniki zdarzeń (np. naprawy uszkodzonego pliku) i wskaźniki
+#   (liczba zadań, rozmiar plików).
+# - GET /metrics zwraca wszystko w formacie tekstowym Prometheusa, a
+#   każda odpowiedź ma nagłówek Server-Timing z fazami tego żądania.
+# Pomiar to dwa odczyty perf_counter i wyszukanie kubełka (bisect), więc
+# metryki mogą być włączone zawsze.
+# ==================================================================
+
+# granice kubełków w sekundach (od 0,1 ms do 10 s)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs.extend(f'{n}="{_escape(v)}"' for n, v in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def clear(self):
+        with self._lock:
+            self._series = {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._render_series(series))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._series.get(labels, 0)
+
+    def _render_series(self, series):
+        for labels, value in series:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._series[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._series.get(labels)
+            if entry is None:
+                # [liczniki kubełków (bez skumulowania), suma, liczba]
+                entry = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *labels):
+        entry = self._series.get(labels)
+        return entry[2] if entry else 0
+
+    def _render_series(self, series):
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = _format_labels(self.labelnames, labels, [("le", _format_number(bound))])
+                yield f"{self.name}_bucket{le} {cumulative}"
+            base = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{base} {_format_number(total)}"
+            yield f"{self.name}_count{base} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "tasks_http_request_duration_seconds", "Czas obsługi żądania HTTP (do wysłania nagłówków)", ("method", "route"))
+REQUESTS_TOTAL = REGISTRY.counter(
+    "tasks_http_requests_total", "Liczba obsłużonych żądań HTTP", ("method", "route", "status"))
+PHASE_SECONDS = REGISTRY.histogram(
+    "tasks_storage_phase_duration_seconds",
+    "Czas faz pracy magazynu: queue_wait, load, lock_wait, serialize, fsync, backup, replace, commit, encode", ("phase",))
+RECOVERIES_TOTAL = REGISTRY.counter(
+    "tasks_corruption_recoveries_total", "Naprawy uszkodzonych plików danych", ("source", "result"))
+TASKS_COUNT = REGISTRY.gauge("tasks_count", "Liczba zadań w magazynie")
+FILE_BYTES = REGISTRY.gauge("tasks_storage_file_bytes", "Rozmiar plików danych na dysku", ("file",))
+WRITE_QUEUE_DEPTH = REGISTRY.gauge("tasks_write_queue_depth", "Zmiany czekające na zapis (kolejka wątku zapisującego)")
+WRITE_REJECTIONS_TOTAL = REGISTRY.counter(
+    "tasks_write_rejections_total", "Zmiany odrzucone przez kontrolę przyjęć (queue_full, timeout)", ("reason",))
+READS_IN_FLIGHT = REGISTRY.gauge("tasks_reads_in_flight", "Odczyty wykonywane w puli wątków odczytu")
+
+
+# --- fazy żądania (Server-Timing) ---
+# Lista (faza, sekundy) bieżącego żądania. run_in_threadpool kopiuje
+# kontekst, więc fazy zmierzone w wątkach też trafiają do tej listy;
+# wątek zapisujący dopisuje fazy commitu do list żądań z partii.
+
+_request_timings = contextvars.ContextVar("tasks_request_timings", default=None)
+
+
+def record_phase(phase, seconds):
+    PHASE_SECONDS.observe(seconds, phase)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((phase, seconds))
+
+
+@contextmanager
+def timed(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start)
+
+
+def current_timings():
+    return _request_timings.get()
+
+
+@contextmanager
+def collect_timings():
+    # Zbiera fazy zmierzone w tym bloku (np. commit partii w wątku zapisującym).
+    timings = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def server_timing(timings, total):
+    # "load;dur=1.20, fsync;dur=4.81, total;dur=7.05" — czasy w ms,
+    # powtarzające się fazy sumujemy
+    durations = {}
+    for phase, seconds in timings:
+        durations[phase] = durations.get(phase, 0.0) + seconds
+    durations["total"] = total
+    return ", ".join(f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in durations.items())
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: mierzy czas żądania (histogram per metoda i trasa)
+    i dodaje do odpowiedzi nagłówek Server-Timing.
+
+    Trasę opisujemy szablonem (/tasks/{task_id}), a nie ścieżką, żeby
+    liczba serii nie rosła z każdym id; nieznane ścieżki to "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        timings = []
+        token = _request_timings.set(timings)
+        status = 500
+        headers_sent_at = None
+
+        async def send_with_timing(message):
+            nonlocal status, headers_sent_at
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers_sent_at = time.perf_counter()
+                header = server_timing(timings, headers_sent_at - start)
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode("ascii"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            elapsed = (headers_sent_at or time.perf_counter()) - start
+            REQUEST_SECONDS.observe(elapsed, scope["method"], route)
+            REQUESTS_TOTAL.inc(scope["method"], route, str(status))
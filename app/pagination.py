@@ -0,0 +1,104 @@
+import base64
+import bisect
+import json
+
+# ==================================================================
+# Stronicowanie "keyset" dla GET /tasks.
+# Zamiast OFFSET (który przy każdej stronie przechodzi od początku)
+# pamiętamy klucz ostatniego zwróconego zadania — (pole sortowania, id) —
+# i następna strona zaczyna się od pierwszego klucza większego od niego.
+# Klucz trafia do klienta jako nieprzezroczysty `cursor` (base64 z JSON).
+# ==================================================================
+
+SORT_FIELDS = ("id", "created_at")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_sort(sort):
+    """'created_at' -> ('created_at', False), '-id' -> ('id', True)."""
+    sort = sort or "id"
+    descending = sort.startswith("-")
+    field = sort[1:] if descending else sort
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Nieobsługiwane sortowanie: {sort!r} (dozwolone: {', '.join(SORT_FIELDS)}, z '-' malejąco)")
+    return field, descending
+
+
+def sort_key(task, field):
+    # Klucz zawsze kończy się id, więc jest unikalny nawet przy równych
+    # datach utworzenia. Brak daty traktujemy jak pusty napis. Ręcznie
+    # wpisane, nie-liczbowe id zamieniamy na napis (trafia do kursora).
+    task_id = task.get("id")
+    if not isinstance(task_id, int):
+        task_id = str(task_id)
+    if field == "id":
+        return (task_id,)
+    return (task.get(field) or "", task_id)
+
+
+def order_key(key):
+    # Klucz sort_key -> klucz porównywalny przy mieszanych typach id:
+    # liczbowe id przed napisami (jak _sort_key w app/search.py).
+    *rest, task_id = key
+    return (*rest, (0, task_id, "") if isinstance(task_id, int) else (1, 0, task_id))
+
+
+def encode_cursor(sort, key):
+    raw = json.dumps({"s": sort, "k": list(key)}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    # Zwraca klucz (krotkę) zapisany w kursorze; kursor musi pochodzić z
+    # zapytania z tym samym sortowaniem.
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        key = tuple(data["k"])
+        cursor_sort = data["s"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Nieprawidłowy cursor")
+    if cursor_sort != sort:
+        raise InvalidCursor("Cursor pochodzi z innego sortowania")
+    # Klucz musi mieć kształt sort_key dla tego pola: (id,) albo
+    # (data, id), id liczbowe albo napis — inaczej porównanie z kluczami
+    # zadań rzuci TypeError.
+    field, _ = parse_sort(sort)
+    types = ((int, str),) if field == "id" else ((str,), (int, str))
+    if len(key) != len(types) or any(type(value) not in t for value, t in zip(key, types)):
+        raise InvalidCursor("Nieprawidłowy cursor")
+    return key
+
+
+def paginate(tasks, sort, after=None, limit=None):
+    """
+    Stronicowanie listy w pamięci.
+
+    Zwraca (zadania, klucz_następnej_strony); klucz jest None, gdy to
+    ostatnia strona.
+    """
+    field, descending = parse_sort(sort)
+    ordered = sorted(tasks, key=lambda t: order_key(sort_key(t, field)), reverse=descending)
+    if after is not None:
+        after = order_key(after)
+        keys = [order_key(sort_key(t, field)) for t in ordered]
+        if descending:
+            # lista malejąco: szukamy pierwszego klucza mniejszego od `after`
+            lo, hi = 0, len(keys)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if keys[mid] < after:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            start = lo
+        else:
+            start = bisect.bisect_right(keys, after)
+        ordered = ordered[start:]
+    if limit is None or len(ordered) <= limit:
+        return ordered, None
+    page = ordered[:limit]
+    return page, sort_key(page[-1], field)
@@ -0,0 +1,156 @@
+import calendar
+import sys
+import time
+from collections.abc import Mapping
+from datetime import datetime
+
+# ==================================================================
+# Zwarta reprezentacja zadania w pamięci.
+# Słownik z json.load to dla każdego zadania osobna tablica haszująca,
+# a daty to 20-znakowe napisy ISO 8601 (ok. 70 B każdy). Przy milionie
+# zadań to setki MB. TaskRecord trzyma te same dane w __slots__:
+# - daty w kanonicznym formacie API ("2025-11-23T10:00:00Z") jako liczba
+#   sekund od epoki; inne napisy (np. wpisane ręcznie) bez zmian,
+# - tytuły przez sys.intern — powtarzające się tytuły to jeden obiekt,
+# - completed jako bool (True/False to obiekty współdzielone),
+# - nieznane pola (ręczna edycja pliku) w osobnym słowniku, tylko gdy są.
+# Na zewnątrz rekord zachowuje się jak słownik tylko do odczytu
+# (get, [], keys, {**rekord}), a do JSON zamieniamy go dopiero na
+# granicy API / zapisu pliku (to_dict, json_default).
+# ==================================================================
+
+FIELDS = ("id", "title", "description", "completed", "created_at", "completed_at")
+_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def pack_time(value):
+    # "2025-11-23T10:00:00Z" -> 1763892000; wszystko inne zostaje napisem.
+    # fromisoformat przyjmuje też inne zapisy tej samej długości (np. data
+    # tygodniowa "2025-W47-1T10:00:00Z"), więc liczbę zwracamy tylko wtedy,
+    # gdy unpack_time odtworzy dokładnie ten sam napis.
+    if (
+        isinstance(value, str) and len(value) == 20
+        and value[4] == "-" and value[10] == "T" and value[19] == "Z"
+    ):
+        try:
+            seconds = calendar.timegm(datetime.fromisoformat(value[:19]).timetuple())
+        except ValueError:
+            return value
+        if seconds >= 0 and unpack_time(seconds) == value:
+            return seconds
+    return value
+
+
+def unpack_time(value):
+    if isinstance(value, int):
+        return time.strftime(_TIME_FORMAT, time.gmtime(value))
+    return value
+
+
+class TaskRecord(Mapping):
+    """
+    Niemutowalne zadanie w zwartej postaci; czytane jak słownik.
+
+    Zmiana zadania to nadal nowy słownik przekazany do tx.put() —
+    magazyn zamienia go na rekord przy commicie (compact_ops).
+    """
+
+    __slots__ = ("id", "title", "description", "completed", "_created", "_completed_at", "_extra")
+
+    def __init__(self, task):
+        self.id = task.get("id")
+        title = task.get("title")
+        self.title = sys.intern(title) if type(title) is str else title
+        self.description = task.get("description")
+        self.completed = task.get("completed")
+        self._created = pack_time(task.get("created_at"))
+        self._completed_at = pack_time(task.get("completed_at"))
+        extra = None
+        if len(task) > len(FIELDS) or any(key not in task for key in FIELDS):
+            # nietypowe zadanie: pamiętamy dodatkowe pola i brakujące
+            # (brak klucza to co innego niż None)
+            extra = {key: task[key] for key in task if key not in FIELDS}
+            extra["__missing__"] = tuple(key for key in FIELDS if key not in task)
+        self._extra = extra
+
+    def _keys(self):
+        if self._extra is None:
+            return FIELDS
+        missing = self._extra["__missing__"]
+        return tuple(k for k in FIELDS if k not in missing) + tuple(k for k in self._extra if k != "__missing__")
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            if self._extra is not None and key in self._extra["__missing__"]:
+                raise KeyError(key)
+            if key == "created_at":
+                return unpack_time(self._created)
+            if key == "completed_at":
+                return unpack_time(self._completed_at)
+            return getattr(self, key)
+        if self._extra is not None and key != "__missing__" and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # najczęstsza operacja — bez wyjątków KeyError z Mapping.get
+        if self._extra is None and key in FIELDS:
+            return self[key]
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __eq__(self, other):
+        if isinstance(other, TaskRecord):
+            return (
+                self.id == other.id and self.title == other.title
+                and self.description == other.description and self.completed == other.completed
+                and self._created == other._created and self._completed_at == other._completed_at
+                and self._extra == other._extra
+            )
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def to_dict(self):
+        return {key: self[key] for key in self._keys()}
+
+    def __repr__(self):
+        return f"TaskRecord({self.to_dict()!r})"
+
+
+def compact_task(task):
+    return task if isinstance(task, TaskRecord) else TaskRecord(task)
+
+
+def compact_ops(ops):
+    # Operacje z transakcji (słowniki) -> operacje z rekordami.
+    return [("put", compact_task(arg)) if op == "put" else (op, arg) for op, arg in ops]
+
+
+def packed_time(task, field):
+    # Data zadania jak w TaskRecord (sekundy albo napis) — z rekordu bez
+    # tworzenia napisu ISO, ze słownika przez pack_time.
+    if isinstance(task, TaskRecord) and task._extra is None:
+        return task._created if field == "created_at" else task._completed_at
+    return pack_time(task.get(field))
+
+
+def as_dict(task):
+    return task.to_dict() if isinstance(task, TaskRecord) else task
+
+
+def json_default(obj):
+    # json.dump(..., default=json_default) zapisuje rekordy jak słowniki
+    if isinstance(obj, TaskRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
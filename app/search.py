@@ -0,0 +1,126 @@
+import threading
+import unicodedata
+
+# ==================================================================
+# Indeks wyszukiwania dla GET /tasks?q=...
+# Dla każdego zadania trzymamy znormalizowany tytuł i opis (małe litery,
+# bez polskich znaków) oraz indeks odwrotny: trigram -> zbiór id zadań.
+# Zapytanie sprawdzamy tylko na zadaniach, które zawierają wszystkie
+# trigramy zapytania, zamiast przechodzić po całej liście.
+# Indeks jest aktualizowany przyrostowo przez magazyn (subscribe).
+# ==================================================================
+
+# Litery, których NFKD nie rozkłada na literę bazową + znak diakrytyczny.
+_EXTRA_FOLD = str.maketrans({"ł": "l", "Ł": "L", "đ": "d", "Đ": "D", "ø": "o", "Ø": "O"})
+
+
+def normalize(text):
+    """Sprowadza tekst do postaci porównywalnej: 'Żółć' -> 'zolc'."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text.translate(_EXTRA_FOLD).casefold())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    Trigramowy indeks odwrotny po tytule i opisie zadań.
+
+    Implementuje interfejs słuchacza magazynu: reset(tasks) przy pełnym
+    przeładowaniu i apply(ops) po każdym commicie.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs = {}      # id -> (tytuł, opis) po normalizacji
+        self._postings = {}  # trigram -> set(id)
+
+    def reset(self, tasks):
+        with self._lock:
+            self._docs = {}
+            self._postings = {}
+            for task in tasks:
+                self._add(task)
+
+    def apply(self, ops):
+        with self._lock:
+            for op, arg in ops:
+                if op == "put":
+                    self._remove(arg["id"])
+                    self._add(arg)
+                else:
+                    self._remove(arg)
+
+    def _add(self, task):
+        task_id = task.get("id")
+        doc = (normalize(task.get("title")), normalize(task.get("description")))
+        self._docs[task_id] = doc
+        for gram in trigrams(doc[0]) | trigrams(doc[1]):
+            self._postings.setdefault(gram, set()).add(task_id)
+
+    def _remove(self, task_id):
+        doc = self._docs.pop(task_id, None)
+        if doc is None:
+            return
+        for gram in trigrams(doc[0]) | trigrams(doc[1]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def search(self, q, rank=False):
+        """
+        Zwraca id zadań, których tytuł lub opis zawiera `q` (bez względu
+        na wielkość liter i polskie znaki).
+
+        - rank=False: kolejność rosnąca po id (jak w liście zadań)
+        - rank=True: najlepsze dopasowania najpierw (patrz _score)
+        """
+        nq = normalize(q)
+        with self._lock:
+            grams = trigrams(nq)
+            if grams:
+                # zaczynamy od najrzadszego trigramu, żeby zbiór kandydatów
+                # był jak najmniejszy
+                postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+                candidates = set(postings[0])
+                for ids in postings[1:]:
+                    candidates &= ids
+                    if not candidates:
+                        break
+            else:
+                # zapytania krótsze niż 3 znaki — sprawdzamy wszystkie
+                candidates = self._docs.keys()
+            matches = [
+                (task_id, self._docs[task_id]) for task_id in candidates
+                if nq in self._docs[task_id][0] or nq in self._docs[task_id][1]
+            ]
+        if rank:
+            matches.sort(key=lambda m: _score(nq, m[0], m[1]))
+        else:
+            matches.sort(key=lambda m: _sort_key(m[0]))
+        return [task_id for task_id, _ in matches]
+
+
+def _sort_key(task_id):
+    # id z pliku mogą być dowolnego typu — int-y sortujemy liczbowo
+    return (0, task_id, "") if isinstance(task_id, int) else (1, 0, str(task_id))
+
+
+def _score(nq, task_id, doc):
+    # Im mniejsza krotka, tym lepsze dopasowanie:
+    # 1) trafienie w tytule przed trafieniem tylko w opisie,
+    # 2) początek tytułu / słowa przed środkiem słowa,
+    # 3) wcześniejsza pozycja, krótszy tekst.
+    title, description = doc
+    pos = title.find(nq)
+    field, text = (0, title) if pos >= 0 else (1, description)
+    if pos < 0:
+        pos = description.find(nq)
+    boundary = 0 if pos == 0 else (1 if not text[pos - 1].isalnum() else 2)
+    return (field, boundary, pos, len(text), _sort_key(task_id))
@@ -0,0 +1,378 @@
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+from app.indexes import RANGE_FIELDS
+from app.metrics import timed
+from app.pagination import parse_sort, sort_key
+from app.storage import TaskStore, Transaction, load_tasks_file
+
+# ==================================================================
+# Tryb "sqlite": zadania w bazie SQLite (moduł standardowy sqlite3).
+# - klucz główny na `id` => PUT/DELETE to wyszukanie po indeksie,
+# - indeksy na `completed`, `created_at` i `completed_at` => filtr
+#   ?completed=... i zakresy dat nie wymagają czytania wszystkich zadań,
+# - tryb WAL: odczyty nie blokują zapisu i odwrotnie,
+# - odczyty biorą połączenie z małej puli na czas jednego zapytania
+#   (wątki puli serwera żyją krótko — połączenie na wątek by wyciekało),
+# - każdy commit dopisuje id zmienionych zadań do tabeli `changes` z
+#   rosnącym numerem `seq`; inne procesy (uvicorn --workers N) nakładają
+#   na swoje indeksy tylko te zmiany zamiast przeładowywać wszystko.
+# ==================================================================
+
+COLUMNS = ("id", "title", "description", "completed", "created_at", "completed_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    completed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_completed_idx ON tasks (completed);
+CREATE INDEX IF NOT EXISTS tasks_created_at_idx ON tasks (created_at);
+CREATE INDEX IF NOT EXISTS tasks_completed_at_idx ON tasks (completed_at);
+-- licznik id: usunięcie ostatniego zadania nie zwalnia jego id
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+-- klucz stronicowania po dacie utworzenia (patrz page())
+CREATE INDEX IF NOT EXISTS tasks_created_at_key_idx ON tasks (COALESCE(created_at, ''), id);
+-- dziennik zmian dla innych procesów (AUTOINCREMENT: seq nigdy nie wraca)
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL
+);
+"""
+
+_SELECT = "SELECT " + ", ".join(COLUMNS) + " FROM tasks"
+
+# ile wolnych połączeń do odczytu trzymamy w puli; nadmiarowe zamykamy
+MAX_IDLE_READERS = 8
+# ile ostatnich wpisów tabeli `changes` zostawiamy; proces, który został
+# dalej w tyle, przeładowuje wszystko (reset)
+CHANGE_LOG_KEEP = 100_000
+# limit parametrów w jednym zapytaniu (starsze SQLite: 999)
+_MAX_PARAMS = 500
+
+
+def _row_to_task(row):
+    task = dict(zip(COLUMNS, row))
+    task["completed"] = bool(task["completed"])
+    return task
+
+
+def _task_to_row(task):
+    return (
+        task["id"],
+        task.get("title") or "",
+        task.get("description"),
+        1 if task.get("completed") else 0,
+        task.get("created_at"),
+        task.get("completed_at"),
+    )
+
+
+def _filters(completed, ranges):
+    # Warunki WHERE dla ?completed= i zakresów dat (jak matches() w
+    # app/indexes.py: granice wyłączne, zadania bez daty odpadają).
+    where, params = [], []
+    if completed is not None:
+        where.append("completed = ?")
+        params.append(1 if completed else 0)
+    for field, (after, before) in (ranges or {}).items():
+        if field not in RANGE_FIELDS:
+            raise ValueError(f"Nieobsługiwany zakres: {field!r}")
+        where.append(f"{field} > ?")
+        params.append(after if after is not None else "")
+        if before is not None:
+            where.append(f"{field} < ?")
+            params.append(before)
+    return where, params
+
+
+class SqliteStore(TaskStore):
+    """
+    Magazyn zadań w bazie SQLite.
+
+    Parametry:
+    - db_path: plik bazy (np. data/tasks.db)
+    - migrate_from: opcjonalny plik tasks.json, z którego jednorazowo
+      importujemy zadania, gdy baza jest tworzona od zera
+    """
+
+    def __init__(self, db_path, migrate_from=None):
+        super().__init__()
+        self.db_path = db_path
+        self._idle = []
+        self._pool_lock = threading.Lock()
+        self._closed = False
+        # zapis i tak wykonuje jeden wątek (app/writer.py), ale blokada
+        # chroni też przed transakcjami z innych wątków
+        self._lock = threading.RLock()
+        # Transakcje idą przez jedno, osobne połączenie.
+        self._write_conn = self._connect()
+        # Słuchaczy aktualizujemy wg tabeli `changes` (_sync) na własnym
+        # połączeniu i pod własną blokadą — odczyty nie czekają na trwający
+        # zapis (fsync). PRAGMA data_version to szybki test, czy od
+        # ostatniego sprawdzenia ktokolwiek (inny proces albo nasz
+        # _write_conn) coś zatwierdził.
+        self._sync_conn = self._connect()
+        self._sync_lock = threading.Lock()
+        created = self._write_conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks'"
+        ).fetchone() is None
+        self._write_conn.executescript(SCHEMA)
+        self._data_version = self._read_data_version()
+        # ostatni `seq` nałożony na słuchaczy i własne, jeszcze nie
+        # zsynchronizowane commity: pierwszy seq -> (ostatni seq, operacje)
+        self._seen_seq = self._sync_conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        self._own = {}
+        if created and migrate_from and os.path.exists(migrate_from):
+            migrate_json_to_sqlite(migrate_from, self)
+
+    def _connect(self):
+        # isolation_level=None: transakcje otwieramy sami (BEGIN IMMEDIATE)
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # FULL = fsync przy każdym commicie, jak w trybie JSON
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextmanager
+    def _reader(self):
+        # Połączenie do odczytu z puli (albo nowe, gdy wszystkie zajęte).
+        with self._pool_lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._pool_lock:
+                if not self._closed and len(self._idle) < MAX_IDLE_READERS:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def _query(self, sql, params=()):
+        with self._reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _read_data_version(self):
+        return self._sync_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        with self._sync_lock:
+            if self._read_data_version() != self._data_version:
+                self._sync()
+
+    def _sync(self):
+        # Nakłada na słuchaczy zmiany o seq > _seen_seq (woła się pod
+        # _sync_lock). Własne commity znamy z operacji transakcji; dla
+        # cudzych czytamy aktualny stan zmienionych zadań.
+        self._data_version = self._read_data_version()
+        rows = self._sync_conn.execute(
+            "SELECT seq, task_id FROM changes WHERE seq > ? ORDER BY seq", (self._seen_seq,)
+        ).fetchall()
+        if not rows:
+            return
+        if rows[0][0] != self._seen_seq + 1:
+            # potrzebne wpisy zostały już usunięte z dziennika
+            self._seen_seq = rows[-1][0]
+            self._own = {first: own for first, own in self._own.items() if own[0] > self._seen_seq}
+            self._notify_reset([_row_to_task(r) for r in self._sync_conn.execute(_SELECT + " ORDER BY id")])
+            return
+        ops, foreign = [], []
+        skip_to = 0
+        for seq, task_id in rows:
+            if seq <= skip_to:
+                continue
+            own = self._own.pop(seq, None)
+            if own is None:
+                foreign.append(task_id)
+                continue
+            ops.extend(self._foreign_ops(foreign))
+            foreign = []
+            skip_to, own_ops = own
+            ops.extend(own_ops)
+        ops.extend(self._foreign_ops(foreign))
+        self._seen_seq = rows[-1][0]
+        if ops:
+            self._notify_apply(ops)
+
+    def _foreign_ops(self, task_ids):
+        # zmiany z innego procesu -> put (aktualny stan) albo delete
+        ids = list(dict.fromkeys(task_ids))
+        current = {}
+        for i in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[i:i + _MAX_PARAMS]
+            sql = _SELECT + " WHERE id IN (" + ", ".join("?" * len(chunk)) + ")"
+            for row in self._sync_conn.execute(sql, chunk):
+                current[row[0]] = _row_to_task(row)
+        return [("put", current[i]) if i in current else ("delete", i) for i in ids]
+
+    def all(self):
+        return [_row_to_task(r) for r in self._query(_SELECT + " ORDER BY id")]
+
+    def get(self, task_id):
+        rows = self._query(_SELECT + " WHERE id = ?", (task_id,))
+        return _row_to_task(rows[0]) if rows else None
+
+    def list(self, completed=None, ranges=None):
+        if completed is None and not ranges:
+            return self.all()
+        where, params = _filters(completed, ranges)
+        rows = self._query(_SELECT + " WHERE " + " AND ".join(where) + " ORDER BY id", params)
+        return [_row_to_task(r) for r in rows]
+
+    def page(self, completed=None, sort="id", after=None, limit=None, ranges=None):
+        # Keyset po indeksie: WHERE (pole, id) > (?, ?) ORDER BY pole, id LIMIT n+1
+        field, descending = parse_sort(sort)
+        order = "DESC" if descending else "ASC"
+        cmp = "<" if descending else ">"
+        where, params = _filters(completed, ranges)
+        if field == "id":
+            order_by = f"id {order}"
+            if after is not None:
+                where.append(f"id {cmp} ?")
+                params.append(after[0])
+        else:
+            # brak daty traktujemy jak pusty napis (tak jak sort_key)
+            order_by = f"COALESCE({field}, '') {order}, id {order}"
+            if after is not None:
+                # pierwszy warunek pozwala SQLite zacząć od miejsca w
+                # indeksie, drugi (row value) dokładnie odcina klucz
+                where.append(f"COALESCE({field}, '') {cmp}= ? AND (COALESCE({field}, ''), id) {cmp} (?, ?)")
+                params.extend([after[0], *after])
+        sql = _SELECT
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + order_by
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        tasks = [_row_to_task(r) for r in self._query(sql, params)]
+        if limit is None or len(tasks) <= limit:
+            return tasks, None
+        tasks = tasks[:limit]
+        return tasks, sort_key(tasks[-1], field)
+
+    def _get_committed(self, task_id):
+        row = self._write_conn.execute(_SELECT + " WHERE id = ?", (task_id,)).fetchone()
+        return _row_to_task(row) if row else None
+
+    def _next_id(self):
+        # zapisany licznik (MAX(id) to tylko odczyt ostatniego klucza
+        # indeksu — na wypadek zadań wstawionych z jawnym id)
+        return self._write_conn.execute(
+            "SELECT MAX(COALESCE((SELECT value FROM meta WHERE key = 'next_id'), 1),"
+            " COALESCE((SELECT MAX(id) FROM tasks), 0) + 1)"
+        ).fetchone()[0]
+
+    def count(self):
+        return self._query("SELECT COUNT(*) FROM tasks")[0][0]
+
+    def data_files(self):
+        return [path for path in (self.db_path, self.db_path + "-wal") if os.path.exists(path)]
+
+    @contextmanager
+    def transaction(self):
+        with timed("lock_wait"):
+            self._lock.acquire()
+        try:
+            conn = self._write_conn
+            # IMMEDIATE: od razu bierzemy blokadę zapisu, więc odczyty
+            # wewnątrz transakcji widzą stan, na który nałożymy zmiany
+            with timed("lock_wait"):
+                conn.execute("BEGIN IMMEDIATE")
+            first_seq = None
+            try:
+                tx = Transaction(self)
+                yield tx
+                self._write_ops(conn, tx.ops)
+                if tx.ops:
+                    conn.execute(
+                        "INSERT INTO meta (key, value) VALUES ('next_id', ?)"
+                        " ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+                        (tx.next_id,),
+                    )
+                    first_seq = self._log_changes(conn, tx.ops)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                if first_seq is not None:
+                    with self._sync_lock:
+                        self._own.pop(first_seq, None)
+                raise
+            # COMMIT w trybie synchronous=FULL obejmuje fsync
+            with timed("commit"):
+                conn.execute("COMMIT")
+            if tx.ops:
+                with self._sync_lock:
+                    self._sync()
+        finally:
+            self._lock.release()
+
+    def _log_changes(self, conn, ops):
+        # Wpisy dziennika dla tej transakcji. Mamy blokadę zapisu bazy, więc
+        # numery seq są kolejne; zapamiętujemy je z operacjami, żeby _sync
+        # nie czytał z bazy zmian, które już znamy.
+        conn.executemany(
+            "INSERT INTO changes (task_id) VALUES (?)",
+            [(arg["id"] if op == "put" else arg,) for op, arg in ops],
+        )
+        last = conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0]
+        conn.execute("DELETE FROM changes WHERE seq <= ?", (last - CHANGE_LOG_KEEP,))
+        first = last - len(ops) + 1
+        with self._sync_lock:
+            self._own[first] = (last, list(ops))
+        return first
+
+    def _write_ops(self, conn, ops):
+        for op, arg in ops:
+            if op == "put":
+                conn.execute(
+                    "INSERT OR REPLACE INTO tasks (" + ", ".join(COLUMNS) + ") VALUES (?, ?, ?, ?, ?, ?)",
+                    _task_to_row(arg),
+                )
+            else:
+                conn.execute("DELETE FROM tasks WHERE id = ?", (arg,))
+
+    def close(self):
+        with self._pool_lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        with self._lock:
+            self._write_conn.close()
+        with self._sync_lock:
+            self._sync_conn.close()
+
+
+def migrate_json_to_sqlite(json_path, store):
+    # Jednorazowy import zadań z tasks.json (z tą samą obsługą uszkodzeń
+    # co w trybie JSON). Plik źródłowy zostaje bez zmian — jest kopią.
+    tasks = [t for t in load_tasks_file(json_path) if isinstance(t.get("id"), int)]
+    with store.transaction() as tx:
+        for t in tasks:
+            tx.put(t)
+    return len(tasks)
+
+
+if __name__ == "__main__":
+    # python -m app.sqlite_store data/tasks.json data/tasks.db
+    if len(sys.argv) != 3:
+        print("Użycie: python -m app.sqlite_store <tasks.json> <tasks.db>")
+        sys.exit(2)
+    store = SqliteStore(sys.argv[2])
+    count = migrate_json_to_sqlite(sys.argv[1], store)
+    store.close()
+    print(f"Zaimportowano {count} zadań do {sys.argv[2]}")
@@ -0,0 +1,139 @@
+import threading
+import time
+from datetime import datetime
+
+from app.records import pack_time
+
+# ==================================================================
+# Statystyki zadań dla GET /tasks/stats (panele / dashboardy).
+# Zamiast pobierać całą listę i liczyć po stronie klienta, utrzymujemy
+# sumy przyrostowo: słuchacz magazynu przy każdym commicie odejmuje
+# wkład poprzedniej wersji zadania i dodaje wkład nowej. Odczyt nie
+# zależy od liczby zadań — tylko od liczby dni w histogramach.
+# ==================================================================
+
+
+def _epoch(value):
+    # data ISO 8601 -> sekundy od epoki (UTC); None, gdy nie da się odczytać
+    if not value:
+        return None
+    seconds = pack_time(value)
+    if isinstance(seconds, int):
+        return seconds
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return None
+    return int(parsed.timestamp())
+
+
+def _day(seconds):
+    return time.strftime("%Y-%m-%d", time.gmtime(seconds)) if seconds is not None else None
+
+
+def _contribution(task):
+    # (ukończone, dzień utworzenia, dzień ukończenia, czas do ukończenia w s)
+    completed = bool(task.get("completed"))
+    created = _epoch(task.get("created_at"))
+    completed_at = _epoch(task.get("completed_at")) if completed else None
+    duration = None
+    if created is not None and completed_at is not None and completed_at >= created:
+        duration = completed_at - created
+    return (completed, _day(created), _day(completed_at), duration)
+
+
+class TaskStats:
+    """
+    Słuchacz magazynu (reset/apply) z agregatami zadań.
+
+    Dla każdego id pamiętamy jego wkład (krotka z _contribution), bo
+    operacja "delete" niesie tylko id, a "put" nie mówi, jaka była
+    poprzednia wersja zadania (np. przejście completed True -> False).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset([])
+
+    # --- interfejs słuchacza magazynu ---
+
+    def reset(self, tasks):
+        with self._lock:
+            self._contrib = {}
+            self._completed = 0
+            self._created_per_day = {}
+            self._completed_per_day = {}
+            self._duration_sum = 0
+            self._duration_count = 0
+            self._snapshot = None
+            for task in tasks:
+                self._put(task)
+
+    def apply(self, ops):
+        with self._lock:
+            for op, arg in ops:
+                if op == "put":
+                    self._put(arg)
+                else:
+                    self._remove(arg)
+            self._snapshot = None
+
+    def _put(self, task):
+        task_id = task.get("id")
+        self._remove(task_id)
+        contrib = _contribution(task)
+        self._contrib[task_id] = contrib
+        self._add(contrib, 1)
+
+    def _remove(self, task_id):
+        contrib = self._contrib.pop(task_id, None)
+        if contrib is not None:
+            self._add(contrib, -1)
+
+    def _add(self, contrib, sign):
+        completed, created_day, completed_day, duration = contrib
+        if completed:
+            self._completed += sign
+        _bump(self._created_per_day, created_day, sign)
+        _bump(self._completed_per_day, completed_day, sign)
+        if duration is not None:
+            self._duration_sum += sign * duration
+            self._duration_count += sign
+
+    # --- odczyt ---
+
+    def snapshot(self):
+        """
+        {"total", "active", "completed", "completion_rate",
+         "created_per_day": {"RRRR-MM-DD": n}, "completed_per_day": {...},
+         "mean_time_to_complete_seconds"}
+
+        Wynik jest zapamiętywany do następnej zmiany.
+        """
+        with self._lock:
+            if self._snapshot is None:
+                total = len(self._contrib)
+                self._snapshot = {
+                    "total": total,
+                    "active": total - self._completed,
+                    "completed": self._completed,
+                    "completion_rate": round(self._completed / total, 4) if total else 0.0,
+                    "created_per_day": dict(sorted(self._created_per_day.items())),
+                    "completed_per_day": dict(sorted(self._completed_per_day.items())),
+                    "mean_time_to_complete_seconds": (
+                        round(self._duration_sum / self._duration_count, 1) if self._duration_count else None
+                    ),
+                }
+            return self._snapshot
+
+
+def _bump(counts, day, sign):
+    if day is None:
+        return
+    n = counts.get(day, 0) + sign
+    if n:
+        counts[day] = n
+    else:
+        del counts[day]
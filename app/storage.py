@@ -0,0 +1,439 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from app.filelock import FileLock
+from app.indexes import TaskIndex, matches
+from app.metrics import RECOVERIES_TOTAL, timed
+from app.pagination import paginate
+from app.records import compact_ops, compact_task, json_default
+
+# ==================================================================
+# Warstwa przechowywania zadań.
+# Handlery w `app/main.py` nie operują bezpośrednio na pliku — korzystają
+# z obiektu "store", który udostępnia odczyt (all/get) oraz transakcje
+# (put/delete). Dzięki temu można podmienić sposób zapisu (plik JSON,
+# dziennik append-only, SQLite) bez zmiany logiki endpointów.
+# ==================================================================
+
+
+def load_tasks_file(path):
+    # Wczytuje zadania z pliku JSON, z prostą obsługą uszkodzeń pliku.
+    # Jeśli plik JSON jest uszkodzony, spróbujemy przywrócić z kopii
+    # zapasowej (path + '.bak'). Jeśli to się nie uda, zachowamy
+    # uszkodzony plik pod nazwą *.corrupt.TIMESTAMP i utworzymy nowy
+    # pusty plik z listą []. Dzięki temu nie tracimy danych i nie
+    # przerywamy działania aplikacji.
+    if not os.path.exists(path):
+        # brak pliku => zwróć pustą listę (plik zostanie utworzony przy zapisie)
+        return []
+    try:
+        with timed("load"), open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # Upewnij się, że mamy listę (oczekiwany format)
+        if isinstance(data, list):
+            return data
+        # jeśli format nie jest listą, traktujemy jako uszkodzony
+        return _recover_tasks_file(path)
+    except json.JSONDecodeError:
+        # plik jest niepoprawnym JSON-em
+        return _recover_tasks_file(path)
+    except Exception:
+        # Inny błąd I/O -> logujemy (print) i zwracamy pustą listę,
+        # aplikacja nadal działa. W praktyce warto użyć loggera.
+        print(f"Nieoczekiwany błąd podczas odczytu {os.path.basename(path)}", flush=True)
+        return []
+
+
+def _recover_tasks_file(path):
+    # Uszkodzony plik przenosimy na bok (*.corrupt.TIMESTAMP) i próbujemy
+    # przywrócić poprzednią wersję z kopii zapasowej.
+    corrupt_name = path + f".corrupt.{int(time.time())}"
+    shutil.move(path, corrupt_name)
+    bak = path + ".bak"
+    if os.path.exists(bak):
+        # przywróć z kopii zapasowej
+        shutil.copy(bak, path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                RECOVERIES_TOTAL.inc("json", "restored_from_backup")
+                return data
+        except Exception:
+            pass
+    # nic nie pomogło -> utwórz nowy pusty plik i zwróć pustą listę
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([], f)
+    RECOVERIES_TOTAL.inc("json", "reset_empty")
+    return []
+
+
+def save_tasks_file(path, tasks_list):
+    # Zapisujemy atomowo: zapis do pliku tymczasowego w tej samej
+    # lokalizacji, potem zamiana (os.replace) — to minimalizuje ryzyko
+    # powstania uszkodzonego pliku przy awarii podczas zapisu.
+    # Dodatkowo tworzymy kopię zapasową (.bak) poprzedniej wersji.
+    dirpath = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='tasks_', suffix='.tmp', dir=dirpath)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmpf:
+            with timed("serialize"):
+                json.dump(tasks_list, tmpf, indent=2, ensure_ascii=False, default=json_default)
+                tmpf.flush()
+            with timed("fsync"):
+                os.fsync(tmpf.fileno())
+        # utwórz kopię zapasową obecnego pliku przed zastąpieniem
+        if os.path.exists(path):
+            try:
+                with timed("backup"):
+                    shutil.copy(path, path + '.bak')
+            except Exception:
+                # jeśli backup się nie uda, kontynuujemy — nie chcemy
+                # przerwać zapisu głównego pliku
+                print(f'Nie udało się utworzyć backupu {os.path.basename(path)}', flush=True)
+        # atomowa zamiana pliku
+        with timed("replace"):
+            os.replace(tmp_path, path)
+    finally:
+        # w razie czego usuń plik tymczasowy
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+
+
+class Transaction:
+    """
+    Zestaw zmian wykonywanych razem i zapisywanych jednym commitem.
+
+    - get(id): zwraca zadanie z uwzględnieniem zmian z tej transakcji
+    - put(task): wstawia lub nadpisuje całe zadanie (słownik z polem `id`)
+    - delete(id): usuwa zadanie
+    - allocate_id(): nadaje kolejne wolne id
+
+    Zadania traktujemy jako niemutowalne — zmiana to zawsze nowy słownik
+    przekazany do put(), więc odczyty nie widzą niezatwierdzonych zmian.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._overlay = {}
+        self._next_id = store._next_id()
+        self.ops = []
+
+    def get(self, task_id):
+        if task_id in self._overlay:
+            return self._overlay[task_id]
+        return self._store._get_committed(task_id)
+
+    def put(self, task):
+        self._overlay[task["id"]] = task
+        self.ops.append(("put", task))
+        if task["id"] >= self._next_id:
+            self._next_id = task["id"] + 1
+
+    def delete(self, task_id):
+        self._overlay[task_id] = None
+        self.ops.append(("delete", task_id))
+
+    def allocate_id(self):
+        task_id = self._next_id
+        self._next_id += 1
+        return task_id
+
+    @property
+    def next_id(self):
+        # pierwsze id, którego ta transakcja jeszcze nie nadała
+        return self._next_id
+
+    def savepoint(self):
+        # Znacznik pozwalający wycofać zmiany jednej operacji w ramach
+        # większej transakcji (np. wspólnego commitu kilku żądań).
+        return len(self.ops), self._next_id
+
+    def rollback(self, savepoint):
+        n_ops, next_id = savepoint
+        del self.ops[n_ops:]
+        self._next_id = next_id
+        # odbuduj nakładkę z pozostałych operacji
+        self._overlay = {}
+        for op, arg in self.ops:
+            if op == "put":
+                self._overlay[arg["id"]] = arg
+            else:
+                self._overlay[arg] = None
+
+
+def apply_ops(tasks, ops):
+    # Nakłada operacje na słownik id -> zadanie (kolejność wstawiania
+    # zachowana, jak w pliku JSON). Operacje "put" niosą pełny stan
+    # zadania, więc ponowne nałożenie tych samych operacji daje ten sam
+    # wynik — z tego korzysta odtwarzanie dziennika.
+    for op, arg in ops:
+        if op == "put":
+            tasks[arg["id"]] = arg
+        elif op == "delete":
+            tasks.pop(arg, None)
+
+
+class TaskStore(ABC):
+    """
+    Interfejs magazynu zadań.
+
+    Odczyt: all(), get(id), list(completed=...).
+    Zapis: wyłącznie przez transaction() (patrz Transaction), która
+    zatwierdza wszystkie zmiany jednym commitem.
+
+    Struktury pomocnicze (np. indeks wyszukiwania) rejestrują się przez
+    subscribe(). Słuchacz dostaje reset(tasks) przy pełnym (prze)ładowaniu
+    danych oraz apply(ops) po każdym commicie. refresh() sprawdza, czy dane
+    nie zmieniły się poza tym procesem, i w razie potrzeby robi reset.
+    """
+
+    def __init__(self):
+        self._listeners = []
+
+    def subscribe(self, *listeners):
+        # Kilku słuchaczy naraz dostaje tę samą listę zadań — przy starcie
+        # magazyn czyta (dekoduje) wszystkie zadania tylko raz.
+        with self._lock:
+            tasks = self.all()
+            for listener in listeners:
+                self._listeners.append(listener)
+                listener.reset(tasks)
+
+    def _notify_reset(self, tasks):
+        for listener in self._listeners:
+            listener.reset(tasks)
+
+    def _notify_apply(self, ops):
+        for listener in self._listeners:
+            listener.apply(ops)
+
+    def refresh(self):
+        pass
+
+    @abstractmethod
+    def all(self):
+        """Wszystkie zadania w kolejności dodania."""
+
+    @abstractmethod
+    def get(self, task_id):
+        """Zadanie o podanym id albo None."""
+
+    def list(self, completed=None, ranges=None):
+        # Domyślnie filtrujemy w Pythonie; magazyny z indeksami (pamięć —
+        # IndexedTaskStore, SQLite) nadpisują tę metodę.
+        # ranges: {"created_at"|"completed_at": (po, przed)}, patrz app/indexes.py
+        tasks = self.all()
+        if completed is None and not ranges:
+            return tasks
+        return [t for t in tasks if matches(t, completed, ranges)]
+
+    def page(self, completed=None, sort="id", after=None, limit=None, ranges=None):
+        # Jedna strona wyników w kolejności `sort`, zaczynając za kluczem
+        # `after` (patrz app/pagination.py). Zwraca (zadania, następny klucz).
+        return paginate(self.list(completed, ranges), sort, after, limit)
+
+    @abstractmethod
+    def transaction(self):
+        """Context manager zwracający Transaction; commit przy wyjściu."""
+
+    def count(self):
+        """Liczba zadań (np. dla /metrics)."""
+        return len(self.all())
+
+    def data_files(self):
+        """Pliki z danymi na dysku (np. rozmiary w /metrics)."""
+        return []
+
+    def close(self):
+        pass
+
+    # Metody używane przez Transaction — odczyt stanu zatwierdzonego w
+    # obrębie otwartej transakcji.
+
+    @abstractmethod
+    def _get_committed(self, task_id):
+        pass
+
+    @abstractmethod
+    def _next_id(self):
+        pass
+
+
+class IndexedTaskStore(TaskStore):
+    """
+    Wspólna część magazynów trzymających zadania w pamięci (JSON,
+    dziennik): odczyty po id, filtr ?completed=, zakresy dat i strony
+    obsługuje TaskIndex (app/indexes.py) zamiast przeglądania listy.
+
+    Podklasa ustawia `_lock` i aktualizuje `self._index` (reset/apply)
+    przy każdej zmianie zadań.
+
+    Dwie blokady: `_lock` trzyma zapis przez całą transakcję (serializacja,
+    fsync), a `_read_lock` tylko na chwilę publikacji — podmiany `_tasks`
+    i nałożenia zmian na indeks po trwałym zapisie. Odczyty biorą wyłącznie
+    `_read_lock`, więc nie czekają na trwający commit: widzą ostatni
+    opublikowany stan.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._index = TaskIndex()
+        self._read_lock = threading.Lock()
+
+    def all(self):
+        self.refresh()
+        with self._read_lock:
+            return list(self._tasks.values())
+
+    def get(self, task_id):
+        self.refresh()
+        with self._read_lock:
+            return self._index.get(task_id)
+
+    def list(self, completed=None, ranges=None):
+        self.refresh()
+        with self._read_lock:
+            if completed is None and not ranges:
+                return list(self._tasks.values())
+            return self._index.list(completed, ranges)
+
+    def page(self, completed=None, sort="id", after=None, limit=None, ranges=None):
+        self.refresh()
+        with self._read_lock:
+            return self._index.page(completed, sort, after, limit, ranges)
+
+    def count(self):
+        self.refresh()
+        with self._read_lock:
+            return len(self._tasks)
+
+    def _get_committed(self, task_id):
+        return self._index.get(task_id)
+
+
+class JsonFileStore(IndexedTaskStore):
+    """
+    Domyślny sposób przechowywania: cała lista zadań w jednym pliku JSON.
+
+    Każda transakcja zapisuje plik w całości (atomowo, z kopią .bak).
+    Sparsowaną listę trzymamy w pamięci i parsujemy plik ponownie tylko
+    wtedy, gdy zmienił się jego podpis (mtime, rozmiar, i-węzeł) — np.
+    gdy zapisał go inny proces serwera albo ktoś edytował go ręcznie.
+
+    Bezpieczne przy wielu procesach (`uvicorn --workers N`): odczyt-zmiana-
+    zapis odbywa się pod blokadą pliku `<path>.lock` (app/filelock.py),
+    a transakcja zawsze zaczyna od aktualnej zawartości pliku, więc żaden
+    zapis nie nadpisze cudzego, a id nie powtórzą się między procesami.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(path + ".lock")
+        self._tasks = {}
+        self._signature = None
+        self._loaded = False
+        # Upewnij się, że plik z zadaniami istnieje
+        with self._file_lock:
+            if not os.path.exists(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump([], f)
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _unchanged(self):
+        signature = self._stat_signature()
+        return self._loaded and signature is not None and signature == self._signature
+
+    def refresh(self):
+        if self._unchanged():
+            # najczęstszy przypadek: jeden stat() zamiast parsowania pliku
+            return
+        # Plik się zmienił. Jeśli w innym wątku trwa właśnie commit albo
+        # przeładowanie, nie czekamy na nie — odczyt dostaje ostatnio
+        # opublikowany stan. Czeka tylko pierwszy odczyt (nic jeszcze nie ma).
+        if not self._lock.acquire(blocking=not self._loaded):
+            return
+        try:
+            if self._unchanged():
+                # w międzyczasie zakończył się commit tego procesu
+                return
+            with self._file_lock:
+                # pod blokadą nikt nie podmienia pliku ani go nie naprawia
+                # (.corrupt/.bak), więc podpis i treść do siebie pasują
+                signature = self._stat_signature()
+                tasks = {t.get("id"): compact_task(t) for t in load_tasks_file(self.path)}
+                if self._stat_signature() != signature:
+                    # plik zmienił się w trakcie odczytu (naprawa z .bak albo
+                    # ręczna edycja) — następne refresh() wczyta go ponownie
+                    signature = None
+            first = not self._loaded
+            # plik zmienił inny proces: indeks i słuchacze dostają tylko
+            # różnicę, a nie przebudowują wszystkiego od zera
+            ops = None if first else diff_tasks(self._tasks, tasks)
+            with self._read_lock:
+                self._tasks = tasks
+                if first:
+                    self._index.reset(list(tasks.values()))
+                elif ops:
+                    self._index.apply(ops)
+            self._signature = signature
+            self._loaded = True
+            if first:
+                self._notify_reset(list(tasks.values()))
+            elif ops:
+                self._notify_apply(ops)
+        finally:
+            self._lock.release()
+
+    def _next_id(self):
+        # Plik jest wspólny dla wszystkich procesów, więc licznik wynika z
+        # jego zawartości: największe id (ostatni klucz indeksu) + 1.
+        return self._index.max_id() + 1
+
+    def data_files(self):
+        return [self.path]
+
+    @contextmanager
+    def transaction(self):
+        with ExitStack() as locks:
+            with timed("lock_wait"):
+                locks.enter_context(self._lock)
+                locks.enter_context(self._file_lock)
+            self.refresh()
+            tx = Transaction(self)
+            yield tx
+            if tx.ops:
+                # w pamięci trzymamy zwarte rekordy (app/records.py)
+                ops = compact_ops(tx.ops)
+                tasks = dict(self._tasks)
+                apply_ops(tasks, ops)
+                save_tasks_file(self.path, list(tasks.values()))
+                with self._read_lock:
+                    self._tasks = tasks
+                    self._index.apply(ops)
+                self._signature = self._stat_signature()
+                self._notify_apply(ops)
+
+
+def diff_tasks(old, new):
+    # Operacje, które zamieniają stan `old` w `new` (oba: id -> zadanie).
+    ops = [("delete", task_id) for task_id in old if task_id not in new]
+    ops.extend(("put", task) for task_id, task in new.items() if old.get(task_id) != task)
+    return ops
@@ -0,0 +1,213 @@
+import asyncio
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+from app import metrics
+
+# ==================================================================
+# Wspólny zapis (group commit).
+# Zamiast robić fsync osobno dla każdego żądania, wszystkie zmiany
+# trafiają do kolejki obsługiwanej przez JEDEN wątek zapisujący. Wątek
+# zbiera to, co przyszło w krótkim oknie czasowym, wykonuje wszystkie
+# zmiany w jednej transakcji magazynu i zapisuje je jednym commitem.
+# Każde żądanie dostaje odpowiedź dopiero, gdy jego partia jest na dysku.
+#
+# Kontrola przyjęć: liczba oczekujących zmian jest ograniczona
+# (max_pending). Gdy kolejka jest pełna, nowa zmiana jest od razu
+# odrzucana (WriterBusy -> 503 z Retry-After), zamiast ustawiać się w
+# coraz dłuższej kolejce. Zmiana, która czekała dłużej niż max_wait_ms,
+# jest odrzucana bez wykonania — klient i tak zwykle już zrezygnował.
+# Zmiany zgłoszone z admit=False (kolejne partie przyjętego importu)
+# omijają oba limity.
+# ==================================================================
+
+DEFAULT_WINDOW_MS = 2
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_MAX_WAIT_MS = 5000
+
+
+class WriterBusy(Exception):
+    """Zmiana odrzucona przez kontrolę przyjęć; retry_after w sekundach."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"write rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class GroupCommitWriter:
+    """
+    Wątek zapisujący zmiany partiami.
+
+    - store: magazyn z metodą transaction() (patrz app/storage.py)
+    - window_ms: jak długo po pierwszej zmianie czekamy na kolejne
+    - max_batch: maksymalna liczba zmian w jednym commicie
+    - max_pending: ile zmian może czekać na zapis (0 = bez limitu)
+    - max_wait_ms: jak długo zmiana może czekać w kolejce (0 = bez limitu)
+
+    Zmiana to funkcja `fn(tx)`, która czyta i modyfikuje transakcję;
+    jej wynik (albo wyjątek, np. HTTPException 404) wraca do wywołującego.
+    Wyjątek w jednej zmianie wycofuje tylko ją, a nie całą partię.
+    """
+
+    def __init__(self, store, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH,
+                 max_pending=DEFAULT_MAX_PENDING, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.store = store
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        # czas ostatniego commitu na jedną zmianę — do oszacowania Retry-After
+        self._seconds_per_item = 0.0
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # wątek uruchamiamy leniwie — działa to także bez zdarzeń startowych
+        # aplikacji (np. w TestClient bez bloku `with`)
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="tasks-writer", daemon=True)
+                    self._thread.start()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def retry_after(self):
+        # sekundy do opróżnienia kolejki przy ostatnim tempie zapisu (1..60)
+        return min(60, max(1, math.ceil(self._pending * self._seconds_per_item)))
+
+    def submit(self, fn, admit=True):
+        # Zwraca concurrent.futures.Future z wynikiem fn(tx) po zapisie.
+        # admit=False pomija limit kolejki i limit czasu oczekiwania (np.
+        # kolejne partie importu, który już został przyjęty) — zmiana
+        # i tak jest liczona.
+        with self._pending_lock:
+            if admit and self.max_pending and self._pending >= self.max_pending:
+                metrics.WRITE_REJECTIONS_TOTAL.inc("queue_full")
+                raise WriterBusy("queue_full", self.retry_after())
+            self._pending += 1
+            metrics.WRITE_QUEUE_DEPTH.set(self._pending)
+        fut = Future()
+        self._ensure_started()
+        # lista faz żądania (Server-Timing) — dopiszemy do niej fazy commitu
+        self._queue.put((fn, fut, metrics.current_timings(), time.monotonic(), admit))
+        return fut
+
+    async def execute(self, fn, admit=True):
+        # Wersja dla handlerów async — nie blokuje pętli zdarzeń.
+        return await asyncio.wrap_future(self.submit(fn, admit))
+
+    def _done(self, count):
+        with self._pending_lock:
+            self._pending -= count
+            metrics.WRITE_QUEUE_DEPTH.set(self._pending)
+
+    def close(self):
+        # Kończy pracę wątku po obsłużeniu wszystkiego, co jest w kolejce.
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # sygnał zamknięcia wracamy do kolejki, obsłużymy po partii
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = self._collect(item)
+            try:
+                self._commit_batch(batch)
+            except Exception as exc:
+                # błąd poza zmianami (np. w metrykach) nie może zatrzymać
+                # wątku — kolejne żądania czekałyby w nieskończoność
+                print(f"Błąd wątku zapisującego: {exc!r}", flush=True)
+                for _, fut, *_ in batch:
+                    if not fut.done():
+                        try:
+                            fut.set_exception(exc)
+                        except InvalidStateError:
+                            pass
+
+    def _commit_batch(self, batch):
+        try:
+            self._commit_admitted(self._admit(batch))
+        finally:
+            self._done(len(batch))
+
+    def _admit(self, batch):
+        # Czas w kolejce trafia do Server-Timing / metryk jako "queue_wait";
+        # zmiany czekające dłużej niż max_wait odrzucamy bez wykonania.
+        now = time.monotonic()
+        admitted = []
+        for fn, fut, timings, enqueued, admit in batch:
+            # Żądanie anulowane w międzyczasie (rozłączony klient, timeout)
+            # pomijamy; po tym wywołaniu przyszłości nie da się już anulować,
+            # więc set_result / set_exception poniżej zawsze się powiodą.
+            if not fut.set_running_or_notify_cancel():
+                continue
+            waited = now - enqueued
+            metrics.PHASE_SECONDS.observe(waited, "queue_wait")
+            if timings is not None:
+                timings.append(("queue_wait", waited))
+            if admit and self.max_wait and waited > self.max_wait:
+                metrics.WRITE_REJECTIONS_TOTAL.inc("timeout")
+                fut.set_exception(WriterBusy("timeout", self.retry_after()))
+                continue
+            admitted.append((fn, fut, timings))
+        return admitted
+
+    def _commit_admitted(self, batch):
+        if not batch:
+            return
+        results = []
+        start = time.perf_counter()
+        try:
+            with metrics.collect_timings() as phases, self.store.transaction() as tx:
+                for fn, fut, _ in batch:
+                    savepoint = tx.savepoint()
+                    try:
+                        results.append((fut, fn(tx), None))
+                    except Exception as exc:
+                        tx.rollback(savepoint)
+                        results.append((fut, None, exc))
+        except Exception as exc:
+            # commit się nie udał — żadna zmiana z partii nie jest trwała
+            for _, fut, _ in batch:
+                fut.set_exception(exc)
+            return
+        self._seconds_per_item = (time.perf_counter() - start) / len(batch)
+        # fazy wspólnego commitu (blokada, zapis, fsync) należą do każdego
+        # żądania z partii
+        for _, _, timings in batch:
+            if timings is not None:
+                timings.extend(phases)
+        for fut, result, exc in results:
+            if exc is not None:
+                fut.set_exception(exc)
+            else:
+                fut.set_result(result)
@@ -0,0 +1,36 @@
+import json
+import random
+import time
+
+# ==================================================================
+# Generowane dane testowe dla benchmarków: zadania w tym samym
+# kształcie, w jakim tworzy je API (część ukończona, daty "...Z").
+# ==================================================================
+
+TITLES = ["Zakupy", "Sprzątanie", "Raport", "Telefon do klienta", "Trening", "Rachunki", "Spotkanie", "Pranie"]
+
+
+def _iso(seconds):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+
+def generate_tasks(count, seed=1):
+    rnd = random.Random(seed)
+    tasks = []
+    for i in range(1, count + 1):
+        created = 1_700_000_000 + i * 30
+        completed = rnd.random() < 0.4
+        tasks.append({
+            "id": i,
+            "title": f"{rnd.choice(TITLES)} {rnd.randrange(100)}",
+            "description": f"Opis zadania numer {i}",
+            "completed": completed,
+            "created_at": _iso(created),
+            "completed_at": _iso(created + 3600) if completed else None,
+        })
+    return tasks
+
+
+def write_tasks_file(path, count, seed=1):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(generate_tasks(count, seed), f, ensure_ascii=False)
@@ -0,0 +1,303 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.datasets import write_tasks_file
+
+# ==================================================================
+# Benchmark / test obciążeniowy API zadań.
+#
+# Dla każdego rozmiaru danych generujemy tasks.json w katalogu
+# tymczasowym (TASKS_DATA_DIR) i mierzymy endpointy przy kolejnych
+# poziomach współbieżności:
+# - transport "asgi": aplikacja w tym samym procesie, httpx.ASGITransport
+#   (bez sieci — sam koszt aplikacji i magazynu),
+# - transport "uvicorn": prawdziwy serwer w osobnym procesie, HTTP po
+#   localhost.
+# Wynik: przepustowość (żądania/s) oraz opóźnienia p50/p95/p99 dla
+# każdej kombinacji endpoint × współbieżność × rozmiar danych. Wyniki
+# można zapisać jako punkt odniesienia (baseline) i przy kolejnych
+# uruchomieniach zgłaszać regresje większe niż --threshold.
+#
+#   python -m benchmarks.load --sizes 10000,100000 --concurrency 1,16
+#   python -m benchmarks.load --baseline benchmarks/results/baseline.json
+# ==================================================================
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "results", "baseline.json")
+# powyżej tylu zadań pomijamy GET /tasks bez limitu (odpowiedź to cały plik)
+FULL_LIST_MAX = 100_000
+
+
+# --- scenariusze ---
+# Każdy scenariusz to (nazwa, funkcja(klient, stan, numer_żądania)).
+# `stan` pilnuje, żeby PUT i DELETE trafiały w istniejące zadania.
+
+class _State:
+    def __init__(self, size):
+        self.size = size
+        # DELETE usuwa od końca, PUT losuje z pierwszej połowy
+        self.next_delete = size
+        self.rnd = random.Random(7)
+
+    def update_id(self):
+        return self.rnd.randint(1, max(1, self.size // 2))
+
+    def delete_id(self):
+        task_id = self.next_delete
+        self.next_delete -= 1
+        return task_id
+
+
+def _scenarios(size):
+    scenarios = [
+        ("GET /tasks?limit=100", lambda c, s, i: c.get("/tasks", params={"limit": 100})),
+        ("GET /tasks?completed=true&limit=100", lambda c, s, i: c.get("/tasks", params={"completed": "true", "limit": 100})),
+        ("GET /tasks?q=raport&limit=100", lambda c, s, i: c.get("/tasks", params={"q": "raport", "limit": 100})),
+        ("GET /tasks?created_after=...&limit=100", lambda c, s, i: c.get(
+            "/tasks", params={"created_after": "2023-11-20T00:00:00Z", "limit": 100})),
+        ("POST /tasks", lambda c, s, i: c.post("/tasks", json={"title": f"Bench {i}", "description": "benchmark"})),
+        ("PUT /tasks/{id}", lambda c, s, i: c.put(f"/tasks/{s.update_id()}", json={"completed": i % 2 == 0})),
+        ("DELETE /tasks/{id}", lambda c, s, i: c.delete(f"/tasks/{s.delete_id()}")),
+    ]
+    if size <= FULL_LIST_MAX:
+        scenarios.insert(0, ("GET /tasks", lambda c, s, i: c.get("/tasks")))
+    return scenarios
+
+
+def percentile(values, pct):
+    # percentyl metodą najbliższej pozycji (nearest-rank) na posortowanej liście
+    if not values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+async def _measure(client, request, state, requests, concurrency):
+    latencies = []
+    errors = 0
+    numbers = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in numbers:
+            start = time.perf_counter()
+            try:
+                response = await request(client, state, i)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_scenarios(client, size, concurrency_levels, requests, warmup=5):
+    state = _State(size)
+    results = []
+    for endpoint, request in _scenarios(size):
+        for concurrency in concurrency_levels:
+            # rozgrzewka (pierwsze kodowanie, połączenia) poza pomiarem
+            await _measure(client, request, state, min(warmup, requests), 1)
+            stats = await _measure(client, request, state, requests, concurrency)
+            results.append({"endpoint": endpoint, "size": size, "concurrency": concurrency, **stats})
+            print(f"  {endpoint:<42} c={concurrency:<4} {stats['throughput_rps']:>9.1f} req/s"
+                  f"  p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms"
+                  f"  p99 {stats['p99_ms']:>8.2f} ms", file=sys.stderr, flush=True)
+    return results
+
+
+# --- transport "asgi": osobny proces, bo app.main tworzy magazyn przy imporcie ---
+
+async def _child_asgi(config):
+    from app.main import app
+
+    limits = httpx.Limits(max_connections=None)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=None) as client:
+        return await run_scenarios(client, config["size"], config["concurrency"], config["requests"])
+
+
+def _run_asgi(env, config):
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.load", "--child", json.dumps(config)],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.PIPE, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark ASGI zakończył się kodem {proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# --- transport "uvicorn": prawdziwy serwer HTTP ---
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _run_uvicorn(env, config, workers=1, startup_timeout=300):
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=PROJECT_ROOT, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=max(config["concurrency"]), max_keepalive_connections=max(config["concurrency"]))
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+            deadline = time.monotonic() + startup_timeout
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn zakończył się kodem {server.returncode}")
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn nie wystartował na czas")
+                await asyncio.sleep(0.2)
+            return await run_scenarios(client, config["size"], config["concurrency"], config["requests"])
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def run_benchmarks(sizes, concurrency, requests, transports=("asgi",), storage="json", workers=1):
+    """Uruchamia wszystkie kombinacje i zwraca dokument z wynikami (dict)."""
+    results = []
+    for size in sizes:
+        for transport in transports:
+            data_dir = tempfile.mkdtemp(prefix="tasks_bench_")
+            try:
+                print(f"[{transport}, {storage}] {size} zadań", file=sys.stderr, flush=True)
+                write_tasks_file(os.path.join(data_dir, "tasks.json"), size)
+                env = {**os.environ, "TASKS_DATA_DIR": data_dir, "TASKS_STORAGE": storage}
+                config = {"size": size, "concurrency": list(concurrency), "requests": requests}
+                if transport == "asgi":
+                    rows = _run_asgi(env, config)
+                elif transport == "uvicorn":
+                    rows = asyncio.run(_run_uvicorn(env, config, workers=workers))
+                else:
+                    raise ValueError(f"Nieznany transport: {transport!r}")
+            finally:
+                shutil.rmtree(data_dir, ignore_errors=True)
+            results.extend({"transport": transport, "storage": storage, **row} for row in rows)
+    return {
+        "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+# --- porównanie z punktem odniesienia ---
+
+def _result_key(row):
+    return (row["transport"], row["storage"], row["endpoint"], row["size"], row["concurrency"])
+
+
+def compare(current, baseline, threshold):
+    """
+    Zwraca listę opisów regresji: p95 wolniejsze albo przepustowość
+    mniejsza niż w punkcie odniesienia o więcej niż `threshold` (0.2 = 20%).
+    Kombinacje nieobecne w punkcie odniesienia pomijamy.
+    """
+    previous = {_result_key(row): row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        base = previous.get(_result_key(row))
+        if base is None:
+            continue
+        label = f"{row['endpoint']} [{row['transport']}, {row['storage']}, {row['size']} zadań, c={row['concurrency']}]"
+        if base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{label}: p95 {base['p95_ms']} -> {row['p95_ms']} ms")
+        if base["throughput_rps"] and row["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{label}: {base['throughput_rps']} -> {row['throughput_rps']} req/s")
+    return regressions
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark API zadań (przepustowość i opóźnienia)")
+    parser.add_argument("--sizes", type=_int_list, default=[10_000, 100_000], help="rozmiary danych, np. 10000,100000,1000000")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 16], help="poziomy współbieżności, np. 1,16,64")
+    parser.add_argument("--requests", type=int, default=200, help="liczba żądań na endpoint i poziom")
+    parser.add_argument("--transport", default="asgi", help="asgi, uvicorn albo oba: asgi,uvicorn")
+    parser.add_argument("--storage", default="json", choices=("json", "journal", "sqlite", "binary"))
+    parser.add_argument("--workers", type=int, default=1, help="procesy uvicorn (tryby json i sqlite)")
+    parser.add_argument("--output", help="zapisz wyniki do pliku JSON")
+    parser.add_argument("--baseline", help=f"porównaj z punktem odniesienia (np. {os.path.relpath(DEFAULT_BASELINE, PROJECT_ROOT)})")
+    parser.add_argument("--update-baseline", action="store_true", help="zapisz wyniki jako nowy punkt odniesienia")
+    parser.add_argument("--threshold", type=float, default=0.2, help="dopuszczalne pogorszenie (0.2 = 20%%)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        # proces potomny transportu ASGI: wyniki jako ostatnia linia stdout
+        print(json.dumps(asyncio.run(_child_asgi(json.loads(args.child)))))
+        return 0
+
+    transports = [t.strip() for t in args.transport.split(",") if t.strip()]
+    report = run_benchmarks(args.sizes, args.concurrency, args.requests, transports, args.storage, args.workers)
+    if args.output:
+        _write_json(args.output, report)
+
+    if args.baseline:
+        if args.update_baseline or not os.path.exists(args.baseline):
+            _write_json(args.baseline, report)
+            print(f"Zapisano punkt odniesienia: {args.baseline}")
+            return 0
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"Regresje (próg {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"Brak regresji względem {args.baseline} (próg {args.threshold:.0%})")
+    return 0
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import argparse
+import gc
+import json
+import tracemalloc
+
+from app.indexes import RANGE_FIELDS, TaskIndex
+from app.records import TaskRecord
+from benchmarks.datasets import generate_tasks
+
+# ==================================================================
+# Zużycie pamięci przez zadania: słowniki z json.load (dotychczas)
+# kontra zwarte rekordy TaskRecord (app/records.py) — same zadania oraz
+# cały stan magazynu w pamięci (zadania + indeksy TaskIndex).
+#   python -m benchmarks.memory --tasks 1000000
+# ==================================================================
+
+
+def generate_tasks_json(count):
+    return json.dumps(generate_tasks(count), ensure_ascii=False)
+
+
+def dict_store(tasks):
+    # Stan magazynu sprzed zwartych rekordów: słowniki i indeksy, których
+    # klucze dat to napisy ISO współdzielone ze słownikami.
+    index = TaskIndex()
+    index.reset(tasks)
+    for field in RANGE_FIELDS:
+        index._sorted[field] = sorted((t[field] or "", t["id"]) for t in tasks if field == "created_at" or t[field])
+        index._odd[field] = []
+    return tasks, index
+
+
+def record_store(tasks):
+    records = [TaskRecord(t) for t in tasks]
+    index = TaskIndex()
+    index.reset(records)
+    return records, index
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pamięć zajmowana przez zadania w magazynie")
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    raw = generate_tasks_json(args.tasks)
+    mib = 1024 * 1024
+    print(f"zadań: {args.tasks}")
+    rows = (
+        ("słowniki (json.load)", "rekordy (TaskRecord)", lambda: json.loads(raw),
+         lambda: [TaskRecord(t) for t in json.loads(raw)]),
+        ("magazyn: słowniki + indeksy", "magazyn: rekordy + indeksy", lambda: dict_store(json.loads(raw)),
+         lambda: record_store(json.loads(raw))),
+    )
+    for before_label, after_label, before_build, after_build in rows:
+        before, before_bytes = measure(before_build)
+        del before
+        after, after_bytes = measure(after_build)
+        del after
+        print(f"{before_label:29} {before_bytes / mib:8.1f} MiB  ({before_bytes / args.tasks:.0f} B/zadanie)")
+        print(f"{after_label:29} {after_bytes / mib:8.1f} MiB  ({after_bytes / args.tasks:.0f} B/zadanie)")
+        print(f"{'oszczędność':29} {(1 - after_bytes / before_bytes) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
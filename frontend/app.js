@@ -23,6 +23,8 @@ async function fetchTasksWithParams(params = {}){
   const qs = new URLSearchParams();
   if (typeof params.completed !== 'undefined' && params.completed !== null) qs.set('completed', String(params.completed));
   if (params.q) qs.set('q', params.q);
+  if (params.rank) qs.set('rank', 'true');
+  if (params.limit) qs.set('limit', String(params.limit));
   const url = `${apiBase}/tasks` + (qs.toString() ? `?${qs.toString()}` : '');
   const res = await fetch(url);
   return _handleResponse(res);
@@ -53,62 +55,103 @@ function el(tag, props={}, ...children){
   return e;
 }
 
+// zadania na ekranie: ostatnia pełna lista z GET /tasks, potem
+// uzupełniana zmianami z SSE (applyChanges)
+let shownTasks = [];
+
+function currentFilter(){
+  const q = document.getElementById('filterQ')?.value.trim() || '';
+  const compSel = document.getElementById('filterCompleted')?.value || 'all';
+  let completed = null;
+  if (compSel === 'active') completed = false;
+  if (compSel === 'completed') completed = true;
+  return {completed, q};
+}
+
 async function render(){
-  const list = document.getElementById('tasks');
-  list.innerHTML='';
   try{
-    const q = document.getElementById('filterQ')?.value.trim() || '';
-    const compSel = document.getElementById('filterCompleted')?.value || 'all';
-    let completed = null;
-    if (compSel === 'active') completed = false;
-    if (compSel === 'completed') completed = true;
-    const tasks = await fetchTasksWithParams({completed, q});
-    tasks.forEach(t=>{
-      const badge = el('span',{class: 'badge ' + (t.completed ? 'done' : 'active')}, t.completed ? 'Ukończone' : 'Aktywne');
-      const dates = el('div',{class:'dates'},
-        t.created_at ? el('div',{class:'date created'}, 'Utworzono: ' + new Date(t.created_at).toLocaleString()) : null,
-        t.completed_at ? el('div',{class:'date completed_at'}, 'Zakończono: ' + new Date(t.completed_at).toLocaleString()) : null
-      );
-
-      const item = el('li',{class:'task'+(t.completed? ' completed':'' )},
-        el('input',{type:'checkbox',checked:!!t.completed}),
-        el('div',{class:'content'},
-          el('div',{class:'title'}, t.title, ' ', badge),
-          t.description? el('div',{class:'desc'}, t.description) : null,
-          dates
-        ),
-        el('div',{class:'controls'},
-          el('button',{class:'btn edit'}, 'Edytuj'),
-          el('button',{class:'btn toggle'}, t.completed? 'Oznacz jako nieukończone' : 'Oznacz jako ukończone')
-        )
-      );
-
-      const checkbox = item.querySelector('input[type=checkbox]');
-      checkbox.addEventListener('change', async ()=>{
-        await updateTask(t.id, {completed: checkbox.checked});
-        render();
-      });
-
-      item.querySelector('.edit').addEventListener('click', async ()=>{
-        const newTitle = prompt('Nowy tytuł', t.title);
-        if(newTitle===null) return;
-        const newDesc = prompt('Nowy opis', t.description||'')
-        await updateTask(t.id, {title:newTitle, description:newDesc});
-        render();
-      });
-
-      item.querySelector('.toggle').addEventListener('click', async ()=>{
-        await updateTask(t.id, {completed: !t.completed});
-        render();
-      });
-
-      list.appendChild(item);
-    })
+    const {completed, q} = currentFilter();
+    // przy wyszukiwaniu najlepsze dopasowania pokazujemy na górze
+    shownTasks = await fetchTasksWithParams({completed, q, rank: !!q});
+    draw();
   }catch(err){
+    const list = document.getElementById('tasks');
+    list.innerHTML='';
     list.appendChild(el('li',{}, 'Błąd: ' + err.message));
   }
 }
 
+// Zmiany z SSE (z include_tasks=true zdarzenie niesie pełne zadania)
+// nakładamy na listę na ekranie, bez ponownego pobierania /tasks.
+function applyChanges(payload){
+  if (payload.reset) return render();
+  const {completed, q} = currentFilter();
+  const changed = new Map((payload.tasks || []).map(t=>[t.id, t]));
+  const deleted = new Set(payload.deleted);
+  const fits = t => completed === null || !!t.completed === completed;
+  // zmienione zadania zostają na swoim miejscu (kolejność wyników wyszukiwania)
+  const tasks = shownTasks
+    .filter(t => !deleted.has(t.id))
+    .map(t => changed.get(t.id) || t)
+    .filter(fits);
+  if (!q) {
+    // bez wyszukiwania lista jest w kolejności id — dopisujemy nowe
+    // i te, które zaczęły pasować do filtra; trafienia wyszukiwania
+    // ocenia tylko serwer, więc przy aktywnym `q` ich nie dopisujemy
+    const shown = new Set(tasks.map(t=>t.id));
+    changed.forEach(t=>{ if (!shown.has(t.id) && fits(t)) tasks.push(t) });
+    tasks.sort((a,b)=>a.id - b.id);
+  }
+  shownTasks = tasks;
+  draw();
+}
+
+function draw(){
+  const list = document.getElementById('tasks');
+  list.innerHTML='';
+  shownTasks.forEach(t=>{
+    const badge = el('span',{class: 'badge ' + (t.completed ? 'done' : 'active')}, t.completed ? 'Ukończone' : 'Aktywne');
+    const dates = el('div',{class:'dates'},
+      t.created_at ? el('div',{class:'date created'}, 'Utworzono: ' + new Date(t.created_at).toLocaleString()) : null,
+      t.completed_at ? el('div',{class:'date completed_at'}, 'Zakończono: ' + new Date(t.completed_at).toLocaleString()) : null
+    );
+
+    const item = el('li',{class:'task'+(t.completed? ' completed':'' )},
+      el('input',{type:'checkbox',checked:!!t.completed}),
+      el('div',{class:'content'},
+        el('div',{class:'title'}, t.title, ' ', badge),
+        t.description? el('div',{class:'desc'}, t.description) : null,
+        dates
+      ),
+      el('div',{class:'controls'},
+        el('button',{class:'btn edit'}, 'Edytuj'),
+        el('button',{class:'btn toggle'}, t.completed? 'Oznacz jako nieukończone' : 'Oznacz jako ukończone')
+      )
+    );
+
+    const checkbox = item.querySelector('input[type=checkbox]');
+    checkbox.addEventListener('change', async ()=>{
+      await updateTask(t.id, {completed: checkbox.checked});
+      render();
+    });
+
+    item.querySelector('.edit').addEventListener('click', async ()=>{
+      const newTitle = prompt('Nowy tytuł', t.title);
+      if(newTitle===null) return;
+      const newDesc = prompt('Nowy opis', t.description||'')
+      await updateTask(t.id, {title:newTitle, description:newDesc});
+      render();
+    });
+
+    item.querySelector('.toggle').addEventListener('click', async ()=>{
+      await updateTask(t.id, {completed: !t.completed});
+      render();
+    });
+
+    list.appendChild(item);
+  })
+}
+
 document.addEventListener('DOMContentLoaded', ()=>{
   const addBtn = document.getElementById('addBtn');
   addBtn.addEventListener('click', async ()=>{
@@ -124,8 +167,21 @@ document.addEventListener('DOMContentLoaded', ()=>{
   // filters
   const fq = document.getElementById('filterQ');
   const fc = document.getElementById('filterCompleted');
-  if(fq) fq.addEventListener('input', ()=>{ render(); });
+  // nie wysyłamy zapytania po każdym naciśnięciu klawisza — czekamy
+  // chwilę, aż użytkownik przestanie pisać
+  let filterTimer = null;
+  if(fq) fq.addEventListener('input', ()=>{
+    clearTimeout(filterTimer);
+    filterTimer = setTimeout(render, 200);
+  });
   if(fc) fc.addEventListener('change', ()=>{ render(); });
 
+  // zmiany z innych kart/klientów: serwer wysyła zdarzenie przez SSE
+  // razem ze zmienionymi zadaniami, więc nie odpytujemy /tasks ponownie
+  if (window.EventSource) {
+    const changes = new EventSource(`${apiBase}/tasks/changes/stream?include_tasks=true`);
+    changes.addEventListener('changes', e=>applyChanges(JSON.parse(e.data)));
+  }
+
   render();
 });
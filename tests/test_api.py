@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -137,4 +138,319 @@ def test_delete_task_success():
 def test_delete_task_not_found():
     r = client.delete("/tasks/999")
     assert r.status_code == 404
-    assert r.json()["detail"] == "Task not found"
\ No newline at end of file
+    assert r.json()["detail"] == "Task not found"
+
+def test_list_tasks_search_ignores_polish_diacritics():
+    client.post("/tasks", json={"title": "Żółw", "description": "nakarmić"})
+    client.post("/tasks", json={"title": "Pies", "description": "spacer"})
+    r = client.get("/tasks?q=zolw")
+    assert [t["title"] for t in r.json()] == ["Żółw"]
+    r2 = client.get("/tasks?q=NAKARMIC")
+    assert [t["title"] for t in r2.json()] == ["Żółw"]
+
+def test_list_tasks_search_rank_and_limit():
+    client.post("/tasks", json={"title": "Opis", "description": "kupić mleko"})
+    client.post("/tasks", json={"title": "Mleko", "description": "2 litry"})
+    r = client.get("/tasks?q=mleko&rank=true&limit=1")
+    assert [t["title"] for t in r.json()] == ["Mleko"]
+
+def test_list_tasks_search_sees_updates_and_deletes():
+    created = client.post("/tasks", json={"title": "Zakupy", "description": "d"}).json()
+    client.put(f"/tasks/{created['id']}", json={"title": "Sprzątanie"})
+    assert client.get("/tasks?q=zakupy").json() == []
+    assert len(client.get("/tasks?q=sprzatanie").json()) == 1
+    client.delete(f"/tasks/{created['id']}")
+    assert client.get("/tasks?q=sprzatanie").json() == []
+
+# --- PAGINATION & STREAMING ---
+def test_list_tasks_keyset_pagination():
+    for i in range(5):
+        client.post("/tasks", json={"title": f"T{i}", "description": "d"})
+    seen = []
+    r = client.get("/tasks?limit=2")
+    while True:
+        seen += [t["id"] for t in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        r = client.get(f"/tasks?limit=2&cursor={cursor}")
+    assert seen == [1, 2, 3, 4, 5]
+
+def test_list_tasks_sort_descending_by_created_at():
+    client.post("/tasks", json={"title": "A", "description": "d", "created_at": "2025-01-01T00:00:00Z"})
+    client.post("/tasks", json={"title": "B", "description": "d", "created_at": "2025-03-01T00:00:00Z"})
+    client.post("/tasks", json={"title": "C", "description": "d", "created_at": "2025-02-01T00:00:00Z"})
+    r = client.get("/tasks?sort=-created_at&limit=2")
+    assert [t["title"] for t in r.json()] == ["B", "C"]
+    r2 = client.get(f"/tasks?sort=-created_at&limit=2&cursor={r.headers['x-next-cursor']}")
+    assert [t["title"] for t in r2.json()] == ["A"]
+    assert "x-next-cursor" not in r2.headers
+
+def test_list_tasks_invalid_cursor_or_sort():
+    from app.pagination import encode_cursor
+
+    client.post("/tasks", json={"title": "T1", "description": "d"})
+    assert client.get("/tasks?cursor=nie-kursor").status_code == 400
+    assert client.get("/tasks?sort=title").status_code == 400
+    # poprawny base64/JSON, ale klucz innego kształtu niż klucz sortowania
+    for sort, key in (("id", [1.5]), ("id", [1, 2]), ("id", [True]), ("created_at", [1, 2]), ("created_at", ["x"])):
+        r = client.get("/tasks", params={"sort": sort, "cursor": encode_cursor(sort, key)})
+        assert r.status_code == 400, (sort, key)
+
+def test_list_tasks_with_hand_edited_id():
+    data_file = Path(__file__).resolve().parents[1] / "data" / "tasks.json"
+    data_file.write_text(json.dumps([
+        {"id": "x", "title": "ręczne", "description": "d", "completed": True},
+        {"id": 2, "title": "B", "description": "d", "completed": True},
+        {"id": 1, "title": "A", "description": "d", "completed": False},
+    ]))
+    r = client.get("/tasks?completed=true")
+    assert r.status_code == 200
+    assert [t["id"] for t in r.json()] == [2, "x"]
+    # stronicowanie i eksport nie gubią zadania z nie-liczbowym id
+    r = client.get("/tasks?limit=2")
+    assert [t["id"] for t in r.json()] == [1, 2]
+    r2 = client.get(f"/tasks?limit=2&cursor={r.headers['x-next-cursor']}")
+    assert [t["id"] for t in r2.json()] == ["x"]
+    r = client.get("/tasks/export")
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == [1, 2, "x"]
+
+def test_list_tasks_ndjson_stream():
+    client.post("/tasks", json={"title": "T1", "description": "d"})
+    client.post("/tasks", json={"title": "T2", "description": "d"})
+    r = client.get("/tasks", headers={"Accept": "application/x-ndjson"})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [t["title"] for t in lines] == ["T1", "T2"]
+
+def test_list_tasks_date_range_filters():
+    client.post("/tasks", json={"title": "A", "description": "d", "created_at": "2025-01-15T00:00:00Z"})
+    client.post("/tasks", json={"title": "B", "description": "d", "created_at": "2025-02-15T00:00:00Z"})
+    client.post("/tasks", json={"title": "C", "description": "d", "created_at": "2025-03-15T00:00:00Z"})
+    client.put("/tasks/2", json={"completed": True})
+    r = client.get("/tasks?created_after=2025-02-01&created_before=2025-04-01")
+    assert [t["title"] for t in r.json()] == ["B", "C"]
+    r = client.get("/tasks?created_after=2025-02-15T01:00:00%2B02:00")
+    assert [t["title"] for t in r.json()] == ["B", "C"]
+    r = client.get("/tasks?completed_after=2025-01-01")
+    assert [t["title"] for t in r.json()] == ["B"]
+    # rok przed 1000 porównuje się jak napis z czterocyfrowym rokiem
+    r = client.get("/tasks?created_after=0999-01-01")
+    assert [t["title"] for t in r.json()] == ["A", "B", "C"]
+    assert client.get("/tasks?created_after=wczoraj").status_code == 400
+    # przesunięcie strefy wychodzi poza zakres dat po zamianie na UTC
+    assert client.get("/tasks", params={"created_after": "0001-01-01T00:00:00+05:00"}).status_code == 400
+    assert client.get("/tasks", params={"completed_before": "9999-12-31T23:00:00-05:00"}).status_code == 400
+
+def test_task_stats_follow_create_update_delete():
+    client.post("/tasks", json={"title": "A", "description": "d", "created_at": "2025-01-15T10:00:00Z"})
+    client.post("/tasks", json={"title": "B", "description": "d", "created_at": "2025-01-15T12:00:00Z"})
+    client.post("/tasks", json={"title": "C", "description": "d", "created_at": "2025-01-16T10:00:00Z"})
+    client.put("/tasks/1", json={"completed": True})
+    client.put("/tasks/2", json={"completed": True})
+    client.put("/tasks/2", json={"completed": False})
+    client.delete("/tasks/3")
+    stats = client.get("/tasks/stats").json()
+    assert stats["total"] == 2 and stats["active"] == 1 and stats["completed"] == 1
+    assert stats["completion_rate"] == 0.5
+    assert stats["created_per_day"] == {"2025-01-15": 2}
+    assert sum(stats["completed_per_day"].values()) == 1
+    assert stats["mean_time_to_complete_seconds"] > 0
+
+# --- BATCH ---
+def test_batch_create_reports_per_item_results():
+    r = client.post("/tasks/batch", json=[
+        {"title": "A", "description": "d"},
+        {"title": "X" * 100, "description": "d"},
+        {"title": "B", "description": "d"},
+    ])
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [x["status"] for x in results] == [201, 422, 201]
+    assert [results[0]["task"]["id"], results[2]["task"]["id"]] == [1, 2]
+    assert len(client.get("/tasks").json()) == 2
+
+def test_batch_update_and_delete():
+    client.post("/tasks/batch", json=[{"title": f"T{i}", "description": "d"} for i in range(3)])
+    r = client.patch("/tasks/batch", json=[{"id": 1, "completed": True}, {"id": 99, "title": "x"}])
+    results = r.json()["results"]
+    assert results[0]["status"] == 200 and results[0]["task"]["completed_at"]
+    assert results[1] == {"index": 1, "status": 404, "error": "Task not found"}
+    r2 = client.request("DELETE", "/tasks/batch", json=[2, 3])
+    assert [x["status"] for x in r2.json()["results"]] == [204, 204]
+    assert [t["id"] for t in client.get("/tasks").json()] == [1]
+
+def test_batch_atomic_rolls_back_everything():
+    client.post("/tasks", json={"title": "T1", "description": "d"})
+    r = client.patch("/tasks/batch?atomic=true", json=[{"id": 1, "title": "zmienione"}, {"id": 42, "title": "x"}])
+    assert r.status_code == 409
+    assert [x["status"] for x in r.json()["detail"]["results"]] == [200, 404]
+    assert client.get("/tasks").json()[0]["title"] == "T1"
+
+# --- CHANGE FEED ---
+def test_changes_since_revision():
+    keep = client.post("/tasks", json={"title": "T1", "description": "d"}).json()
+    gone = client.post("/tasks", json={"title": "T2", "description": "d"}).json()
+    rev = client.get("/tasks").headers["x-revision"]
+
+    new = client.post("/tasks", json={"title": "T3", "description": "d"}).json()
+    client.put(f"/tasks/{keep['id']}", json={"completed": True})
+    client.delete(f"/tasks/{gone['id']}")
+
+    r = client.get(f"/tasks/changes?since={rev}&include_tasks=true")
+    body = r.json()
+    assert body["reset"] is False
+    assert body["created"] == [new["id"]]
+    assert body["updated"] == [keep["id"]]
+    assert body["deleted"] == [gone["id"]]
+    assert {t["id"] for t in body["tasks"]} == {new["id"], keep["id"]}
+
+    r2 = client.get(f"/tasks/changes?since={body['revision']}")
+    assert r2.json()["created"] == r2.json()["updated"] == r2.json()["deleted"] == []
+
+def test_revision_from_another_worker_forces_reset():
+    from app.changes import ChangeFeed
+
+    client.post("/tasks", json={"title": "T1", "description": "d"})
+    r = client.get("/tasks")
+    # ten sam numer rewizji, ale epoka innego procesu
+    foreign = ChangeFeed().epoch + "." + r.headers["x-revision"].split(".")[1]
+    body = client.get("/tasks/changes", params={"since": foreign}).json()
+    assert body["reset"] is True and body["revision"] == r.headers["x-revision"]
+    assert client.get("/tasks/changes", params={"since": "123"}).json()["reset"] is True
+    foreign_etag = r.headers["etag"].replace(r.headers["x-revision"], foreign)
+    assert client.get("/tasks", headers={"If-None-Match": foreign_etag}).status_code == 200
+    assert client.get("/tasks", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+def test_changes_include_external_file_change():
+    # zmiana pliku przez inny proces jest wykrywana i zgłaszana jako różnica
+    client.post("/tasks", json={"title": "T1", "description": "d"})
+    rev = client.get("/tasks").headers["x-revision"]
+    data_file = Path(__file__).resolve().parents[1] / "data" / "tasks.json"
+    data_file.write_text('[{"id": 7, "title": "z pliku", "description": "", "completed": false}]')
+    body = client.get(f"/tasks/changes?since={rev}").json()
+    assert body["reset"] is False
+    assert body["created"] == [7]
+    assert body["deleted"] == [1]
+
+# --- ETAG ---
+def test_list_tasks_etag_and_304():
+    client.post("/tasks", json={"title": "T1", "description": "d"})
+    r = client.get("/tasks?completed=false")
+    etag = r.headers["etag"]
+    r2 = client.get("/tasks?completed=false", headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    # inne parametry => inny ETag
+    assert client.get("/tasks", headers={"If-None-Match": etag}).status_code == 200
+    # zmiana danych => stary ETag nieaktualny
+    client.post("/tasks", json={"title": "T2", "description": "d"})
+    r3 = client.get("/tasks?completed=false", headers={"If-None-Match": etag})
+    assert r3.status_code == 200
+    assert [t["title"] for t in r3.json()] == ["T1", "T2"]
+
+# --- EXPORT / IMPORT ---
+def test_export_ndjson_and_csv():
+    client.post("/tasks", json={"title": "T1", "description": "d"})
+    client.post("/tasks", json={"title": "T2, z przecinkiem", "description": "d"})
+    client.put("/tasks/2", json={"completed": True})
+    from app import main
+
+    main._fragments.reset([])
+    page = main._store.page
+    borrowed = []
+
+    def counted_page(*args):
+        borrowed.append(main._read_limiter.borrowed_tokens)
+        return page(*args)
+
+    main._store.page = counted_page
+    try:
+        r = client.get("/tasks/export")
+    finally:
+        del main._store.page
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == [1, 2]
+    # eksport czyta strony w puli odczytów i nie zapełnia FragmentCache
+    assert borrowed and all(n >= 1 for n in borrowed)
+    assert main._fragments._entries == {}
+    r = client.get("/tasks/export?format=csv&completed=true")
+    lines = r.text.splitlines()
+    assert lines[0] == "id,title,description,completed,created_at,completed_at"
+    assert lines[1].startswith('2,"T2, z przecinkiem",d,true,')
+    assert len(lines) == 2
+    assert client.get("/tasks/export?format=xml").status_code == 400
+
+def test_import_ndjson_reports_line_errors_and_dry_run():
+    body = "\n".join([
+        json.dumps({"title": "A", "description": "d", "created_at": "2025-01-15T00:00:00Z"}),
+        "",
+        "{nie json",
+        json.dumps({"title": "x" * 51, "description": "d"}),
+        json.dumps({"id": 99, "title": "B", "description": "d", "completed": True}),
+    ])
+    r = client.post("/tasks/import?dry_run=true", content=body)
+    assert r.json()["imported"] == 2 and r.json()["dry_run"] is True
+    assert client.get("/tasks").json() == []
+
+    r = client.post("/tasks/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+    summary = r.json()
+    assert summary["lines"] == 5 and summary["imported"] == 2 and summary["failed"] == 2
+    assert [e["line"] for e in summary["errors"]] == [3, 4]
+    tasks = client.get("/tasks").json()
+    assert [(t["id"], t["title"]) for t in tasks] == [(1, "A"), (2, "B")]
+    assert tasks[0]["created_at"] == "2025-01-15T00:00:00Z"
+
+def test_import_reports_imported_count_when_write_fails(monkeypatch):
+    from app import bulk, main
+    from app.writer import WriterBusy
+
+    monkeypatch.setattr(bulk, "IMPORT_BATCH", 1)
+    execute = main._writer.execute
+    calls = []
+
+    async def failing_second_batch(fn, admit=True):
+        calls.append(admit)
+        if len(calls) == 2:
+            raise WriterBusy("timeout", 3)
+        return await execute(fn, admit)
+
+    monkeypatch.setattr(main._writer, "execute", failing_second_batch)
+    body = "\n".join(json.dumps({"title": f"T{i}", "description": "d"}) for i in range(3))
+    r = client.post("/tasks/import", content=body)
+    assert r.status_code == 503 and r.headers["retry-after"] == "3"
+    assert r.json()["imported"] == 1 and r.json()["aborted"]
+    # limit przyjęć dotyczy tylko pierwszej partii
+    assert calls == [True, False]
+    assert [t["title"] for t in client.get("/tasks").json()] == ["T0"]
+
+# --- METRICS ---
+def test_server_timing_header_reports_storage_phases():
+    r = client.post("/tasks", json={"title": "T1", "description": "d"})
+    timing = r.headers["server-timing"]
+    assert "fsync;dur=" in timing and "total;dur=" in timing
+    assert "total;dur=" in client.get("/tasks").headers["server-timing"]
+
+def test_write_rejected_with_503_when_queue_full():
+    from app import main
+
+    main._writer._pending += main._writer.max_pending
+    try:
+        r = client.post("/tasks", json={"title": "T1", "description": "d"})
+    finally:
+        main._writer._pending -= main._writer.max_pending
+    assert r.status_code == 503
+    assert int(r.headers["retry-after"]) >= 1
+    assert client.get("/health").status_code == 200
+    assert 'tasks_write_rejections_total{reason="queue_full"}' in client.get("/metrics").text
+
+def test_metrics_endpoint_prometheus_text():
+    client.post("/tasks", json={"title": "T1", "description": "d"})
+    client.get("/tasks")
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'tasks_http_request_duration_seconds_count{method="POST",route="/tasks"}' in body
+    assert 'tasks_storage_phase_duration_seconds_bucket{phase="fsync",le="+Inf"}' in body
+    assert "tasks_count 1" in body
+    assert 'tasks_storage_file_bytes{file="tasks.json"}' in body
@@ -0,0 +1,26 @@
+from benchmarks.load import compare, percentile, run_benchmarks
+
+
+def _report(p95, rps):
+    return {"results": [{"transport": "asgi", "storage": "json", "endpoint": "POST /tasks", "size": 10,
+                         "concurrency": 1, "p95_ms": p95, "throughput_rps": rps}]}
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = _report(10.0, 100.0)
+    assert compare(_report(11.0, 95.0), baseline, 0.2) == []
+    assert len(compare(_report(13.0, 70.0), baseline, 0.2)) == 2
+
+
+def test_asgi_benchmark_smoke():
+    report = run_benchmarks(sizes=[50], concurrency=[2], requests=4)
+    endpoints = {row["endpoint"] for row in report["results"]}
+    assert "POST /tasks" in endpoints and "GET /tasks?limit=100" in endpoints
+    assert all(row["errors"] == 0 for row in report["results"])
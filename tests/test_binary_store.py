@@ -0,0 +1,190 @@
+import json
+import os
+
+from app import binary_store
+from app.binary_store import BinaryFileStore, BinarySnapshot, binary_to_json, json_to_binary
+
+
+def _task(task_id, completed=False, created="2025-11-23T10:00:00Z", **extra):
+    return {"id": task_id, "title": f"T{task_id}", "description": "d", "completed": completed,
+            "created_at": created, "completed_at": "2025-11-24T08:00:00Z" if completed else None, **extra}
+
+
+def test_binary_store_crud_filters_and_odd_tasks(tmp_path):
+    store = BinaryFileStore(str(tmp_path / "tasks.bin"))
+    with store.transaction() as tx:
+        tx.put({**_task(tx.allocate_id()), "description": None})
+        tx.put(_task(tx.allocate_id(), completed=True, created="2025-11-24T10:00:00Z"))
+        # zadanie spoza stałego układu (dodatkowe pole) zapisane jako JSON
+        tx.put(_task(tx.allocate_id(), created="2025-11-25T10:00:00Z", priority="wysoki"))
+
+    assert store.get(1)["description"] is None
+    assert store.get(3)["priority"] == "wysoki"
+    assert store.get(99) is None
+    assert [t["id"] for t in store.list(completed=True)] == [2]
+    assert [t["id"] for t in store.list(completed=False)] == [1, 3]
+    ranges = {"created_at": ("2025-11-23T10:00:00Z", None)}
+    assert [t["id"] for t in store.list(ranges=ranges)] == [2, 3]
+    assert [t["id"] for t in store.list(ranges={"completed_at": (None, "2025-11-25T00:00:00Z")})] == [2]
+
+    with store.transaction() as tx:
+        tx.delete(1)
+        tx.put({**tx.get(2), "title": "zmienione"})
+    store.close()
+
+    reopened = BinaryFileStore(str(tmp_path / "tasks.bin"))
+    assert [(t["id"], t["title"]) for t in reopened.all()] == [(2, "zmienione"), (3, "T3")]
+    assert reopened.count() == 2
+    with reopened.transaction() as tx:
+        assert tx.allocate_id() == 4
+    reopened.close()
+
+
+def test_binary_store_writes_only_changed_records(tmp_path, monkeypatch):
+    path = str(tmp_path / "tasks.bin")
+    store = BinaryFileStore(path)
+    with store.transaction() as tx:
+        for _ in range(20):
+            tx.put(_task(tx.allocate_id()))
+    encoded = []
+    encode_record = binary_store._encode_record
+    monkeypatch.setattr(binary_store, "_encode_record", lambda task, heap_put: (
+        encoded.append(task["id"]) or encode_record(task, heap_put)))
+
+    with store.transaction() as tx:
+        tx.put({**tx.get(5), "title": "zmienione", "completed": True,
+                "completed_at": "2025-11-24T08:00:00Z"})
+        tx.delete(7)
+        tx.delete(20)
+        tx.put(_task(tx.allocate_id(), priority="wysoki"))
+    assert sorted(encoded) == [5, 21]
+    ids = [i for i in range(1, 22) if i not in (7, 20)]
+    assert [t["id"] for t in store.all()] == ids
+    assert store.get(5)["title"] == "zmienione" and store.get(7) is None
+    assert [t["id"] for t in store.list(completed=True)] == [5]
+    assert [t["id"] for t in store.list(completed=False)] == [i for i in ids if i != 5]
+    assert store.get(21)["priority"] == "wysoki"
+    store.close()
+
+    # ponowne otwarcie sprawdza sumy kontrolne całego pliku
+    reopened = BinaryFileStore(path)
+    assert [t["id"] for t in reopened.all()] == ids
+    assert reopened.count() == len(ids)
+    assert [t["id"] for t in reopened.page(after=(10,), limit=3)[0]] == [11, 12, 13]
+    # przy dużym nieużywanym miejscu plik jest zapisywany od nowa
+    monkeypatch.setattr(binary_store, "COMPACT_MIN_BYTES", 0)
+    with reopened.transaction() as tx:
+        for task_id in range(1, 15):
+            if task_id != 7:
+                tx.put({**tx.get(task_id), "description": "x" * 200})
+    size = os.path.getsize(path)
+    with reopened.transaction() as tx:
+        for task_id in range(1, 15):
+            tx.delete(task_id)
+    assert os.path.getsize(path) < size / 2
+    assert [t["id"] for t in reopened.all()] == [15, 16, 17, 18, 19, 21]
+    reopened.close()
+
+
+def test_binary_snapshot_restores_backup_when_corrupted(tmp_path):
+    path = str(tmp_path / "tasks.bin")
+    store = BinaryFileStore(path)
+    with store.transaction() as tx:
+        tx.put(_task(1))
+    with store.transaction() as tx:
+        tx.put(_task(2))
+    store.close()
+
+    # uszkodzenie sterty — suma kontrolna nie zgadza się
+    data = bytearray(open(path, "rb").read())
+    data[-20] ^= 0xFF
+    open(path, "wb").write(bytes(data))
+
+    store = BinaryFileStore(path)
+    # .bak to stan sprzed ostatniego zapisu
+    assert [t["id"] for t in store.all()] == [1]
+    assert any(name.startswith("tasks.bin.corrupt.") for name in os.listdir(tmp_path))
+    store.close()
+
+
+def test_json_binary_conversion_round_trip(tmp_path):
+    tasks = [_task(2, completed=True), _task(1), {"id": "x", "title": "bez liczbowego id"}]
+    (tmp_path / "tasks.json").write_text(json.dumps(tasks), encoding="utf-8")
+
+    assert json_to_binary(str(tmp_path / "tasks.json"), str(tmp_path / "tasks.bin")) == 2
+    snapshot = BinarySnapshot(str(tmp_path / "tasks.bin"))
+    assert snapshot.get(1) == tasks[1]
+    snapshot.close()
+
+    assert binary_to_json(str(tmp_path / "tasks.bin"), str(tmp_path / "out.json")) == 2
+    assert json.loads((tmp_path / "out.json").read_text(encoding="utf-8")) == tasks[:2]
+
+
+class _Recorder:
+    def __init__(self):
+        self.resets = 0
+        self.applied = []
+
+    def reset(self, tasks):
+        self.resets += 1
+
+    def apply(self, ops):
+        self.applied.extend((op, arg["id"] if op == "put" else arg) for op, arg in ops)
+
+
+def test_binary_store_applies_other_process_changes_incrementally(tmp_path):
+    path = str(tmp_path / "tasks.bin")
+    writer = BinaryFileStore(path)
+    with writer.transaction() as tx:
+        tx.put(_task(1))
+    reader = BinaryFileStore(path)
+    recorder = _Recorder()
+    reader.subscribe(recorder)
+
+    with writer.transaction() as tx:
+        tx.put(_task(2))
+    with writer.transaction() as tx:
+        tx.put({**tx.get(1), "title": "zmienione"})
+        tx.delete(2)
+    reader.refresh()
+
+    assert recorder.resets == 1
+    # każde zmienione id raz, w stanie końcowym
+    assert recorder.applied == [("delete", 2), ("put", 1)]
+    assert reader.get(1)["title"] == "zmienione"
+    writer.close()
+    reader.close()
+
+
+def test_binary_reads_do_not_wait_for_open_transaction(tmp_path):
+    import threading
+
+    store = BinaryFileStore(str(tmp_path / "tasks.bin"))
+    with store.transaction() as tx:
+        tx.put(_task(tx.allocate_id()))
+    results = []
+    with store.transaction() as tx:
+        tx.put({**tx.get(1), "title": "nowy"})
+        reader = threading.Thread(target=lambda: results.append((store.get(1)["title"], store.count())))
+        reader.start()
+        reader.join(2)
+        assert not reader.is_alive()
+    assert results == [("T1", 1)]
+    assert store.get(1)["title"] == "nowy"
+    store.close()
+
+
+def test_binary_does_not_reuse_deleted_max_id(tmp_path):
+    path = str(tmp_path / "tasks.bin")
+    store = BinaryFileStore(path)
+    for _ in range(3):
+        with store.transaction() as tx:
+            tx.put(_task(tx.allocate_id()))
+    with store.transaction() as tx:
+        tx.delete(3)
+    store.close()
+
+    reopened = BinaryFileStore(path)
+    with reopened.transaction() as tx:
+        assert tx.allocate_id() == 4
+    reopened.close()
@@ -0,0 +1,14 @@
+import asyncio
+
+from app.bulk import ndjson_lines
+
+
+def test_ndjson_lines_across_chunks_and_too_long_line():
+    async def chunks():
+        for chunk in [b'{"a":', b'1}\n\n{"b"', b":2}\n" + b"x" * 20, b"x" * 20, b"\n{}"]:
+            yield chunk
+
+    async def collect():
+        return [item async for item in ndjson_lines(chunks(), max_line_bytes=16)]
+
+    assert asyncio.run(collect()) == [(1, b'{"a":1}'), (3, b'{"b":2}'), (4, None), (5, b"{}")]
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from app.changes import ChangeFeed
+
+
+def test_change_feed_trims_history_and_requests_reset():
+    feed = ChangeFeed(max_entries=2)
+    feed.reset([])
+    start = feed.revision
+    for i in range(1, 4):
+        feed.apply([("put", {"id": i})])
+    assert feed.changes_since(start)["reset"] is True
+    latest = feed.changes_since(feed.revision - 1)
+    assert latest["reset"] is False and latest["created"] == [3]
+
+
+def test_change_feed_wait_is_woken_from_another_thread():
+    feed = ChangeFeed()
+    feed.reset([])
+    since = feed.revision
+
+    async def scenario():
+        timer = threading.Timer(0.05, feed.apply, args=([("delete", 1)],))
+        timer.start()
+        return await feed.wait(since, timeout=5)
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_revisions_of_different_feeds_never_match():
+    # dwa workery numerują zmiany osobno — te same numery, różne historie
+    a, b = ChangeFeed(), ChangeFeed()
+    a.reset([])
+    b.reset([])
+    token = b.token()
+    b.apply([("put", {"id": 7})])
+    a.apply([("put", {"id": 1})])
+    assert b.parse_token(token) is not None
+    assert a.parse_token(token) is None
+    assert a.changes_since(a.parse_token(token))["reset"] is True
+    assert a.parse_token(a.token()) == a.revision
@@ -0,0 +1,14 @@
+import json
+
+from app.fragments import FragmentCache
+
+
+def test_fragment_cache_reencodes_changed_task():
+    cache = FragmentCache()
+    task = {"id": 1, "title": "Żółw", "completed": False}
+    assert json.loads(cache.encode_list([task])) == [task]
+    changed = {**task, "completed": True}
+    # bez unieważnienia: wpis nie pasuje do nowego obiektu, więc kodujemy od nowa
+    assert json.loads(cache.encode(changed)) == changed
+    cache.apply([("delete", 1)])
+    assert b"".join(cache.ndjson_chunks([task, changed])).count(b"\n") == 2
@@ -0,0 +1,94 @@
+from app.indexes import TaskIndex, matches
+from app.storage import JsonFileStore
+
+
+def _task(task_id, created_at, completed_at=None):
+    return {"id": task_id, "title": f"T{task_id}", "description": "", "completed": completed_at is not None,
+            "created_at": created_at, "completed_at": completed_at}
+
+
+def test_index_follows_puts_and_deletes():
+    index = TaskIndex()
+    index.reset([_task(1, "2025-01-01T00:00:00Z"), _task(2, "2025-02-01T00:00:00Z")])
+    index.apply([
+        ("put", _task(3, "2025-03-01T00:00:00Z", "2025-03-02T00:00:00Z")),
+        ("put", _task(1, "2025-01-01T00:00:00Z", "2025-03-05T00:00:00Z")),
+        ("delete", 2),
+    ])
+    assert index.get(2) is None
+    assert index.max_id() == 3
+    assert [t["id"] for t in index.list(completed=True)] == [1, 3]
+    assert index.list(completed=False) == []
+    ranges = {"completed_at": ("2025-03-03T00:00:00Z", None)}
+    assert [t["id"] for t in index.list(ranges=ranges)] == [1]
+    ranges = {"created_at": (None, "2025-02-15T00:00:00Z"), "completed_at": ("2025-03-01T00:00:00Z", None)}
+    assert [t["id"] for t in index.list(ranges=ranges)] == [1]
+
+
+def test_index_pages_match_store_pagination(tmp_path):
+    store = JsonFileStore(str(tmp_path / "tasks.json"))
+    with store.transaction() as tx:
+        for i in range(1, 8):
+            tx.put(_task(tx.allocate_id(), f"2025-01-0{8 - i}T00:00:00Z", "2025-02-01T00:00:00Z" if i % 2 else None))
+    for sort in ("id", "-id", "created_at", "-created_at"):
+        seen, after = [], None
+        while True:
+            page, after = store.page(completed=True, sort=sort, after=after, limit=2)
+            seen += [t["id"] for t in page]
+            if after is None:
+                break
+        expected = [t["id"] for t in sorted(store.list(completed=True),
+                                            key=lambda t: (t[sort.lstrip("-")], t["id"]),
+                                            reverse=sort.startswith("-"))]
+        assert seen == expected
+    # id nie są nadawane ponownie w obrębie pliku
+    with store.transaction() as tx:
+        tx.delete(3)
+        assert tx.allocate_id() == 8
+
+
+def test_index_keys_are_epoch_seconds_and_odd_dates_keep_string_order(tmp_path):
+    from app.pagination import paginate
+    from app.records import TaskRecord
+
+    store = JsonFileStore(str(tmp_path / "tasks.json"))
+    with store.transaction() as tx:
+        tx.put(_task(tx.allocate_id(), "2025-01-02T00:00:00Z", "2025-01-03T00:00:00Z"))
+        tx.put(_task(tx.allocate_id(), None))
+        # data wpisana ręcznie w innym zapisie
+        tx.put(_task(tx.allocate_id(), "2025-01-02 12:00"))
+        tx.put(_task(tx.allocate_id(), "2025-01-01T00:00:00Z"))
+    index = store._index
+    assert isinstance(store.get(1), TaskRecord)
+    assert all(type(key[0]) is int for key in index._sorted["created_at"])
+
+    tasks = store.all()
+    for sort in ("created_at", "-created_at"):
+        assert store.page(sort=sort, limit=10) == paginate(tasks, sort, limit=10)
+        after = paginate(tasks, sort, limit=2)[1]
+        assert store.page(sort=sort, after=after, limit=10) == paginate(tasks, sort, after=after, limit=10)
+    # granice w zapisie kanonicznym i jako sam dzień
+    for bounds in (("2025-01-01T00:00:00Z", None), ("2025-01-02", "2025-01-03"), (None, "2025-01-02T06:00:00Z")):
+        expected = [t["id"] for t in tasks if matches(t, None, {"created_at": bounds})]
+        assert [t["id"] for t in store.list(ranges={"created_at": bounds})] == expected
+    assert [t["id"] for t in store.list(ranges={"created_at": ("2025-01-02", "2025-01-03")})] == [1, 3]
+
+
+def test_reads_do_not_wait_for_open_transaction(tmp_path):
+    import threading
+
+    store = JsonFileStore(str(tmp_path / "tasks.json"))
+    with store.transaction() as tx:
+        tx.put(_task(tx.allocate_id(), "2025-01-01T00:00:00Z"))
+    results = []
+    # transakcja trzyma blokadę zapisu (jak w trakcie serializacji i fsync)
+    with store.transaction() as tx:
+        tx.put({**tx.get(1), "title": "nowy"})
+        reader = threading.Thread(target=lambda: results.append(
+            (store.get(1)["title"], store.count(), [t["id"] for t in store.page(limit=5)[0]])))
+        reader.start()
+        reader.join(2)
+        assert not reader.is_alive()
+    # odczyt w trakcie commitu widzi ostatni opublikowany stan
+    assert results == [("T1", 1, [1])]
+    assert store.get(1)["title"] == "nowy"
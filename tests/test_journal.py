@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+from app.journal import JournalStore
+
+
+def _create(store, title):
+    with store.transaction() as tx:
+        task = {"id": tx.allocate_id(), "title": title, "description": "d", "completed": False}
+        tx.put(task)
+    return task
+
+
+def test_journal_replay_after_reopen(tmp_path):
+    snapshot = tmp_path / "tasks.json"
+    store = JournalStore(str(snapshot))
+    t1 = _create(store, "T1")
+    t2 = _create(store, "T2")
+    with store.transaction() as tx:
+        tx.put({**t1, "completed": True})
+        tx.delete(t2["id"])
+    store.close()
+
+    reopened = JournalStore(str(snapshot))
+    tasks = reopened.all()
+    assert [t["id"] for t in tasks] == [1]
+    assert tasks[0]["completed"] is True
+    # id nie jest używane ponownie po usunięciu ostatniego zadania
+    assert _create(reopened, "T3")["id"] == 3
+    reopened.close()
+
+
+def test_journal_ignores_torn_tail(tmp_path):
+    snapshot = tmp_path / "tasks.json"
+    store = JournalStore(str(snapshot))
+    _create(store, "T1")
+    store.close()
+    segment = next(tmp_path.glob("tasks.json.journal.*"))
+    with open(segment, "ab") as f:
+        f.write(b'{"ops":[{"put":{"id":2,"tit')
+
+    reopened = JournalStore(str(snapshot))
+    assert [t["id"] for t in reopened.all()] == [1]
+    reopened.close()
+    assert segment.read_bytes().endswith(b"\n")
+
+
+def test_journal_compaction_writes_snapshot(tmp_path):
+    snapshot = tmp_path / "tasks.json"
+    store = JournalStore(str(snapshot), compact_threshold=200)
+    for i in range(20):
+        _create(store, f"T{i}")
+    store.compact(wait=True)
+    store.close()
+
+    data = json.loads(snapshot.read_text(encoding="utf-8"))
+    assert len(data) == 20
+    # stare segmenty są sprzątane, zostaje tylko kilka ostatnich
+    assert len(list(tmp_path.glob("tasks.json.journal.*"))) <= 3
+
+    reopened = JournalStore(str(snapshot))
+    assert len(reopened.all()) == 20
+    reopened.close()
+
+
+def test_journal_does_not_reuse_ids_after_compaction(tmp_path):
+    snapshot = tmp_path / "tasks.json"
+    store = JournalStore(str(snapshot))
+    for i in range(3):
+        _create(store, f"T{i}")
+    with store.transaction() as tx:
+        tx.delete(3)
+    # kilka kompakcji usuwa segment z operacjami na zadaniu 3
+    for _ in range(3):
+        store.compact(wait=True)
+    store.close()
+    assert all(b'"id":3' not in p.read_bytes() for p in tmp_path.glob("tasks.json.journal.*"))
+
+    reopened = JournalStore(str(snapshot))
+    assert _create(reopened, "T4")["id"] == 4
+    reopened.close()
+
+
+def test_journal_recovers_corrupt_snapshot_from_backup(tmp_path):
+    snapshot = tmp_path / "tasks.json"
+    store = JournalStore(str(snapshot), compact_threshold=1)
+    for i in range(5):
+        _create(store, f"T{i}")
+    store.close()
+    snapshot.write_text("{ to nie jest json")
+
+    reopened = JournalStore(str(snapshot))
+    assert len(reopened.all()) == 5
+    assert list(tmp_path.glob("tasks.json.corrupt.*"))
+    reopened.close()
+
+
+def test_second_process_cannot_open_same_journal(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    store = JournalStore(path)
+    with pytest.raises(RuntimeError):
+        JournalStore(path)
+    store.close()
+    JournalStore(path).close()
+
+
+class _FailingHalfway:
+    # plik, który zapisuje połowę rekordu i zgłasza brak miejsca
+    def __init__(self, fh):
+        self._fh = fh
+        self.name = fh.name
+
+    def write(self, data):
+        self._fh.write(data[:len(data) // 2])
+        self._fh.flush()
+        raise OSError(28, "No space left on device")
+
+    def __getattr__(self, name):
+        return getattr(self._fh, name)
+
+
+def test_failed_append_does_not_corrupt_later_commits(tmp_path):
+    snapshot = tmp_path / "tasks.json"
+    store = JournalStore(str(snapshot))
+    _create(store, "T1")
+    store._fh = _FailingHalfway(store._fh)
+    with pytest.raises(OSError):
+        _create(store, "nieudane")
+    _create(store, "T2")
+    _create(store, "T3")
+    store.close()
+
+    reopened = JournalStore(str(snapshot))
+    assert [t["title"] for t in reopened.all()] == ["T1", "T2", "T3"]
+    reopened.close()
@@ -0,0 +1,19 @@
+from app.metrics import Registry, server_timing
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    hist = registry.histogram("demo_seconds", "Przykład", ("phase",), buckets=(0.1, 1.0))
+    hist.observe(0.05, "load")
+    hist.observe(0.5, "load")
+    hist.observe(5, "load")
+    text = registry.render()
+    assert 'demo_seconds_bucket{phase="load",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{phase="load",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{phase="load",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{phase="load"} 3' in text
+
+
+def test_server_timing_sums_repeated_phases():
+    header = server_timing([("fsync", 0.001), ("load", 0.002), ("fsync", 0.003)], 0.010)
+    assert header == "fsync;dur=4.00, load;dur=2.00, total;dur=10.00"
@@ -0,0 +1,43 @@
+import json
+import multiprocessing
+
+from app.storage import JsonFileStore
+
+WORKERS = 4
+TASKS_PER_WORKER = 25
+
+
+def _worker(path, worker_no):
+    # osobny proces, osobny magazyn — jak `uvicorn --workers N`
+    store = JsonFileStore(path)
+    for i in range(TASKS_PER_WORKER):
+        with store.transaction() as tx:
+            tx.put({"id": tx.allocate_id(), "title": f"w{worker_no}-{i}", "description": "", "completed": False})
+
+
+def test_concurrent_workers_do_not_lose_writes(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    JsonFileStore(path)
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_worker, args=(path, n)) for n in range(WORKERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+    tasks = json.loads(open(path, encoding="utf-8").read())
+    assert len(tasks) == WORKERS * TASKS_PER_WORKER
+    # id są unikalne w całym "klastrze"
+    assert sorted(t["id"] for t in tasks) == list(range(1, WORKERS * TASKS_PER_WORKER + 1))
+
+
+def test_store_cache_sees_other_process_writes(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    store = JsonFileStore(path)
+    assert store.all() == []
+    ctx = multiprocessing.get_context("spawn")
+    p = ctx.Process(target=_worker, args=(path, 0))
+    p.start()
+    p.join(timeout=60)
+    assert len(store.all()) == TASKS_PER_WORKER
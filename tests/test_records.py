@@ -0,0 +1,40 @@
+import json
+
+from app.records import TaskRecord, compact_task, json_default, pack_time
+from app.storage import JsonFileStore
+
+
+def test_record_reads_like_the_original_dict():
+    task = {"id": 1, "title": "Zakupy", "description": "mleko", "completed": True,
+            "created_at": "2025-11-23T10:00:00Z", "completed_at": "2025-11-23T11:30:00Z"}
+    record = TaskRecord(task)
+    assert record == task and record.to_dict() == task
+    assert list(record) == list(task)
+    assert record["created_at"] == "2025-11-23T10:00:00Z" and record.get("missing") is None
+    assert {**record, "title": "Inne"}["title"] == "Inne"
+    assert json.loads(json.dumps(record, default=json_default)) == task
+
+
+def test_record_keeps_unusual_fields_and_dates():
+    task = {"id": 2, "title": "Ręcznie", "created_at": "23.11.2025", "tag": ["x"]}
+    record = compact_task(task)
+    assert record.to_dict() == task and list(record) == list(task)
+    assert "description" not in record
+
+
+def test_pack_time_only_packs_canonical_dates():
+    assert pack_time("2025-11-23T10:00:00Z") == 1763892000
+    # data tygodniowa — fromisoformat ją rozumie, ale unpack_time by ją zmienił
+    assert pack_time("2025-W47-1T10:00:00Z") == "2025-W47-1T10:00:00Z"
+    assert compact_task({"id": 1, "created_at": "2025-W47-1T10:00:00Z"})["created_at"] == "2025-W47-1T10:00:00Z"
+
+
+def test_store_file_format_unchanged(tmp_path):
+    path = tmp_path / "tasks.json"
+    store = JsonFileStore(str(path))
+    task = {"id": 1, "title": "T", "description": "d", "completed": False,
+            "created_at": "2025-11-23T10:00:00Z", "completed_at": None}
+    with store.transaction() as tx:
+        tx.put(task)
+    assert isinstance(store.get(1), TaskRecord)
+    assert json.loads(path.read_text(encoding="utf-8")) == [task]
@@ -0,0 +1,19 @@
+from app.search import SearchIndex, normalize
+
+
+def test_normalize_folds_case_and_polish_letters():
+    assert normalize("ZAŻÓŁĆ GĘŚLĄ JAŹŃ") == "zazolc gesla jazn"
+
+
+def test_search_index_incremental_updates():
+    index = SearchIndex()
+    index.reset([
+        {"id": 1, "title": "Zakupy", "description": "chleb i masło"},
+        {"id": 2, "title": "Masaż", "description": ""},
+    ])
+    assert index.search("masl") == [1]
+    assert index.search("MAS") == [1, 2]
+
+    index.apply([("put", {"id": 1, "title": "Zakupy", "description": "chleb"}), ("delete", 2)])
+    assert index.search("mas") == []
+    assert index.search("ch") == [1]
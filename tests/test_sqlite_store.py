@@ -0,0 +1,158 @@
+import json
+
+from app.sqlite_store import SqliteStore
+
+
+def test_sqlite_crud_and_completed_filter(tmp_path):
+    store = SqliteStore(str(tmp_path / "tasks.db"))
+    with store.transaction() as tx:
+        tx.put({"id": tx.allocate_id(), "title": "T1", "description": "d", "completed": False,
+                "created_at": "2025-11-23T10:00:00Z", "completed_at": None})
+        tx.put({"id": tx.allocate_id(), "title": "T2", "description": "d", "completed": True,
+                "created_at": "2025-11-23T11:00:00Z", "completed_at": "2025-11-23T12:00:00Z"})
+
+    assert [t["id"] for t in store.list(completed=True)] == [2]
+    assert [t["id"] for t in store.list(completed=False)] == [1]
+    assert store.get(2)["completed"] is True
+
+    with store.transaction() as tx:
+        tx.delete(1)
+    assert [t["id"] for t in store.all()] == [2]
+    store.close()
+
+
+def test_sqlite_rolls_back_failed_transaction(tmp_path):
+    store = SqliteStore(str(tmp_path / "tasks.db"))
+    try:
+        with store.transaction() as tx:
+            tx.put({"id": 1, "title": "T1", "description": "d", "completed": False})
+            raise RuntimeError("przerwane")
+    except RuntimeError:
+        pass
+    assert store.all() == []
+    store.close()
+
+
+def test_sqlite_migrates_existing_json(tmp_path):
+    json_file = tmp_path / "tasks.json"
+    json_file.write_text(json.dumps([
+        {"id": 3, "title": "Zakupy", "description": "spożywcze", "completed": False,
+         "created_at": "2025-11-23T10:00:00Z", "completed_at": None},
+    ]), encoding="utf-8")
+    store = SqliteStore(str(tmp_path / "tasks.db"), migrate_from=str(json_file))
+    assert store.get(3)["description"] == "spożywcze"
+    store.close()
+
+    # migracja jest jednorazowa — ponowne otwarcie nie importuje znowu
+    json_file.write_text("[]")
+    reopened = SqliteStore(str(tmp_path / "tasks.db"), migrate_from=str(json_file))
+    assert [t["id"] for t in reopened.all()] == [3]
+    reopened.close()
+
+
+def test_sqlite_keyset_page(tmp_path):
+    store = SqliteStore(str(tmp_path / "tasks.db"))
+    with store.transaction() as tx:
+        for day in (3, 1, 2, 1):
+            tx.put({"id": tx.allocate_id(), "title": "T", "description": "d", "completed": False,
+                    "created_at": f"2025-11-0{day}T00:00:00Z", "completed_at": None})
+    page, after = store.page(sort="created_at", limit=3)
+    assert [t["id"] for t in page] == [2, 4, 3]
+    page, after = store.page(sort="created_at", after=after, limit=3)
+    assert [t["id"] for t in page] == [1] and after is None
+    page, _ = store.page(sort="-id", after=(3,), limit=10)
+    assert [t["id"] for t in page] == [2, 1]
+    store.close()
+
+
+def test_sqlite_date_ranges_and_persisted_id_counter(tmp_path):
+    store = SqliteStore(str(tmp_path / "tasks.db"))
+    with store.transaction() as tx:
+        for day in (1, 2, 3):
+            tx.put({"id": tx.allocate_id(), "title": f"T{day}", "description": "d", "completed": day == 2,
+                    "created_at": f"2025-11-0{day}T10:00:00Z",
+                    "completed_at": "2025-11-05T10:00:00Z" if day == 2 else None})
+    ranges = {"created_at": ("2025-11-01T10:00:00Z", None)}
+    assert [t["id"] for t in store.list(ranges=ranges)] == [2, 3]
+    assert [t["id"] for t in store.page(sort="-id", limit=1, ranges=ranges)[0]] == [3]
+    assert [t["id"] for t in store.list(ranges={"completed_at": (None, "2025-12-01")})] == [2]
+
+    with store.transaction() as tx:
+        tx.delete(3)
+    store.close()
+    # usunięte ostatnie id nie wraca po ponownym otwarciu bazy
+    reopened = SqliteStore(str(tmp_path / "tasks.db"))
+    with reopened.transaction() as tx:
+        assert tx.allocate_id() == 4
+    reopened.close()
+
+
+def test_sqlite_reader_connections_are_pooled(tmp_path):
+    import threading
+
+    from app.sqlite_store import MAX_IDLE_READERS
+
+    store = SqliteStore(str(tmp_path / "tasks.db"))
+    # krótko żyjące wątki (jak pula serwera) nie zostawiają połączeń
+    for _ in range(50):
+        t = threading.Thread(target=store.get, args=(1,))
+        t.start()
+        t.join()
+    assert len(store._idle) <= MAX_IDLE_READERS
+    store.close()
+
+
+def test_sqlite_refresh_does_not_wait_for_transaction(tmp_path):
+    import threading
+    import time
+
+    store = SqliteStore(str(tmp_path / "tasks.db"))
+    inside, release = threading.Event(), threading.Event()
+
+    def slow_write():
+        with store.transaction() as tx:
+            tx.put({"id": tx.allocate_id(), "title": "T", "description": "d", "completed": False})
+            inside.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=slow_write)
+    writer.start()
+    inside.wait(5)
+    start = time.monotonic()
+    store.refresh()
+    assert store.get(1) is None
+    assert time.monotonic() - start < 0.5
+    release.set()
+    writer.join()
+    assert store.get(1)["title"] == "T"
+    store.close()
+
+
+class _Recorder:
+    def __init__(self):
+        self.resets, self.applied = 0, []
+
+    def reset(self, tasks):
+        self.resets += 1
+
+    def apply(self, ops):
+        self.applied.extend((op, arg["id"] if op == "put" else arg) for op, arg in ops)
+
+
+def test_sqlite_applies_other_process_changes_incrementally(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store, other = SqliteStore(path), SqliteStore(path)
+    recorder = _Recorder()
+    store.subscribe(recorder)
+    with other.transaction() as tx:
+        for _ in range(3):
+            tx.put({"id": tx.allocate_id(), "title": "T", "description": "d", "completed": False})
+    with store.transaction() as tx:
+        tx.put({**tx.get(1), "title": "zmienione"})
+    with other.transaction() as tx:
+        tx.delete(2)
+    store.refresh()
+    assert recorder.resets == 1  # tylko przy subscribe
+    assert recorder.applied == [("put", 1), ("put", 2), ("put", 3), ("put", 1), ("delete", 2)]
+    store.close()
+    other.close()
@@ -0,0 +1,23 @@
+from app.stats import TaskStats
+
+
+def _task(task_id, completed=False, completed_at=None):
+    return {"id": task_id, "title": "T", "description": "d", "completed": completed,
+            "created_at": "2025-11-23T10:00:00Z", "completed_at": completed_at}
+
+
+def test_stats_subtract_previous_version_of_task():
+    stats = TaskStats()
+    stats.reset([_task(1), _task(2)])
+    stats.apply([("put", _task(1, True, "2025-11-24T10:00:00Z"))])
+    snapshot = stats.snapshot()
+    assert snapshot["completed"] == 1 and snapshot["active"] == 1
+    assert snapshot["completed_per_day"] == {"2025-11-24": 1}
+    assert snapshot["mean_time_to_complete_seconds"] == 86400
+
+    stats.apply([("put", _task(1)), ("delete", 2), ("delete", 99)])
+    snapshot = stats.snapshot()
+    assert snapshot["total"] == 1 and snapshot["completed"] == 0
+    assert snapshot["completed_per_day"] == {}
+    assert snapshot["mean_time_to_complete_seconds"] is None
+    assert snapshot["created_per_day"] == {"2025-11-23": 1}
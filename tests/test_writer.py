@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from app.journal import JournalStore
+from app.writer import GroupCommitWriter, WriterBusy
+
+
+class CountingStore(JournalStore):
+    commits = 0
+
+    def _commit(self, ops):
+        self.commits += 1
+        super()._commit(ops)
+
+
+def _create(title):
+    def mutation(tx):
+        task = {"id": tx.allocate_id(), "title": title, "description": "d", "completed": False}
+        tx.put(task)
+        return task
+    return mutation
+
+
+def test_writer_groups_concurrent_mutations(tmp_path):
+    store = CountingStore(str(tmp_path / "tasks.json"))
+    writer = GroupCommitWriter(store, window_ms=50)
+    futures = [writer.submit(_create(f"T{i}")) for i in range(50)]
+    ids = [f.result(timeout=5)["id"] for f in futures]
+    writer.close()
+
+    assert sorted(ids) == list(range(1, 51))
+    assert len(store.all()) == 50
+    # 50 żądań, ale znacznie mniej zapisów na dysk
+    assert store.commits < 10
+    store.close()
+
+
+def test_writer_failed_mutation_does_not_affect_batch(tmp_path):
+    store = JournalStore(str(tmp_path / "tasks.json"))
+    writer = GroupCommitWriter(store, window_ms=50)
+
+    def failing(tx):
+        tx.put({"id": tx.allocate_id(), "title": "zły"})
+        raise ValueError("odrzucone")
+
+    ok1 = writer.submit(_create("A"))
+    bad = writer.submit(failing)
+    ok2 = writer.submit(_create("B"))
+    assert ok1.result(timeout=5)["id"] == 1
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    assert ok2.result(timeout=5)["id"] == 2
+    writer.close()
+
+    assert [t["title"] for t in store.all()] == ["A", "B"]
+    store.close()
+
+
+def test_writer_rejects_when_queue_full_or_wait_too_long(tmp_path):
+    store = JournalStore(str(tmp_path / "tasks.json"))
+    writer = GroupCommitWriter(store, window_ms=0, max_pending=2, max_wait_ms=50)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(tx):
+        started.set()
+        release.wait(5)
+
+    first = writer.submit(blocking)
+    started.wait(5)
+    queued = writer.submit(_create("czeka"))
+    with pytest.raises(WriterBusy) as exc:
+        writer.submit(_create("odrzucone"))
+    assert exc.value.reason == "queue_full" and exc.value.retry_after >= 1
+    # import już przyjęty może dopisać kolejną partię mimo limitu
+    forced = writer.submit(_create("wymuszone"), admit=False)
+
+    threading.Timer(0.2, release.set).start()
+    first.result(timeout=5)
+    # zmiana czekała dłużej niż max_wait_ms — odrzucona bez wykonania
+    with pytest.raises(WriterBusy):
+        queued.result(timeout=5)
+    # wymuszonej partii importu limit czasu nie dotyczy
+    assert forced.result(timeout=5)["title"] == "wymuszone"
+    assert writer.pending == 0
+    assert writer.submit(_create("po")).result(timeout=5)["id"] == 2
+    writer.close()
+    store.close()
+
+
+def test_cancelled_request_does_not_stop_writer(tmp_path):
+    store = JournalStore(str(tmp_path / "tasks.json"))
+    writer = GroupCommitWriter(store, window_ms=0)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(tx):
+        started.set()
+        release.wait(5)
+
+    first = writer.submit(blocking)
+    started.wait(5)
+    # klient rozłączył się, zanim zmiana trafiła do partii
+    cancelled = writer.submit(_create("anulowane"))
+    kept = writer.submit(_create("zostaje"))
+    assert cancelled.cancel()
+    release.set()
+    first.result(timeout=5)
+    assert kept.result(timeout=5)["title"] == "zostaje"
+    assert writer.submit(_create("po")).result(timeout=5)["id"] == 2
+    writer.close()
+    assert [t["title"] for t in store.all()] == ["zostaje", "po"]
+    store.close()